@@ -0,0 +1,132 @@
+"""
+conftest.py
+
+Shared fixtures for the performance benchmark suite (pytest-benchmark).
+
+Run from the repository root:
+
+    pytest benchmarks --sn7-rows 100000 \
+        --benchmark-autosave --benchmark-storage=file://benchmarks/results
+
+Compare two saved runs:
+
+    pytest-benchmark --storage file://benchmarks/results compare 0001 0002
+
+Postgres loader benchmarks run only when PGDATABASE (plus PGUSER,
+PGPASSWORD, PGHOST, PGPORT as needed) points at a PostGIS-enabled database;
+they create and drop their own ``sn7_bench`` schema.
+"""
+
+import os
+
+import pytest
+
+from etl.generate_synthetic import SyntheticSN7Config, estimate_rows, generate_frame
+
+
+def pytest_addoption(parser):
+    parser.addoption("--sn7-rows", type=int, default=10_000,
+                     help="Synthetic pixel CSV rows (10k to 10M)")
+    parser.addoption("--sn7-aois", type=int, default=30)
+    parser.addoption("--sn7-chips-per-aoi", type=int, default=2)
+    parser.addoption("--sn7-months", type=int, default=24)
+    parser.addoption("--sn7-join-aois", type=int, default=100_000,
+                     help="AOI polygons for the spatial join benchmark")
+    parser.addoption("--sn7-join-chips", type=int, default=1_000_000,
+                     help="Unique chips for the spatial join benchmark")
+
+
+def pytest_benchmark_update_json(config, benchmarks, output_json):
+    """Record the data scale alongside the timings."""
+    output_json["sn7_scale"] = {
+        "rows": config.getoption("--sn7-rows"),
+        "aois": config.getoption("--sn7-aois"),
+        "chips_per_aoi": config.getoption("--sn7-chips-per-aoi"),
+        "months": config.getoption("--sn7-months"),
+    }
+
+
+# ---------------------------------------------------------
+# Synthetic data at each ETL stage
+# ---------------------------------------------------------
+
+@pytest.fixture(scope="session")
+def sn7_pixel_df(request):
+    opt = request.config.getoption
+    config = SyntheticSN7Config(
+        n_aois=opt("--sn7-aois"),
+        chips_per_aoi=opt("--sn7-chips-per-aoi"),
+        n_months=opt("--sn7-months"),
+    )
+    # Scale building density so the output lands near the requested row count
+    config.buildings_per_chip *= opt("--sn7-rows") / estimate_rows(config)
+    return generate_frame(config, workers=os.cpu_count())
+
+
+@pytest.fixture(scope="session")
+def sn7_raw_records(sn7_pixel_df):
+    from etl.ingest import build_raw_chip_records
+    return build_raw_chip_records(sn7_pixel_df)
+
+
+@pytest.fixture(scope="session")
+def sn7_chip_gdf(sn7_raw_records):
+    from etl.transform import build_chip_geometries
+    return build_chip_geometries(sn7_raw_records)
+
+
+@pytest.fixture(scope="session")
+def sn7_aoi_gdf(sn7_chip_gdf):
+    from etl.build_aoi_polygons import build_aoi_polygons
+    return build_aoi_polygons(sn7_chip_gdf)
+
+
+@pytest.fixture(scope="session")
+def sn7_metadata(sn7_chip_gdf, sn7_aoi_gdf):
+    from etl.transform import join_chips_to_aois
+    return join_chips_to_aois(sn7_chip_gdf, sn7_aoi_gdf)
+
+
+# ---------------------------------------------------------
+# External services
+# ---------------------------------------------------------
+
+@pytest.fixture(scope="session")
+def pg_conn():
+    if not os.environ.get("PGDATABASE"):
+        pytest.skip("PGDATABASE not set; skipping Postgres loader benchmarks")
+    pytest.importorskip("psycopg2")
+
+    from etl.load import get_connection, create_tables
+
+    conn = get_connection(
+        os.environ["PGDATABASE"],
+        os.environ.get("PGUSER"),
+        os.environ.get("PGPASSWORD"),
+        host=os.environ.get("PGHOST", "localhost"),
+        port=int(os.environ.get("PGPORT", 5432)),
+    )
+    with conn.cursor() as cur:
+        cur.execute("DROP SCHEMA IF EXISTS sn7_bench CASCADE; CREATE SCHEMA sn7_bench;")
+        cur.execute("SET search_path TO sn7_bench, public;")
+    conn.commit()
+    create_tables(conn)
+
+    yield conn
+
+    conn.rollback()
+    with conn.cursor() as cur:
+        cur.execute("DROP SCHEMA IF EXISTS sn7_bench CASCADE;")
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture(scope="session")
+def api_client():
+    pytest.importorskip("fastapi")
+    try:
+        from fastapi.testclient import TestClient
+        from ml_end_to_end_pipeline.api.app import app
+    except (ImportError, FileNotFoundError) as exc:
+        pytest.skip(f"API app unavailable: {exc}")
+    return TestClient(app)
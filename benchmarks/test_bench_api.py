@@ -0,0 +1,47 @@
+"""
+Benchmarks for the FastAPI endpoints (in-process TestClient).
+"""
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def batch_body(sn7_raw_records):
+    chips = sn7_raw_records["chip_id"].unique()
+    return {
+        "records": [
+            {"chip_id": chips[i % len(chips)], "building_count": 20 + i % 7, "prev_building_count": 18}
+            for i in range(1000)
+        ]
+    }
+
+
+def test_health(benchmark, api_client):
+    benchmark(api_client.get, "/health")
+
+
+def test_predict_single(benchmark, api_client):
+    body = {"chip_id": "chip_001", "building_count": 10, "prev_building_count": 8}
+    response = benchmark(api_client.post, "/predict", json=body)
+    assert response.status_code == 200
+
+
+def test_predict_batch_1000(benchmark, api_client, batch_body):
+    response = benchmark(api_client.post, "/predict/batch", json=batch_body)
+    assert response.status_code == 200
+
+
+@pytest.fixture(scope="module")
+def columnar_body(batch_body):
+    records = batch_body["records"]
+    return {key: [r[key] for r in records] for key in records[0]}
+
+
+def test_predict_batch_columnar_1000(benchmark, api_client, columnar_body):
+    response = benchmark(api_client.post, "/predict/batch/columnar", json=columnar_body)
+    assert response.status_code == 200
+
+
+def test_predict_explain_1000(benchmark, api_client, batch_body):
+    response = benchmark(api_client.post, "/predict/explain", json=batch_body)
+    assert response.status_code in (200, 503)
@@ -0,0 +1,58 @@
+"""
+Benchmarks for the streaming drift monitor.
+
+``observe`` is what a prediction request pays: with the background worker
+running it only enqueues the batch. The update benchmarks measure the
+worker's side, folding one batch into the sketches.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml_end_to_end_pipeline.api.drift_monitor import DriftMonitor
+from ml_end_to_end_pipeline.models.drift import build_reference_profile
+
+
+def _batch(n, seed=0):
+    rng = np.random.default_rng(seed)
+    prev = rng.poisson(30, n).astype(float)
+    columns = {
+        "chip_id": np.array([f"chip_{i:05d}" for i in rng.integers(0, 2_000, n)], dtype=object),
+        "building_count": prev + rng.integers(-2, 8, n),
+        "prev_building_count": prev,
+    }
+    return columns, rng.normal(3, 2, n)
+
+
+@pytest.fixture(scope="module")
+def profile():
+    columns, preds = _batch(100_000, seed=1)
+    return build_reference_profile(pd.DataFrame(columns), preds)
+
+
+@pytest.fixture
+def running_monitor(profile):
+    monitor = DriftMonitor(profile=profile, queue_size=1_000_000)
+    monitor.start()
+    yield monitor
+    monitor.stop()
+
+
+@pytest.mark.parametrize("rows", [1, 1000])
+def test_observe_enqueue(benchmark, running_monitor, rows):
+    columns, preds = _batch(rows)
+    benchmark(running_monitor.observe, columns, preds)
+
+
+@pytest.mark.parametrize("rows", [1, 1000])
+def test_sketch_update(benchmark, profile, rows):
+    monitor = DriftMonitor(profile=profile)
+    columns, preds = _batch(rows)
+    benchmark(monitor.observe, columns, preds)
+
+
+def test_drift_report(benchmark, profile):
+    monitor = DriftMonitor(profile=profile, min_rows=1)
+    monitor.observe(*_batch(10_000, seed=2))
+    benchmark(monitor.report)
@@ -0,0 +1,33 @@
+"""
+Benchmarks for ingestion and transformation hot paths.
+"""
+
+from etl.build_aoi_polygons import build_aoi_polygons
+from etl.ingest import build_raw_chip_records, parse_sn7_filename
+from etl.transform import build_chip_geometries, join_chips_to_aois
+
+
+def test_parse_sn7_filename(benchmark, sn7_pixel_df):
+    filenames = sn7_pixel_df["filename"].iloc[:1000].tolist()
+    benchmark(lambda: [parse_sn7_filename(f) for f in filenames])
+
+
+def test_build_raw_chip_records(benchmark, sn7_pixel_df):
+    benchmark.pedantic(build_raw_chip_records, args=(sn7_pixel_df,), rounds=3)
+
+
+def test_build_chip_geometries(benchmark, sn7_raw_records):
+    benchmark.pedantic(build_chip_geometries, args=(sn7_raw_records,), rounds=3)
+
+
+def test_build_aoi_polygons(benchmark, sn7_chip_gdf):
+    # build_aoi_polygons adds a centroid column in place; work on a copy
+    benchmark.pedantic(
+        build_aoi_polygons,
+        setup=lambda: ((sn7_chip_gdf.copy(),), {}),
+        rounds=3,
+    )
+
+
+def test_join_chips_to_aois(benchmark, sn7_chip_gdf, sn7_aoi_gdf):
+    benchmark.pedantic(join_chips_to_aois, args=(sn7_chip_gdf, sn7_aoi_gdf), rounds=3)
@@ -0,0 +1,69 @@
+"""
+Benchmarks for batched tree-path attribution (models.explain).
+
+Latency budget for /predict/explain with a 100-tree, depth-16 forest over
+~1.5k one-hot features: p50 under 1 ms for a single row, under 10 ms for
+100 rows and under 100 ms for a 1,000-row batch with a cold cache. A batch
+of repeated inputs served from the LRU should stay around 1 ms.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml_end_to_end_pipeline.models.explain import ForestExplainer
+
+N_CHIPS = 1500
+
+
+@pytest.fixture(scope="module")
+def serving_pipeline():
+    from sklearn.compose import ColumnTransformer
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+    rng = np.random.default_rng(0)
+    n = 60_000
+    prev = rng.poisson(30, n).astype(float)
+    df = pd.DataFrame({
+        "chip_id": [f"chip_{i:05d}" for i in rng.integers(0, N_CHIPS, n)],
+        "building_count": prev + rng.integers(-2, 8, n),
+        "prev_building_count": prev,
+    })
+    target = df["building_count"] - df["prev_building_count"] + rng.normal(0, 1, n)
+
+    pipeline = Pipeline([
+        ("preprocess", ColumnTransformer([
+            ("num", StandardScaler(), ["building_count", "prev_building_count"]),
+            ("cat", OneHotEncoder(handle_unknown="ignore"), ["chip_id"]),
+        ])),
+        ("model", RandomForestRegressor(n_estimators=100, max_depth=16, n_jobs=-1, random_state=0)),
+    ])
+    pipeline.fit(df, target)
+    return pipeline, df
+
+
+@pytest.fixture(scope="module")
+def explainer(serving_pipeline):
+    return ForestExplainer.from_model(serving_pipeline[0], cache_size=0)
+
+
+@pytest.mark.parametrize("rows", [1, 100, 1000])
+def test_explain_cold(benchmark, explainer, serving_pipeline, rows):
+    batch = serving_pipeline[1].iloc[:rows]
+    benchmark(explainer.explain_array, batch)
+
+
+def test_explain_cached_1000(benchmark, serving_pipeline):
+    explainer = ForestExplainer.from_model(serving_pipeline[0], cache_size=10_000)
+    batch = serving_pipeline[1].iloc[:1000]
+    explainer.explain(batch)
+    benchmark(explainer.explain, batch)
+
+
+def test_explainer_build(benchmark, serving_pipeline):
+    from ml_end_to_end_pipeline.models.compact import CompactForestModel
+
+    compact = CompactForestModel.from_estimator(serving_pipeline[0])
+    benchmark(ForestExplainer, compact)
@@ -0,0 +1,46 @@
+"""
+Benchmarks for the temporal feature engine against the groupby baseline.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml_end_to_end_pipeline.models.temporal_features import build_temporal_features
+
+N_CHIPS = 50_000
+N_MONTHS = 24
+
+
+@pytest.fixture(scope="module")
+def chip_month_table():
+    """Shuffled chip-month table with ~5% of months missing."""
+    rng = np.random.default_rng(0)
+    chips = np.repeat([f"chip_{i:06d}" for i in range(N_CHIPS)], N_MONTHS)
+    months = np.tile(np.arange(N_MONTHS), N_CHIPS)
+    df = pd.DataFrame({
+        "chip_id": chips,
+        "time_id": [f"{2018 + m // 12}_{m % 12 + 1:02d}" for m in months],
+        "building_count": rng.poisson(20, len(chips)),
+    })
+    keep = rng.random(len(df)) > 0.05
+    return df[keep].sample(frac=1.0, random_state=0).reset_index(drop=True)
+
+
+def _groupby_baseline(df):
+    out = df.sort_values(["chip_id", "time_id"])
+    grouped = out.groupby("chip_id")["building_count"]
+    for lag in (1, 2, 3):
+        out[f"lag_{lag}"] = grouped.shift(lag)
+    for window in (3, 6):
+        out[f"rolling_mean_{window}"] = grouped.transform(lambda s: s.rolling(window, min_periods=1).mean())
+        out[f"rolling_std_{window}"] = grouped.transform(lambda s: s.rolling(window, min_periods=1).std())
+    return out
+
+
+def test_temporal_features_vectorized(benchmark, chip_month_table):
+    benchmark.pedantic(build_temporal_features, args=(chip_month_table,), rounds=3)
+
+
+def test_temporal_features_groupby_baseline(benchmark, chip_month_table):
+    benchmark.pedantic(_groupby_baseline, args=(chip_month_table,), rounds=1)
@@ -0,0 +1,63 @@
+"""
+Benchmarks for the Postgres loaders (requires PGDATABASE, see conftest.py).
+"""
+
+import pytest
+
+pytest.importorskip("psycopg2")
+
+from etl.load import (  # noqa: E402
+    insert_dim_aoi,
+    insert_dim_chip,
+    insert_dim_time,
+    insert_fact_chip_observation,
+)
+from etl.schema import (  # noqa: E402
+    build_dim_aoi,
+    build_dim_chip,
+    build_dim_time,
+    build_fact_chip_observation,
+)
+
+
+@pytest.fixture(scope="module")
+def star_tables(sn7_aoi_gdf, sn7_metadata):
+    return {
+        "dim_aoi": build_dim_aoi(sn7_aoi_gdf),
+        "dim_chip": build_dim_chip(sn7_metadata),
+        "dim_time": build_dim_time(sn7_metadata),
+        "fact": build_fact_chip_observation(sn7_metadata),
+    }
+
+
+def _truncate(conn, *tables):
+    with conn.cursor() as cur:
+        cur.execute(f"TRUNCATE {', '.join(tables)} CASCADE;")
+    conn.commit()
+
+
+def test_load_dimensions(benchmark, pg_conn, star_tables):
+    def run():
+        insert_dim_aoi(pg_conn, star_tables["dim_aoi"])
+        insert_dim_chip(pg_conn, star_tables["dim_chip"])
+        insert_dim_time(pg_conn, star_tables["dim_time"])
+
+    benchmark.pedantic(
+        run,
+        setup=lambda: _truncate(pg_conn, "fact_chip_observation", "dim_chip", "dim_aoi", "dim_time"),
+        rounds=3,
+    )
+
+
+def test_load_fact(benchmark, pg_conn, star_tables):
+    _truncate(pg_conn, "fact_chip_observation", "dim_chip", "dim_aoi", "dim_time")
+    insert_dim_aoi(pg_conn, star_tables["dim_aoi"])
+    insert_dim_chip(pg_conn, star_tables["dim_chip"])
+    insert_dim_time(pg_conn, star_tables["dim_time"])
+
+    benchmark.pedantic(
+        insert_fact_chip_observation,
+        args=(pg_conn, star_tables["fact"]),
+        setup=lambda: _truncate(pg_conn, "fact_chip_observation"),
+        rounds=3,
+    )
@@ -0,0 +1,103 @@
+"""
+Request-logging overhead at 5k req/s.
+
+Each round emits one second of traffic (5,000 requests) from the request
+thread and measures only the time spent in logging calls:
+- sync_fstring: the old pattern, two f-string logs per request straight to
+  a synchronous StreamHandler
+- queue_json[all]: one lazy, structured log per request through
+  LazyQueueHandler -> QueueListener -> JSON StreamHandler
+- queue_json[sampled_10pct]: as above with 10% sampling on /predict
+
+Per-call p99 (µs) is stored in the benchmark's extra_info.
+"""
+
+import logging
+import os
+import time
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pythonjsonlogger")
+
+from pythonjsonlogger.json import JsonFormatter  # noqa: E402
+
+from ml_end_to_end_pipeline.logging_config import (  # noqa: E402
+    EndpointSampler,
+    LazyQueueHandler,
+)
+
+REQUESTS_PER_SECOND = 5_000
+
+
+@pytest.fixture
+def sink():
+    f = open(os.devnull, "w")
+    yield f
+    f.close()
+
+
+def _logger(name, handler, sampler=None):
+    lg = logging.getLogger(f"bench.logging.{name}")
+    lg.handlers.clear()
+    lg.filters.clear()
+    lg.propagate = False
+    lg.setLevel(logging.INFO)
+    lg.addHandler(handler)
+    if sampler:
+        lg.addFilter(sampler)
+    return lg
+
+
+def _run(benchmark, emit):
+    per_call = np.empty(REQUESTS_PER_SECOND)
+
+    def one_second_of_traffic():
+        for i in range(REQUESTS_PER_SECOND):
+            t0 = time.perf_counter()
+            emit(i)
+            per_call[i] = time.perf_counter() - t0
+
+    benchmark.pedantic(one_second_of_traffic, rounds=5, iterations=1)
+    benchmark.extra_info["p99_us"] = round(float(np.percentile(per_call, 99)) * 1e6, 2)
+    benchmark.extra_info["requests"] = REQUESTS_PER_SECOND
+
+
+def test_sync_fstring(benchmark, sink):
+    handler = logging.StreamHandler(sink)
+    handler.setFormatter(logging.Formatter("%(asctime)s | %(levelname)s | %(message)s"))
+    lg = _logger("sync", handler)
+
+    def emit(i):
+        lg.info(f"Received single prediction request for chip chip_{i % 60:03d}")
+        lg.info(f"Single prediction completed in {0.42} ms | model_version=0.1.0")
+
+    benchmark.group = "logging"
+    _run(benchmark, emit)
+
+
+@pytest.mark.parametrize("rate", [1.0, 0.1], ids=["all", "sampled_10pct"])
+def test_queue_json(benchmark, sink, rate):
+    from logging.handlers import QueueListener
+    import queue
+
+    handler = logging.StreamHandler(sink)
+    handler.setFormatter(JsonFormatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+    q = queue.SimpleQueue()
+    listener = QueueListener(q, handler)
+    listener.start()
+    lg = _logger(f"queue_{rate}", LazyQueueHandler(q), EndpointSampler({"/predict": rate}))
+
+    def emit(i):
+        lg.info(
+            "Single prediction completed in %s ms",
+            0.42,
+            extra={"endpoint": "/predict", "chip_id": f"chip_{i % 60:03d}", "latency_ms": 0.42},
+        )
+
+    benchmark.group = "logging"
+    try:
+        _run(benchmark, emit)
+    finally:
+        listener.stop()
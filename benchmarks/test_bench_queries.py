@@ -0,0 +1,120 @@
+"""
+Before/after query benchmarks for the star schema layout (requires
+PGDATABASE, see conftest.py).
+
+"before": one heap fact table, no secondary or spatial indexes.
+"after":  fact table list-partitioned by time_id, loaded unindexed, then
+          B-tree (chip_id, time_id) and GiST indexes built and ANALYZEd.
+
+Both layouts are loaded through the asyncpg loader into their own schema.
+"""
+
+import os
+
+import pytest
+
+pytest.importorskip("psycopg2")
+pytest.importorskip("asyncpg")
+
+from etl.load import build_indexes, get_connection  # noqa: E402
+from etl.load_async import load_star_schema_parallel  # noqa: E402
+from etl.schema import (  # noqa: E402
+    build_dim_aoi,
+    build_dim_chip,
+    build_dim_time,
+    build_fact_chip_observation,
+)
+
+LAYOUTS = {
+    "before": {"schema": "sn7_bench_heap", "partitioned": False},
+    "after": {"schema": "sn7_bench_part", "partitioned": True},
+}
+
+
+def _db():
+    return {
+        "dbname": os.environ["PGDATABASE"],
+        "user": os.environ.get("PGUSER"),
+        "password": os.environ.get("PGPASSWORD"),
+        "host": os.environ.get("PGHOST", "localhost"),
+        "port": int(os.environ.get("PGPORT", 5432)),
+    }
+
+
+@pytest.fixture(scope="module")
+def layouts(sn7_aoi_gdf, sn7_metadata):
+    if not os.environ.get("PGDATABASE"):
+        pytest.skip("PGDATABASE not set; skipping query benchmarks")
+
+    tables = {
+        "dim_aoi": build_dim_aoi(sn7_aoi_gdf),
+        "dim_chip": build_dim_chip(sn7_metadata),
+        "dim_time": build_dim_time(sn7_metadata),
+        "fact": build_fact_chip_observation(sn7_metadata),
+    }
+    db = _db()
+    conns = {}
+
+    for name, layout in LAYOUTS.items():
+        conn = get_connection(**db)
+        with conn.cursor() as cur:
+            cur.execute(f"DROP SCHEMA IF EXISTS {layout['schema']} CASCADE;")
+            cur.execute(f"CREATE SCHEMA {layout['schema']};")
+            cur.execute(f"SET search_path TO {layout['schema']}, public;")
+        conn.commit()
+
+        load_star_schema_parallel(
+            tables["dim_aoi"], tables["dim_chip"], tables["dim_time"], tables["fact"],
+            n_connections=4, partitioned=layout["partitioned"], schema=layout["schema"],
+            **db,
+        )
+        if layout["partitioned"]:
+            build_indexes(conn)
+        conns[name] = conn
+
+    probe = tables["fact"].iloc[len(tables["fact"]) // 2]
+    chip = tables["dim_chip"].set_index("chip_id").loc[probe.chip_id]
+    yield conns, {
+        "time_id": probe.time_id,
+        "chip_id": probe.chip_id,
+        "bbox": chip.geometry.buffer(1).bounds,
+    }
+
+    for name, conn in conns.items():
+        conn.rollback()
+        with conn.cursor() as cur:
+            cur.execute(f"DROP SCHEMA IF EXISTS {LAYOUTS[name]['schema']} CASCADE;")
+        conn.commit()
+        conn.close()
+
+
+QUERIES = {
+    "month_count": (
+        "SELECT count(*) FROM fact_chip_observation WHERE time_id = %(time_id)s;"
+    ),
+    "chip_month": (
+        "SELECT building_id FROM fact_chip_observation "
+        "WHERE chip_id = %(chip_id)s AND time_id = %(time_id)s;"
+    ),
+    "chips_in_bbox": (
+        "SELECT chip_id FROM dim_chip "
+        "WHERE geometry && ST_MakeEnvelope(%(minx)s, %(miny)s, %(maxx)s, %(maxy)s, 32613);"
+    ),
+}
+
+
+@pytest.mark.parametrize("layout", list(LAYOUTS))
+@pytest.mark.parametrize("query", list(QUERIES))
+def test_query(benchmark, layouts, layout, query):
+    conns, probe = layouts
+    minx, miny, maxx, maxy = probe["bbox"]
+    params = {**probe, "minx": minx, "miny": miny, "maxx": maxx, "maxy": maxy}
+    benchmark.group = f"query:{query}"
+    benchmark.extra_info["layout"] = layout
+
+    def run():
+        with conns[layout].cursor() as cur:
+            cur.execute(QUERIES[query], params)
+            return cur.fetchall()
+
+    assert benchmark(run)
@@ -0,0 +1,45 @@
+"""
+Benchmarks for the star schema builders.
+
+Each benchmark also records the traced peak allocation of one extra call in
+``extra_info["peak_mb"]``, so saved runs track memory alongside time.
+"""
+
+import tracemalloc
+
+from etl.schema import (
+    build_dim_aoi,
+    build_dim_chip,
+    build_dim_time,
+    build_fact_chip_observation,
+)
+
+
+def _record_peak(benchmark, fn, arg):
+    tracemalloc.start()
+    try:
+        fn(arg)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    benchmark.extra_info["peak_mb"] = round(peak / 1e6, 1)
+
+
+def test_build_dim_aoi(benchmark, sn7_aoi_gdf):
+    _record_peak(benchmark, build_dim_aoi, sn7_aoi_gdf)
+    benchmark(build_dim_aoi, sn7_aoi_gdf)
+
+
+def test_build_dim_chip(benchmark, sn7_metadata):
+    _record_peak(benchmark, build_dim_chip, sn7_metadata)
+    benchmark.pedantic(build_dim_chip, args=(sn7_metadata,), rounds=3)
+
+
+def test_build_dim_time(benchmark, sn7_metadata):
+    _record_peak(benchmark, build_dim_time, sn7_metadata)
+    benchmark.pedantic(build_dim_time, args=(sn7_metadata,), rounds=3)
+
+
+def test_build_fact_chip_observation(benchmark, sn7_metadata):
+    _record_peak(benchmark, build_fact_chip_observation, sn7_metadata)
+    benchmark.pedantic(build_fact_chip_observation, args=(sn7_metadata,), rounds=3)
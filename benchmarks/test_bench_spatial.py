@@ -0,0 +1,60 @@
+"""
+Benchmark for the STRtree chip → AOI spatial join at scale.
+
+Chips and AOIs are built directly as geometry arrays (bypassing
+build_chip_geometries) so the join itself dominates.
+"""
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pytest
+import shapely
+
+from etl.transform import spatial_join_chips_to_aois
+
+
+
+
+@pytest.fixture(scope="module")
+def join_inputs(request):
+    n_aois = request.config.getoption("--sn7-join-aois")
+    n_chips = request.config.getoption("--sn7-join-chips")
+    rng = np.random.default_rng(0)
+
+    # AOIs: overlapping squares on a lon/lat grid inside UTM zones 30-35
+    side = int(np.ceil(np.sqrt(n_aois)))
+    gx, gy = np.meshgrid(np.arange(side), np.arange(side))
+    x0 = -12 + gx.ravel()[:n_aois] * (36 / side)
+    y0 = 10 + gy.ravel()[:n_aois] * (30 / side)
+    size = 36 / side * 1.2
+    aois = gpd.GeoDataFrame(
+        {"aoi_id": [f"aoi_{i}" for i in range(n_aois)]},
+        geometry=shapely.box(x0, y0, x0 + size, y0 + size),
+        crs="EPSG:4326",
+    )
+
+    # Chips: ~500 m squares, each expressed in its own UTM zone
+    lon = rng.uniform(-11.9, 23.9, n_chips)
+    lat = rng.uniform(10.1, 39.9, n_chips)
+    zones = ((lon + 180) // 6 + 1).astype(int)
+    polys = np.empty(n_chips, dtype=object)
+    for zone in np.unique(zones):
+        idx = np.nonzero(zones == zone)[0]
+        pts = gpd.GeoSeries(gpd.points_from_xy(lon[idx], lat[idx]), crs="EPSG:4326")
+        utm = pts.to_crs(f"EPSG:326{zone}")
+        polys[idx] = np.asarray(shapely.box(utm.x - 250, utm.y - 250, utm.x + 250, utm.y + 250))
+
+    chips = gpd.GeoDataFrame(
+        pd.DataFrame({"chip_id": [f"chip_{i}" for i in range(n_chips)], "utm_zone": zones}),
+        geometry=polys,
+        crs="EPSG:32613",
+    )
+    chips["centroid"] = shapely.centroid(polys)
+    return chips, aois
+
+
+def test_spatial_join_centroid(benchmark, join_inputs):
+    chips, aois = join_inputs
+    result = benchmark.pedantic(spatial_join_chips_to_aois, args=(chips, aois), rounds=1)
+    assert result["aoi_id"].notna().mean() > 0.99
@@ -0,0 +1,62 @@
+"""
+Benchmarks for month-to-month footprint tracking (etl.tracking).
+
+The full-stage benchmarks run at the ``--sn7-rows`` scale. The matching
+benchmarks compare one bulk STRtree query + vectorized IoU for a dense
+chip-month pair with a per-footprint query loop.
+"""
+
+import os
+
+import numpy as np
+import pytest
+import shapely
+
+from etl.tracking import build_building_lifecycle, match_footprints
+
+
+@pytest.fixture(scope="module")
+def month_pair():
+    rng = np.random.default_rng(0)
+    n = 5_000
+    x, y = rng.uniform(0, 1024, n), rng.uniform(0, 1024, n)
+    w, h = rng.uniform(3, 15, n), rng.uniform(3, 15, n)
+    dx, dy = rng.normal(0, 0.3, n), rng.normal(0, 0.3, n)
+    prev = shapely.box(x - w, y - h, x + w, y + h)
+    nxt = shapely.box(x - w + dx, y - h + dy, x + w + dx, y + h + dy)
+    return prev, nxt
+
+
+def _match_per_footprint(prev, nxt, min_iou=0.5):
+    tree = shapely.STRtree(nxt)
+    matches = []
+    for i, geom in enumerate(prev):
+        for j in tree.query(geom, predicate="intersects"):
+            inter = geom.intersection(nxt[j]).area
+            iou = inter / (geom.area + nxt[j].area - inter)
+            if iou >= min_iou:
+                matches.append((i, int(j), iou))
+    return matches
+
+
+def test_match_footprints_bulk(benchmark, month_pair):
+    benchmark(match_footprints, *month_pair)
+
+
+def test_match_footprints_per_footprint_baseline(benchmark, month_pair):
+    benchmark.pedantic(_match_per_footprint, args=month_pair, rounds=3)
+
+
+def test_build_building_lifecycle_serial(benchmark, sn7_pixel_df):
+    benchmark.pedantic(
+        build_building_lifecycle, args=(sn7_pixel_df,), kwargs={"workers": 1}, rounds=1
+    )
+
+
+def test_build_building_lifecycle_parallel(benchmark, sn7_pixel_df):
+    benchmark.pedantic(
+        build_building_lifecycle,
+        args=(sn7_pixel_df,),
+        kwargs={"workers": os.cpu_count()},
+        rounds=1,
+    )
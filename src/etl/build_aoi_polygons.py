@@ -8,7 +8,10 @@ This reconstructs the AOI boundaries directly from the dataset.
 import geopandas as gpd
 from shapely.ops import unary_union
 
+from etl.instrumentation import instrument_stage
 
+
+@instrument_stage("build_aoi_polygons.build_aoi_polygons")
 def build_aoi_polygons(metadata_gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
     """
     Build AOI polygons by taking the convex hull of chip centroids for each AOI.
@@ -0,0 +1,389 @@
+"""
+footprints.py
+
+Building footprint features from the pixel-level ground truth polygons.
+
+Every row of ``sn7_train_ground_truth_pix.csv`` carries one building polygon
+(WKT, pixel coordinates). This module:
+- streams the CSV in chunks (only ``filename`` and ``geometry`` are read)
+- parses each chunk with one bulk ``shapely.from_wkt`` call in a worker process
+- computes per-building area, perimeter, compactness and centroid with
+  vectorized shapely functions
+- reduces each chunk to additive per chip-month partials (count, sums,
+  sums of squares, min/max), which are merged and finalized at the end
+
+Only ``chunk_size × max_in_flight`` rows of WKT are ever held at once, and
+partials are one row per chip-month, so peak memory does not grow with the
+size of the file.
+
+The statistics reach the rest of the pipeline in two ways:
+- the ETL runners (``run_metadata_local``, ``pipelines.metadata_flow``)
+  replace the chip-month table ``fact_chip_footprint_stats``
+- ``join_footprint_stats`` (CLI ``--features``) adds the footprint columns
+  to the chip-month feature table
+
+Usage:
+    python -m etl.footprints \
+        --input data/raw/spacenet/sn7_train_ground_truth_pix.csv \
+        --output data/processed/footprint_stats.parquet \
+        --features data/processed/features.csv
+"""
+
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+import shapely
+
+from etl.ingest import parse_sn7_filename
+from etl.instrumentation import instrument_stage
+
+KEYS = ["chip_id", "time_id"]
+
+# Additive partial columns and how they merge across chunks
+PARTIAL_AGG = {
+    "footprint_count": "sum",
+    "area_sum": "sum",
+    "area_sumsq": "sum",
+    "area_min": "min",
+    "area_max": "max",
+    "perimeter_sum": "sum",
+    "compactness_sum": "sum",
+    "centroid_x_sum": "sum",
+    "centroid_y_sum": "sum",
+    "invalid_count": "sum",
+}
+
+FOOTPRINT_FEATURES = [
+    "footprint_count",
+    "footprint_area_total",
+    "footprint_area_mean",
+    "footprint_area_std",
+    "footprint_area_min",
+    "footprint_area_max",
+    "footprint_perimeter_mean",
+    "footprint_compactness_mean",
+    "footprint_centroid_x",
+    "footprint_centroid_y",
+]
+
+STATS_COLUMNS = KEYS + FOOTPRINT_FEATURES + ["invalid_count"]
+
+
+# -----------------------------
+# Per-chunk computation
+# -----------------------------
+
+def _chip_time_keys(filenames: pd.Series) -> pd.DataFrame:
+    """
+    chip_id / time_id for each row, parsing every distinct filename once.
+    """
+    codes, uniques = pd.factorize(filenames)
+    parsed = [parse_sn7_filename(fn) for fn in uniques]
+    chip_ids = np.array([p.chip_id for p in parsed], dtype=object)
+    time_ids = np.array([f"{p.year}_{p.month:02d}" for p in parsed], dtype=object)
+    return pd.DataFrame({"chip_id": chip_ids[codes], "time_id": time_ids[codes]})
+
+
+def footprint_measures(wkt: np.ndarray) -> pd.DataFrame:
+    """
+    Per-building area, perimeter, compactness and centroid from WKT polygons.
+
+    Unparseable or empty geometries come back as NaN and are flagged invalid.
+    """
+    geoms = shapely.from_wkt(wkt, on_invalid="ignore")
+    valid = ~(shapely.is_missing(geoms) | shapely.is_empty(geoms))
+    geoms = np.where(valid, geoms, None)   # empty polygons → missing
+
+    area = shapely.area(geoms)
+    perimeter = shapely.length(geoms)
+    centroids = shapely.centroid(geoms)
+    # Polsby-Popper: 1.0 for a circle, lower for elongated shapes
+    with np.errstate(invalid="ignore", divide="ignore"):
+        compactness = np.where(perimeter > 0, 4 * np.pi * area / perimeter ** 2, 0.0)
+
+    return pd.DataFrame({
+        "valid": valid,
+        "area": np.where(valid, area, np.nan),
+        "perimeter": np.where(valid, perimeter, np.nan),
+        "compactness": np.where(valid, compactness, np.nan),
+        "centroid_x": np.where(valid, shapely.get_x(centroids), np.nan),
+        "centroid_y": np.where(valid, shapely.get_y(centroids), np.nan),
+    })
+
+
+def chunk_partials(chunk: pd.DataFrame) -> pd.DataFrame:
+    """
+    Reduce one chunk of (filename, geometry) rows to chip-month partials.
+    """
+    keys = _chip_time_keys(chunk["filename"])
+    m = footprint_measures(chunk["geometry"].to_numpy(dtype=object))
+    valid = m["valid"].to_numpy()
+
+    frame = pd.DataFrame({
+        "chip_id": keys["chip_id"],
+        "time_id": keys["time_id"],
+        "footprint_count": valid.astype(np.int64),
+        "area_sum": m["area"].fillna(0.0),
+        "area_sumsq": m["area"].fillna(0.0) ** 2,
+        "area_min": m["area"],
+        "area_max": m["area"],
+        "perimeter_sum": m["perimeter"].fillna(0.0),
+        "compactness_sum": m["compactness"].fillna(0.0),
+        "centroid_x_sum": m["centroid_x"].fillna(0.0),
+        "centroid_y_sum": m["centroid_y"].fillna(0.0),
+        "invalid_count": (~valid).astype(np.int64),
+    })
+    return frame.groupby(KEYS, sort=False).agg(PARTIAL_AGG)
+
+
+def merge_partials(partials: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Merge chip-month partials from several chunks.
+    """
+    if not partials:
+        return pd.DataFrame(columns=KEYS + list(PARTIAL_AGG)).set_index(KEYS)
+    return pd.concat(partials).groupby(level=KEYS, sort=False).agg(PARTIAL_AGG)
+
+
+def finalize_stats(partials: pd.DataFrame) -> pd.DataFrame:
+    """
+    Turn merged partials into chip-month footprint features.
+    """
+    p = partials
+    n = p["footprint_count"].astype(float)
+    denom = n.where(n > 0)
+    mean = p["area_sum"] / denom
+    var = (p["area_sumsq"] / denom - mean ** 2).clip(lower=0)
+
+    stats = pd.DataFrame({
+        "footprint_count": p["footprint_count"].astype(np.int64),
+        "footprint_area_total": p["area_sum"],
+        "footprint_area_mean": mean,
+        "footprint_area_std": np.sqrt(var),
+        "footprint_area_min": p["area_min"],
+        "footprint_area_max": p["area_max"],
+        "footprint_perimeter_mean": p["perimeter_sum"] / denom,
+        "footprint_compactness_mean": p["compactness_sum"] / denom,
+        "footprint_centroid_x": p["centroid_x_sum"] / denom,
+        "footprint_centroid_y": p["centroid_y_sum"] / denom,
+        "invalid_count": p["invalid_count"].astype(np.int64),
+    })
+    return stats.reset_index().sort_values(KEYS, ignore_index=True)
+
+
+# -----------------------------
+# Streaming driver
+# -----------------------------
+
+def iter_geometry_chunks(source, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """
+    Yield (filename, geometry) chunks from a CSV/Parquet path or a DataFrame.
+    """
+    if isinstance(source, pd.DataFrame):
+        for start in range(0, len(source), chunk_size):
+            yield source.iloc[start:start + chunk_size][["filename", "geometry"]]
+    elif str(source).endswith((".parquet", ".pq")):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(source).iter_batches(
+            batch_size=chunk_size, columns=["filename", "geometry"]
+        ):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(
+            source,
+            usecols=["filename", "geometry"],
+            dtype={"filename": str, "geometry": str},
+            chunksize=chunk_size,
+        )
+
+
+@instrument_stage("footprints.build_footprint_stats")
+def build_footprint_stats(
+    source,
+    chunk_size: int = 250_000,
+    workers: Optional[int] = None,
+    max_in_flight: Optional[int] = None,
+    merge_every: int = 32,
+) -> pd.DataFrame:
+    """
+    Chip-month footprint statistics from the pixel CSV (path or DataFrame).
+    """
+    workers = os.cpu_count() if workers is None else workers
+    max_in_flight = max_in_flight or max(2, 2 * workers)
+
+    merged: List[pd.DataFrame] = []
+    rows = 0
+    start = time.perf_counter()
+
+    def collect(partial: pd.DataFrame) -> None:
+        merged.append(partial)
+        # Fold partials periodically so they never pile up
+        if len(merged) >= merge_every:
+            merged[:] = [merge_partials(merged)]
+
+    chunks = iter_geometry_chunks(source, chunk_size)
+    if workers <= 1:
+        for chunk in chunks:
+            rows += len(chunk)
+            collect(chunk_partials(chunk))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for chunk in chunks:
+                rows += len(chunk)
+                pending.append(pool.submit(chunk_partials, chunk))
+                if len(pending) >= max_in_flight:
+                    collect(pending.popleft().result())
+            while pending:
+                collect(pending.popleft().result())
+
+    stats = finalize_stats(merge_partials(merged))
+    elapsed = time.perf_counter() - start
+    print(f"✓ Footprint stats: {rows:,} polygons → {len(stats):,} chip-months "
+          f"in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):,.0f} rows/sec)")
+
+    invalid = int(stats["invalid_count"].sum())
+    if invalid:
+        print(f"  {invalid:,} empty or unparseable polygons skipped")
+    return stats
+
+
+# -----------------------------
+# Feature table
+# -----------------------------
+
+def join_footprint_stats(features: pd.DataFrame, stats: pd.DataFrame) -> pd.DataFrame:
+    """
+    Left-join the footprint columns onto a chip-month feature table.
+
+    Chip-months without any polygon get a count and total area of 0; the
+    other footprint columns stay NaN.
+    """
+    right = stats[KEYS + FOOTPRINT_FEATURES].astype({k: str for k in KEYS})
+    keys = features[KEYS].astype(str)
+    joined = keys.merge(right, on=KEYS, how="left", validate="many_to_one")
+    joined = joined.fillna({"footprint_count": 0, "footprint_area_total": 0.0})
+    joined["footprint_count"] = joined["footprint_count"].astype(np.int64)
+
+    out = features.drop(columns=[c for c in FOOTPRINT_FEATURES if c in features.columns])
+    for column in FOOTPRINT_FEATURES:
+        out[column] = joined[column].to_numpy()
+    return out
+
+
+# -----------------------------
+# Star schema table
+# -----------------------------
+
+DDL_FACT_CHIP_FOOTPRINT_STATS = """
+CREATE TABLE IF NOT EXISTS fact_chip_footprint_stats (
+    chip_id TEXT REFERENCES dim_chip(chip_id),
+    time_id TEXT REFERENCES dim_time(time_id),
+    footprint_count INT,
+    footprint_area_total DOUBLE PRECISION,
+    footprint_area_mean DOUBLE PRECISION,
+    footprint_area_std DOUBLE PRECISION,
+    footprint_area_min DOUBLE PRECISION,
+    footprint_area_max DOUBLE PRECISION,
+    footprint_perimeter_mean DOUBLE PRECISION,
+    footprint_compactness_mean DOUBLE PRECISION,
+    footprint_centroid_x DOUBLE PRECISION,
+    footprint_centroid_y DOUBLE PRECISION,
+    invalid_count INT,
+    PRIMARY KEY (chip_id, time_id)
+);
+"""
+
+
+@instrument_stage("footprints.replace_footprint_stats")
+def replace_footprint_stats(conn, stats: pd.DataFrame, page_size: int = 10_000) -> None:
+    """
+    Replace the footprint rows of every chip in ``stats`` in one transaction.
+    """
+    from psycopg2.extras import execute_values
+
+    def _value(v):
+        return None if v != v else float(v)
+
+    rows = [
+        (str(c), str(t), int(n), *(_value(v) for v in values), int(bad))
+        for c, t, n, *values, bad in zip(*(stats[col].tolist() for col in STATS_COLUMNS))
+    ]
+    chips = sorted(set(stats["chip_id"].astype(str)))
+
+    with conn.cursor() as cur:
+        cur.execute(DDL_FACT_CHIP_FOOTPRINT_STATS)
+        cur.execute("DELETE FROM fact_chip_footprint_stats WHERE chip_id = ANY(%s);", (chips,))
+        execute_values(
+            cur,
+            f"""
+            INSERT INTO fact_chip_footprint_stats ({", ".join(STATS_COLUMNS)})
+            VALUES %s;
+            """,
+            rows,
+            page_size=page_size,
+        )
+    conn.commit()
+
+
+# -----------------------------
+# CLI
+# -----------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Chip-month building footprint statistics")
+    parser.add_argument("--input", required=True, help="Pixel ground truth CSV or Parquet")
+    parser.add_argument("--output", required=True, help=".parquet or .csv")
+    parser.add_argument("--chunk-size", type=int, default=250_000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--features", default=None,
+                        help="Feature table CSV to add the footprint columns to")
+    parser.add_argument("--features-output", default=None,
+                        help="Where to write the joined feature table (default: --features)")
+    parser.add_argument("--load", action="store_true",
+                        help="Also replace fact_chip_footprint_stats in Postgres (PG* variables)")
+    args = parser.parse_args(argv)
+
+    stats = build_footprint_stats(args.input, chunk_size=args.chunk_size, workers=args.workers)
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    if args.output.endswith((".parquet", ".pq")):
+        stats.to_parquet(args.output, index=False)
+    else:
+        stats.to_csv(args.output, index=False)
+    print(f"✓ Wrote {args.output}")
+
+    if args.features:
+        features = pd.read_csv(args.features, dtype={"chip_id": str, "time_id": str})
+        joined = join_footprint_stats(features, stats)
+        output = args.features_output or args.features
+        joined.to_csv(output, index=False)
+        print(f"✓ Added {len(FOOTPRINT_FEATURES)} footprint columns to {len(joined):,} "
+              f"feature rows in {output}")
+
+    if args.load:
+        from etl.load import get_connection
+
+        conn = get_connection(
+            os.environ.get("PGDATABASE"),
+            os.environ.get("PGUSER"),
+            os.environ.get("PGPASSWORD"),
+            host=os.environ.get("PGHOST", "localhost"),
+            port=int(os.environ.get("PGPORT", 5432)),
+        )
+        try:
+            replace_footprint_stats(conn, stats)
+        finally:
+            conn.close()
+        print(f"✓ Loaded {len(stats):,} rows into fact_chip_footprint_stats")
+
+
+if __name__ == "__main__":
+    main()
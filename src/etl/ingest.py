@@ -14,6 +14,8 @@ from dataclasses import asdict
 
 from shapely.geometry import Point
 
+from etl.instrumentation import instrument_stage
+
 # -----------------------------
 # Filename parsing
 # -----------------------------
@@ -83,17 +85,36 @@ def parse_sn7_filename(filename: str) -> ParsedFilename:
 # AOI loader
 # -----------------------------
 
-def load_aoi_polygons(aoi_path: str, utm_zone: int = 13) -> gpd.GeoDataFrame:
+@instrument_stage("ingest.load_aoi_polygons")
+def load_aoi_polygons(
+    aoi_path: str,
+    utm_zone: int = None,
+    id_column: str = None,
+) -> gpd.GeoDataFrame:
     """
-    Load AOI polygons and reproject to UTM.
+    Load AOI polygons with a string 'aoi_id' column.
+
+    AOIs stay in their source CRS unless utm_zone is given; the spatial join
+    reprojects per chip zone, so AOIs spanning several zones work unchanged.
     """
     print(f"Loading AOI polygons from: {aoi_path}")
     gdf = gpd.read_file(aoi_path)
     print(f"✓ Loaded {len(gdf):,} AOI polygons (raw)")
 
-    print(f"Reprojecting AOIs to UTM zone {utm_zone}...")
-    gdf = gdf.to_crs(f"EPSG:326{utm_zone}")
-    print("✓ AOIs reprojected")
+    if gdf.crs is None:
+        print("AOI file has no CRS; assuming EPSG:4326")
+        gdf = gdf.set_crs("EPSG:4326")
+
+    if id_column is None:
+        id_column = next((c for c in ("aoi_id", "id", "name") if c in gdf.columns), None)
+    gdf["aoi_id"] = (
+        gdf[id_column].astype(str) if id_column else gdf.index.map(lambda i: f"aoi_{i}")
+    )
+
+    if utm_zone is not None:
+        print(f"Reprojecting AOIs to UTM zone {utm_zone}...")
+        gdf = gdf.to_crs(f"EPSG:326{utm_zone}")
+        print("✓ AOIs reprojected")
 
     return gdf
 
@@ -102,6 +123,7 @@ def load_aoi_polygons(aoi_path: str, utm_zone: int = 13) -> gpd.GeoDataFrame:
 # Pixel-level CSV loader
 # -----------------------------
 
+@instrument_stage("ingest.load_sn7_pixel_csv")
 def load_sn7_pixel_csv(csv_path: str) -> pd.DataFrame:
     """
     Load the SpaceNet7 pixel-level ground truth CSV.
@@ -116,6 +138,7 @@ def load_sn7_pixel_csv(csv_path: str) -> pd.DataFrame:
 # Build raw chip metadata records
 # -----------------------------
 
+@instrument_stage("ingest.build_raw_chip_records")
 def build_raw_chip_records(df: pd.DataFrame) -> pd.DataFrame:
     """
     Parse filenames and attach structured metadata fields.
@@ -0,0 +1,273 @@
+"""
+instrumentation.py
+
+Stage-level timing and resource instrumentation for the SpaceNet7 ETL.
+
+ETL functions are wrapped with ``@instrument_stage("name")``. While a
+``RunReport`` is active, every call records:
+- wall time and CPU time
+- rows in (first DataFrame argument) and rows out (length of the result)
+- RSS before/after and the process peak RSS
+
+Outside an active report the wrapper only checks a context variable, so
+normal calls pay essentially nothing.
+
+The report is written as JSON and, optionally, as a Prometheus text file
+(node_exporter textfile / pushgateway format). With ``profile_dir`` set,
+each top-level stage also runs under cProfile and dumps ``<stage>.prof``;
+stage start offsets in the JSON line up with a ``py-spy record`` taken
+over the same run.
+
+Usage:
+    with RunReport("metadata_etl", profile_dir="reports/profiles") as report:
+        metadata = build_sn7_metadata(pixel_csv, None)
+    report.write_json("reports/etl_run.json")
+    report.write_prometheus("reports/etl_run.prom")
+"""
+
+import contextvars
+import cProfile
+import functools
+import json
+import os
+import time
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+_ACTIVE_REPORT = contextvars.ContextVar("sn7_active_report", default=None)
+_CURRENT_STAGE = contextvars.ContextVar("sn7_current_stage", default=None)
+
+
+# -----------------------------
+# Process resource helpers
+# -----------------------------
+
+def current_rss_bytes() -> int:
+    """
+    Resident set size of this process (Linux /proc, falling back to peak RSS).
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return peak_rss_bytes()
+
+
+def peak_rss_bytes() -> int:
+    """
+    Peak resident set size of this process so far.
+    """
+    try:
+        import resource
+    except ImportError:  # Windows
+        return 0
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _row_count(obj) -> Optional[int]:
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return len(obj)
+    if isinstance(obj, dict):
+        counts = [_row_count(v) for v in obj.values()]
+        counts = [c for c in counts if c is not None]
+        return sum(counts) if counts else None
+    return None
+
+
+# -----------------------------
+# Records
+# -----------------------------
+
+@dataclass
+class StageRecord:
+    stage: str
+    parent: Optional[str]
+    start_offset_s: float
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    rows_in: Optional[int] = None
+    rows_out: Optional[int] = None
+    rss_before_mb: float = 0.0
+    rss_after_mb: float = 0.0
+    rss_delta_mb: float = 0.0
+    peak_rss_mb: float = 0.0
+    profile_path: Optional[str] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class RunReport:
+    run_name: str = "sn7_etl"
+    profile_dir: Optional[str] = None
+    stages: List[StageRecord] = field(default_factory=list)
+    started_at: float = 0.0
+    wall_s: float = 0.0
+
+    def __enter__(self) -> "RunReport":
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+        self._token = _ACTIVE_REPORT.set(self)
+        if self.profile_dir:
+            os.makedirs(self.profile_dir, exist_ok=True)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.wall_s = round(time.perf_counter() - self._t0, 6)
+        _ACTIVE_REPORT.reset(self._token)
+
+    # -----------------------------
+    # Recording
+    # -----------------------------
+
+    def run_stage(self, name: str, func, args, kwargs):
+        record = StageRecord(
+            stage=name,
+            parent=_CURRENT_STAGE.get(),
+            start_offset_s=round(time.perf_counter() - self._t0, 6),
+            rows_in=next((n for n in map(_row_count, args) if n is not None), None),
+        )
+        rss_before = current_rss_bytes()
+        stage_token = _CURRENT_STAGE.set(name)
+        # Only one cProfile can be active; nested stages land in the parent's profile
+        profile = self.profile_dir and record.parent is None
+        profiler = cProfile.Profile() if profile else None
+
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        try:
+            if profiler:
+                result = profiler.runcall(func, *args, **kwargs)
+            else:
+                result = func(*args, **kwargs)
+        except Exception as exc:
+            record.error = f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            record.wall_s = round(time.perf_counter() - wall0, 6)
+            record.cpu_s = round(time.process_time() - cpu0, 6)
+            _CURRENT_STAGE.reset(stage_token)
+
+            rss_after = current_rss_bytes()
+            record.rss_before_mb = round(rss_before / 2**20, 2)
+            record.rss_after_mb = round(rss_after / 2**20, 2)
+            record.rss_delta_mb = round((rss_after - rss_before) / 2**20, 2)
+            record.peak_rss_mb = round(peak_rss_bytes() / 2**20, 2)
+
+            if profiler:
+                index = sum(1 for s in self.stages if s.stage == name)
+                suffix = f"_{index}" if index else ""
+                record.profile_path = os.path.join(
+                    self.profile_dir, f"{name.replace('.', '_')}{suffix}.prof"
+                )
+                profiler.dump_stats(record.profile_path)
+
+            self.stages.append(record)
+
+        record.rows_out = _row_count(result)
+        return result
+
+    # -----------------------------
+    # Output
+    # -----------------------------
+
+    def to_dict(self) -> Dict:
+        return {
+            "run_name": self.run_name,
+            "started_at": self.started_at,
+            "wall_s": self.wall_s,
+            "peak_rss_mb": round(peak_rss_bytes() / 2**20, 2),
+            "stages": [asdict(s) for s in self.stages],
+        }
+
+    def write_json(self, path: str) -> str:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return path
+
+    def to_prometheus(self) -> str:
+        """
+        Render stage metrics in the Prometheus text exposition format.
+        """
+        metrics = {
+            "wall_seconds": ("gauge", "Stage wall-clock time", "wall_s"),
+            "cpu_seconds": ("gauge", "Stage CPU time", "cpu_s"),
+            "rows_in": ("gauge", "Rows entering the stage", "rows_in"),
+            "rows_out": ("gauge", "Rows leaving the stage", "rows_out"),
+            "rss_delta_megabytes": ("gauge", "RSS change across the stage", "rss_delta_mb"),
+            "peak_rss_megabytes": ("gauge", "Process peak RSS after the stage", "peak_rss_mb"),
+        }
+
+        # Repeated calls of one stage are summed so each series is unique
+        totals: Dict[str, Dict[str, float]] = {}
+        for s in self.stages:
+            agg = totals.setdefault(s.stage, {})
+            for _, _, attr in metrics.values():
+                value = getattr(s, attr)
+                if value is None:
+                    continue
+                if attr == "peak_rss_mb":
+                    agg[attr] = max(agg.get(attr, 0.0), value)
+                else:
+                    agg[attr] = agg.get(attr, 0.0) + value
+
+        lines = []
+        for metric, (kind, help_text, attr) in metrics.items():
+            name = f"sn7_etl_stage_{metric}"
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for stage, agg in totals.items():
+                if attr in agg:
+                    lines.append(
+                        f'{name}{{run="{self.run_name}",stage="{stage}"}} {agg[attr]}'
+                    )
+        lines.append("# HELP sn7_etl_run_wall_seconds Total run wall-clock time")
+        lines.append("# TYPE sn7_etl_run_wall_seconds gauge")
+        lines.append(f'sn7_etl_run_wall_seconds{{run="{self.run_name}"}} {self.wall_s}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> str:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(self.to_prometheus())
+        # Atomic replace so textfile collectors never read a partial file
+        os.replace(tmp, path)
+        return path
+
+    def summary(self) -> str:
+        lines = [f"{'stage':<45}{'wall_s':>10}{'cpu_s':>10}{'rows_in':>12}{'rows_out':>12}{'ΔRSS_MB':>10}"]
+        for s in self.stages:
+            indent = "  " if s.parent else ""
+            lines.append(
+                f"{indent + s.stage:<45}{s.wall_s:>10.3f}{s.cpu_s:>10.3f}"
+                f"{s.rows_in if s.rows_in is not None else '-':>12}"
+                f"{s.rows_out if s.rows_out is not None else '-':>12}"
+                f"{s.rss_delta_mb:>10.1f}"
+            )
+        return "\n".join(lines)
+
+
+def active_report() -> Optional[RunReport]:
+    return _ACTIVE_REPORT.get()
+
+
+# -----------------------------
+# Decorator
+# -----------------------------
+
+def instrument_stage(name: str):
+    """
+    Record calls to the wrapped ETL function in the active RunReport.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            report = _ACTIVE_REPORT.get()
+            if report is None:
+                return func(*args, **kwargs)
+            return report.run_stage(name, func, args, kwargs)
+        return wrapper
+    return decorator
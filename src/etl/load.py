@@ -5,8 +5,9 @@ Postgres loader scaffolding for the SpaceNet7 star schema.
 
 This module provides:
 - Database connection helper
-- Table creation DDL
+- Table creation DDL (optionally with the fact table list-partitioned by time_id)
 - Bulk insert helpers for dim_aoi, dim_chip, dim_time, fact_chip_observation
+- Partition attach/detach and post-load index builds (B-tree + GiST, ANALYZE)
 """
 
 import psycopg2
@@ -14,6 +15,8 @@ import geopandas as gpd
 import pandas as pd
 from psycopg2.extras import execute_values
 
+from etl.instrumentation import instrument_stage
+
 
 # ---------------------------------------------------------------------
 # Database connection
@@ -81,22 +84,168 @@ CREATE TABLE IF NOT EXISTS fact_chip_observation (
 """
 
 
-def create_tables(conn):
+DDL_FACT_CHIP_OBS_PARTITIONED = """
+CREATE TABLE IF NOT EXISTS fact_chip_observation (
+    chip_id TEXT REFERENCES dim_chip(chip_id),
+    aoi_id TEXT REFERENCES dim_aoi(aoi_id),
+    time_id TEXT REFERENCES dim_time(time_id),
+    building_id INT,
+    chip_geometry GEOMETRY(POLYGON, 32613),
+    centroid_geometry GEOMETRY(POINT, 32613),
+    aoi_geometry GEOMETRY(POLYGON, 32613)
+) PARTITION BY LIST (time_id);
+"""
+
+
+@instrument_stage("load.create_tables")
+def create_tables(conn, partitioned: bool = False):
     """
     Create all star schema tables.
+
+    With partitioned=True the fact table is list-partitioned by time_id;
+    partitions are created per month by create_fact_partition().
     """
     with conn.cursor() as cur:
         cur.execute(DDL_DIM_AOI)
         cur.execute(DDL_DIM_CHIP)
         cur.execute(DDL_DIM_TIME)
-        cur.execute(DDL_FACT_CHIP_OBS)
+        cur.execute(DDL_FACT_CHIP_OBS_PARTITIONED if partitioned else DDL_FACT_CHIP_OBS)
     conn.commit()
 
 
+# ---------------------------------------------------------------------
+# Partition and index management
+# ---------------------------------------------------------------------
+
+# Built after bulk loads, never before: loading into unindexed partitions
+# avoids per-row index maintenance.
+INDEX_DDL = [
+    "CREATE INDEX IF NOT EXISTS ix_fact_chip_time "
+    "ON fact_chip_observation (chip_id, time_id);",
+    "CREATE INDEX IF NOT EXISTS ix_fact_time "
+    "ON fact_chip_observation (time_id);",
+    "CREATE INDEX IF NOT EXISTS gix_dim_chip_geometry "
+    "ON dim_chip USING GIST (geometry);",
+    "CREATE INDEX IF NOT EXISTS gix_dim_chip_centroid "
+    "ON dim_chip USING GIST (centroid);",
+    "CREATE INDEX IF NOT EXISTS gix_dim_aoi_geometry "
+    "ON dim_aoi USING GIST (geometry);",
+]
+
+ANALYZE_TABLES = ["dim_aoi", "dim_chip", "dim_time", "fact_chip_observation"]
+
+
+def fact_partition_name(time_id: str) -> str:
+    """
+    Table name for one monthly fact partition (e.g. fact_chip_observation_2018_01).
+    """
+    safe = "".join(ch if ch.isalnum() else "_" for ch in str(time_id))
+    return f"fact_chip_observation_{safe}"
+
+
+def _literal(value) -> str:
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def fact_partition_ddl(time_id: str) -> str:
+    """
+    DDL for one monthly partition of the partitioned fact table.
+    """
+    return (
+        f"CREATE TABLE IF NOT EXISTS {fact_partition_name(time_id)} "
+        f"PARTITION OF fact_chip_observation FOR VALUES IN ({_literal(time_id)});"
+    )
+
+
+def create_fact_partition(conn, time_id: str, attach: bool = True) -> str:
+    """
+    Create the partition for one time_id.
+
+    attach=False creates a standalone table with the same columns, to be
+    loaded and indexed on its own and then attached with
+    attach_fact_partition() without touching the live table.
+    """
+    name = fact_partition_name(time_id)
+    with conn.cursor() as cur:
+        if attach:
+            cur.execute(fact_partition_ddl(time_id))
+        else:
+            cur.execute(
+                f"CREATE TABLE IF NOT EXISTS {name} "
+                f"(LIKE fact_chip_observation INCLUDING DEFAULTS);"
+            )
+    conn.commit()
+    return name
+
+
+def attach_fact_partition(conn, time_id: str) -> None:
+    """
+    Attach a standalone monthly table to the partitioned fact table.
+
+    A matching CHECK constraint is added first so Postgres can skip the
+    validation scan; matching indexes on the table are attached as-is.
+    """
+    name = fact_partition_name(time_id)
+    check = f"{name}_time_id_check"
+    with conn.cursor() as cur:
+        cur.execute(
+            f"ALTER TABLE {name} ADD CONSTRAINT {check} "
+            f"CHECK (time_id IS NOT NULL AND time_id = %s);",
+            (str(time_id),),
+        )
+        cur.execute(
+            f"ALTER TABLE fact_chip_observation ATTACH PARTITION {name} "
+            f"FOR VALUES IN (%s);",
+            (str(time_id),),
+        )
+        cur.execute(f"ALTER TABLE {name} DROP CONSTRAINT {check};")
+    conn.commit()
+
+
+def detach_fact_partition(conn, time_id: str, drop: bool = False) -> None:
+    """
+    Detach an old monthly partition (optionally dropping it).
+    """
+    name = fact_partition_name(time_id)
+    with conn.cursor() as cur:
+        cur.execute(f"ALTER TABLE fact_chip_observation DETACH PARTITION {name};")
+        if drop:
+            cur.execute(f"DROP TABLE {name};")
+    conn.commit()
+
+
+@instrument_stage("load.build_indexes")
+def build_indexes(conn, analyze: bool = True) -> None:
+    """
+    Build B-tree and GiST indexes after the bulk load, then ANALYZE.
+    """
+    with conn.cursor() as cur:
+        for ddl in INDEX_DDL:
+            cur.execute(ddl)
+        if analyze:
+            for table in ANALYZE_TABLES:
+                cur.execute(f"ANALYZE {table};")
+    conn.commit()
+
+
+@instrument_stage("load.load_partitioned_fact")
+def load_partitioned_fact(conn, fact: gpd.GeoDataFrame) -> None:
+    """
+    Create any missing monthly partitions, then load the fact rows.
+
+    Call build_indexes() afterwards; partitions created before the parent
+    indexes exist are loaded without index maintenance.
+    """
+    for time_id in sorted(fact["time_id"].astype(str).unique()):
+        create_fact_partition(conn, time_id)
+    insert_fact_chip_observation(conn, fact)
+
+
 # ---------------------------------------------------------------------
 # Bulk insert helpers
 # ---------------------------------------------------------------------
 
+@instrument_stage("load.insert_dim_aoi")
 def insert_dim_aoi(conn, dim_aoi: gpd.GeoDataFrame):
     """
     Insert rows into dim_aoi.
@@ -116,6 +265,7 @@ def insert_dim_aoi(conn, dim_aoi: gpd.GeoDataFrame):
     conn.commit()
 
 
+@instrument_stage("load.insert_dim_chip")
 def insert_dim_chip(conn, dim_chip: gpd.GeoDataFrame):
     """
     Insert rows into dim_chip.
@@ -153,6 +303,7 @@ def insert_dim_chip(conn, dim_chip: gpd.GeoDataFrame):
     conn.commit()
 
 
+@instrument_stage("load.insert_dim_time")
 def insert_dim_time(conn, dim_time: pd.DataFrame):
     """
     Insert rows into dim_time.
@@ -175,6 +326,7 @@ def insert_dim_time(conn, dim_time: pd.DataFrame):
     conn.commit()
 
 
+@instrument_stage("load.insert_fact_chip_observation")
 def insert_fact_chip_observation(conn, fact: gpd.GeoDataFrame):
     """
     Insert rows into fact_chip_observation.
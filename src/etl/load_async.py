@@ -0,0 +1,422 @@
+"""
+load_async.py
+
+Parallel Postgres loader for the SpaceNet7 star schema using asyncpg.
+
+The synchronous loader in ``etl.load`` pushes every row through a single
+psycopg2 connection. This module instead:
+- opens a pool of N connections
+- loads the dimensions first, in one committed transaction
+- partitions the fact rows by ``time_id`` and balances the partitions over
+  the connections, each streaming its share with binary
+  ``copy_records_to_table``
+- generates records lazily in fixed-size batches, so in-flight memory is
+  bounded by ``batch_rows`` per connection rather than by the fact table
+- commits the fact transactions only after every connection has finished
+  copying; if any partition fails, all of them roll back
+
+Geometries are sent as EWKB through a binary codec for the PostGIS
+``geometry`` type.
+
+Usage:
+    stats = load_star_schema_parallel(
+        dim_aoi, dim_chip, dim_time, fact,
+        dbname="sn7", user="PGUSER", password="PGPASSWORD",
+        n_connections=8,
+    )
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, asdict
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import shapely
+
+from etl.instrumentation import instrument_stage
+from etl.load import (
+    DDL_DIM_AOI,
+    DDL_DIM_CHIP,
+    DDL_DIM_TIME,
+    DDL_FACT_CHIP_OBS,
+    DDL_FACT_CHIP_OBS_PARTITIONED,
+    fact_partition_ddl,
+)
+
+SRID = 32613
+
+# table -> [(db column, frame column, is_geometry)]
+TABLE_COLUMNS = {
+    "dim_aoi": [
+        ("aoi_id", "aoi_id", False),
+        ("name", "name", False),
+        ("geometry", "geometry", True),
+    ],
+    "dim_chip": [
+        ("chip_id", "chip_id", False),
+        ("year", "year", False),
+        ("month", "month", False),
+        ("zoom", "zoom", False),
+        ("tile_x", "tile_x", False),
+        ("tile_y", "tile_y", False),
+        ("utm_x", "utm_x", False),
+        ("utm_y", "utm_y", False),
+        ("utm_zone", "utm_zone", False),
+        ("geometry", "geometry", True),
+        ("centroid", "centroid", True),
+    ],
+    "dim_time": [
+        ("time_id", "time_id", False),
+        ("year", "year", False),
+        ("month", "month", False),
+    ],
+    "fact_chip_observation": [
+        ("chip_id", "chip_id", False),
+        ("aoi_id", "aoi_id", False),
+        ("time_id", "time_id", False),
+        ("building_id", "id", False),
+        ("chip_geometry", "geometry", True),
+        ("centroid_geometry", "centroid", True),
+        ("aoi_geometry", "aoi_geometry", True),
+    ],
+}
+
+PRIMARY_KEYS = {"dim_aoi": "aoi_id", "dim_chip": "chip_id", "dim_time": "time_id"}
+
+
+@dataclass
+class ConnectionStats:
+    worker: int
+    partitions: int
+    rows: int
+    seconds: float
+    rows_per_sec: float
+
+
+# ---------------------------------------------------------------------
+# Record generation
+# ---------------------------------------------------------------------
+
+def _python_values(values: np.ndarray) -> list:
+    """
+    Convert a column slice to Python scalars asyncpg can encode (NaN → None).
+    """
+    out = values.tolist()
+    if values.dtype.kind == "f":
+        out = [None if v != v else v for v in out]
+    return out
+
+
+ColumnArrays = Tuple[np.ndarray, Optional[np.ndarray], bool]
+
+
+def record_columns(df: pd.DataFrame, table: str) -> List[ColumnArrays]:
+    """
+    Convert the columns of ``table`` once, as (values, categories, is_geom).
+
+    Categorical columns keep their integer codes plus an object array of
+    categories with a trailing None, so a batch is ``categories[codes[idx]]``
+    (missing code -1 lands on the None) instead of a full object column.
+    """
+    out = []
+    for _, col, is_geom in TABLE_COLUMNS[table]:
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            categories = np.append(series.cat.categories.to_numpy(dtype=object), None)
+            out.append((series.cat.codes.to_numpy(), categories, is_geom))
+        else:
+            out.append((series.to_numpy(), None, is_geom))
+    return out
+
+
+def iter_records(
+    df: pd.DataFrame,
+    table: str,
+    rows: np.ndarray = None,
+    batch_rows: int = 50_000,
+    columns: Optional[List[ColumnArrays]] = None,
+) -> Iterator[tuple]:
+    """
+    Yield COPY records for ``table`` from ``df`` (optionally a row subset).
+
+    Geometry columns are encoded to EWKB one batch at a time, so only
+    ``batch_rows`` encoded rows exist at once. Pass ``columns`` from
+    record_columns to reuse one conversion across several row subsets.
+    """
+    arrays = record_columns(df, table) if columns is None else columns
+    rows = np.arange(len(df)) if rows is None else rows
+
+    for start in range(0, len(rows), batch_rows):
+        idx = rows[start:start + batch_rows]
+        columns = []
+        for values, categories, is_geom in arrays:
+            values = values[idx] if categories is None else categories[values[idx]]
+            if is_geom:
+                geoms = shapely.set_srid(np.asarray(values, dtype=object), SRID)
+                columns.append(shapely.to_wkb(geoms, include_srid=True).tolist())
+            else:
+                columns.append(_python_values(values))
+        yield from zip(*columns)
+
+
+def partition_rows(fact: pd.DataFrame, column: str = "time_id") -> Dict[str, np.ndarray]:
+    """
+    Row positions of the fact table for each partition key.
+    """
+    return {
+        str(key): np.asarray(idx)
+        for key, idx in fact.groupby(column, sort=True, observed=True).indices.items()
+    }
+
+
+def balance_partitions(partitions: Dict[str, np.ndarray], n_buckets: int) -> List[List[str]]:
+    """
+    Greedy largest-first assignment of partitions to connections.
+    """
+    buckets = [[] for _ in range(max(1, n_buckets))]
+    loads = [0] * len(buckets)
+    for key in sorted(partitions, key=lambda k: -len(partitions[k])):
+        i = loads.index(min(loads))
+        buckets[i].append(key)
+        loads[i] += len(partitions[key])
+    return [b for b in buckets if b]
+
+
+# ---------------------------------------------------------------------
+# Connection setup
+# ---------------------------------------------------------------------
+
+async def _init_connection(conn) -> None:
+    """
+    Send/receive PostGIS geometry as raw EWKB bytes in binary COPY.
+    """
+    await conn.set_type_codec(
+        "geometry",
+        schema="public",
+        encoder=bytes,
+        decoder=bytes,
+        format="binary",
+    )
+
+
+async def create_pool(
+    dbname, user, password, host="localhost", port=5432, n_connections=8, schema=None,
+):
+    import asyncpg
+
+    return await asyncpg.create_pool(
+        database=dbname,
+        user=user,
+        password=password,
+        host=host,
+        port=port,
+        min_size=n_connections,
+        max_size=n_connections,
+        init=_init_connection,
+        server_settings={"search_path": f"{schema}, public"} if schema else None,
+    )
+
+
+# ---------------------------------------------------------------------
+# Dimensions
+# ---------------------------------------------------------------------
+
+async def _copy_dimension(conn, table: str, df: pd.DataFrame) -> None:
+    """
+    COPY into a temp staging table, then insert with ON CONFLICT DO NOTHING
+    (same semantics as the synchronous loader).
+    """
+    stage = f"_stage_{table}"
+    columns = [c for c, _, _ in TABLE_COLUMNS[table]]
+    await conn.execute(
+        f"CREATE TEMP TABLE {stage} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP;"
+    )
+    await conn.copy_records_to_table(stage, records=iter_records(df, table), columns=columns)
+    await conn.execute(
+        f"INSERT INTO {table} ({', '.join(columns)}) "
+        f"SELECT {', '.join(columns)} FROM {stage} "
+        f"ON CONFLICT ({PRIMARY_KEYS[table]}) DO NOTHING;"
+    )
+
+
+async def load_dimensions(pool, dims: Dict[str, pd.DataFrame], partitioned: bool = False) -> None:
+    """
+    Create tables and load all dimensions in one transaction.
+
+    With ``partitioned`` the fact table is list-partitioned by time_id and
+    one (unindexed) partition is created per dim_time row.
+    """
+    fact_ddl = DDL_FACT_CHIP_OBS_PARTITIONED if partitioned else DDL_FACT_CHIP_OBS
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            for ddl in (DDL_DIM_AOI, DDL_DIM_CHIP, DDL_DIM_TIME, fact_ddl):
+                await conn.execute(ddl)
+            if partitioned:
+                for time_id in dims["dim_time"]["time_id"].astype(str).unique():
+                    await conn.execute(fact_partition_ddl(time_id))
+            for table in ("dim_aoi", "dim_chip", "dim_time"):
+                await _copy_dimension(conn, table, dims[table])
+
+
+# ---------------------------------------------------------------------
+# Facts
+# ---------------------------------------------------------------------
+
+async def _copy_bucket(
+    pool,
+    worker: int,
+    keys: Sequence[str],
+    partitions: Dict[str, np.ndarray],
+    fact: pd.DataFrame,
+    fact_columns: List[ColumnArrays],
+    batch_rows: int,
+    copied: asyncio.Future,
+    decision: asyncio.Future,
+) -> ConnectionStats:
+    """
+    Copy one connection's partitions inside a transaction, then commit or
+    roll back according to the coordinator's decision.
+    """
+    columns = [c for c, _, _ in TABLE_COLUMNS["fact_chip_observation"]]
+    rows = 0
+
+    try:
+        async with pool.acquire() as conn:
+            tr = conn.transaction()
+            await tr.start()
+            start = time.perf_counter()
+            try:
+                for key in keys:
+                    await conn.copy_records_to_table(
+                        "fact_chip_observation",
+                        records=iter_records(
+                            fact, "fact_chip_observation", partitions[key], batch_rows,
+                            fact_columns,
+                        ),
+                        columns=columns,
+                    )
+                    rows += len(partitions[key])
+            except BaseException:
+                await tr.rollback()
+                raise
+            elapsed = time.perf_counter() - start
+            copied.set_result(rows)
+
+            if await decision:
+                await tr.commit()
+            else:
+                await tr.rollback()
+    except BaseException as exc:
+        # Unblock the coordinator however this connection failed
+        if not copied.done():
+            copied.set_exception(exc)
+        raise
+
+    return ConnectionStats(
+        worker=worker,
+        partitions=len(keys),
+        rows=rows,
+        seconds=round(elapsed, 3),
+        rows_per_sec=round(rows / max(elapsed, 1e-9), 1),
+    )
+
+
+async def load_fact_parallel(
+    pool,
+    fact: pd.DataFrame,
+    n_connections: int,
+    partition_column: str = "time_id",
+    batch_rows: int = 50_000,
+) -> List[ConnectionStats]:
+    """
+    Stream fact partitions over ``n_connections`` concurrent COPYs.
+    """
+    loop = asyncio.get_running_loop()
+    partitions = partition_rows(fact, partition_column)
+    buckets = balance_partitions(partitions, n_connections)
+    # Converted once and shared; every batch of every partition indexes these
+    fact_columns = record_columns(fact, "fact_chip_observation")
+
+    decision = loop.create_future()
+    copied = [loop.create_future() for _ in buckets]
+    workers = [
+        asyncio.create_task(
+            _copy_bucket(
+                pool, i, keys, partitions, fact, fact_columns, batch_rows, copied[i], decision
+            )
+        )
+        for i, keys in enumerate(buckets)
+    ]
+
+    outcomes = await asyncio.gather(*copied, return_exceptions=True)
+    failures = [o for o in outcomes if isinstance(o, BaseException)]
+    decision.set_result(not failures)
+
+    results = await asyncio.gather(*workers, return_exceptions=True)
+    if failures:
+        raise failures[0]
+    return results
+
+
+async def load_star_schema_async(
+    pool,
+    dim_aoi: pd.DataFrame,
+    dim_chip: pd.DataFrame,
+    dim_time: pd.DataFrame,
+    fact: pd.DataFrame,
+    n_connections: int = 8,
+    partition_column: str = "time_id",
+    batch_rows: int = 50_000,
+    partitioned: bool = False,
+) -> List[ConnectionStats]:
+    dims = {"dim_aoi": dim_aoi, "dim_chip": dim_chip, "dim_time": dim_time}
+    await load_dimensions(pool, dims, partitioned)
+    return await load_fact_parallel(pool, fact, n_connections, partition_column, batch_rows)
+
+
+@instrument_stage("load_async.load_star_schema_parallel")
+def load_star_schema_parallel(
+    dim_aoi: pd.DataFrame,
+    dim_chip: pd.DataFrame,
+    dim_time: pd.DataFrame,
+    fact: pd.DataFrame,
+    dbname: str,
+    user: str,
+    password: str,
+    host: str = "localhost",
+    port: int = 5432,
+    n_connections: int = 8,
+    partition_column: str = "time_id",
+    batch_rows: int = 50_000,
+    partitioned: bool = False,
+    schema: str = None,
+) -> List[Dict]:
+    """
+    Synchronous entry point: load the star schema over a connection pool
+    and return per-connection throughput.
+
+    Indexes are not created here; call ``etl.load.build_indexes`` once the
+    load has finished.
+    """
+
+    async def _run():
+        pool = await create_pool(dbname, user, password, host, port, n_connections, schema)
+        try:
+            return await load_star_schema_async(
+                pool, dim_aoi, dim_chip, dim_time, fact,
+                n_connections, partition_column, batch_rows, partitioned,
+            )
+        finally:
+            await pool.close()
+
+    print(f"Loading {len(fact):,} fact rows over {n_connections} connections...")
+    stats = asyncio.run(_run())
+
+    for s in stats:
+        print(f"  connection {s.worker}: {s.rows:,} rows in {s.seconds}s "
+              f"({s.rows_per_sec:,.0f} rows/sec, {s.partitions} partitions)")
+    print(f"✓ Loaded {sum(s.rows for s in stats):,} fact rows")
+
+    return [asdict(s) for s in stats]
@@ -26,8 +26,11 @@ from etl.ingest import (
 from etl.transform import (
     build_chip_geometries,
     join_chips_to_aois,
+    spatial_join_chips_to_aois,
 )
 
+from etl.instrumentation import RunReport
+
 
 # ---------------------------------------------------------------------
 # Main metadata ETL function
@@ -79,8 +82,13 @@ def build_sn7_metadata(
     # ---------------------------------------------------------
     # 5. Spatial join: chip centroids → AOIs
     # ---------------------------------------------------------
-    print("Step 5: Assigning chips to AOIs via spatial join...")
-    chip_with_aoi = join_chips_to_aois(chip_gdf, aoi_gdf)
+    if aoi_geojson_path is not None:
+        print("Step 5: Assigning chips to AOIs via spatial join...")
+        chip_with_aoi = spatial_join_chips_to_aois(chip_gdf, aoi_gdf)
+    else:
+        # Generated AOIs carry the chips' own aoi_id; an attribute join is exact
+        print("Step 5: Attaching generated AOI polygons to chips...")
+        chip_with_aoi = join_chips_to_aois(chip_gdf, aoi_gdf)
     print("✓ Chip → AOI assignment complete")
 
     return chip_with_aoi
@@ -90,14 +98,33 @@ def build_sn7_metadata(
 # Convenience wrapper for notebooks / Prefect flows
 # ---------------------------------------------------------------------
 
-def run_metadata_pipeline(pixel_csv_path: str, aoi_geojson_path: str):
+def run_metadata_pipeline(
+    pixel_csv_path: str,
+    aoi_geojson_path: str,
+    report_path: str = None,
+    prometheus_path: str = None,
+    profile_dir: str = None,
+):
     """
     Convenience wrapper that prints progress and returns the final metadata.
+
+    Per-stage timings, row counts and RSS are always collected; pass
+    report_path / prometheus_path to persist them and profile_dir to dump
+    a cProfile file per stage.
     """
 
     print("Starting SpaceNet7 metadata ETL pipeline...")
-    metadata = build_sn7_metadata(pixel_csv_path, aoi_geojson_path)
+    with RunReport("metadata_etl", profile_dir=profile_dir) as report:
+        metadata = build_sn7_metadata(pixel_csv_path, aoi_geojson_path)
     print("✓ Metadata ETL complete")
     print(f"Total chip records: {len(metadata):,}")
+    print(report.summary())
+
+    if report_path:
+        report.write_json(report_path)
+        print(f"✓ Run report written to {report_path}")
+    if prometheus_path:
+        report.write_prometheus(prometheus_path)
+        print(f"✓ Prometheus metrics written to {prometheus_path}")
 
     return metadata
@@ -0,0 +1,297 @@
+"""
+raster.py
+
+Per-chip, per-month raster features from the SpaceNet7 monthly mosaics.
+
+Each mosaic ``<root>/<aoi>/images/global_monthly_YYYY_MM_mosaic_<chip>.tif``
+is reduced to band statistics:
+- mean / std of each configured band over valid pixels
+- mean / std of normalized-difference ratios, e.g. GRVI (green-red)/(green+red)
+  for the RGB mosaics, or NDVI when a NIR band is configured
+- valid-pixel fraction (alpha band / dataset mask)
+- cloud fraction from the matching ``UDM_masks/<name>_UDM.tif``, if present
+
+Images are read in block-aligned windows and reduced with running sums, so
+memory per image is one block, not the whole raster. Images are processed on
+a thread pool: rasterio releases the GIL inside GDAL reads, so throughput is
+bound by I/O rather than by one interpreter.
+
+Results are cached on disk, one JSON file per image, keyed by the image's
+path, size and mtime (and the UDM mask's); unchanged mosaics are never
+re-read.
+
+Usage:
+    python -m etl.raster \
+        --root data/raw/spacenet/train \
+        --output data/processed/raster_features.parquet
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from etl.ingest import parse_sn7_filename
+from etl.instrumentation import instrument_stage
+
+# SN7 mosaics are RGB + alpha
+DEFAULT_BANDS = {"red": 1, "green": 2, "blue": 3}
+DEFAULT_RATIOS = {"grvi": ("green", "red")}
+ALPHA_BAND = 4
+
+# Bump when the statistics change so cached results are recomputed
+CACHE_VERSION = 1
+
+
+# -----------------------------
+# Discovery
+# -----------------------------
+
+def udm_path_for(image_path: str) -> str:
+    """
+    Path of the SN7 unusable-data (cloud) mask for a mosaic.
+    """
+    aoi_dir = os.path.dirname(os.path.dirname(image_path))
+    stem = os.path.splitext(os.path.basename(image_path))[0]
+    return os.path.join(aoi_dir, "UDM_masks", f"{stem}_UDM.tif")
+
+
+def find_mosaics(root: str) -> pd.DataFrame:
+    """
+    Locate monthly mosaics under ``root`` with their chip_id and time_id.
+    """
+    paths = sorted(glob.glob(os.path.join(root, "**", "images", "*.tif"), recursive=True))
+    rows = []
+    for path in paths:
+        parsed = parse_sn7_filename(os.path.splitext(os.path.basename(path))[0])
+        rows.append({
+            "path": path,
+            "chip_id": parsed.chip_id,
+            "time_id": f"{parsed.year}_{parsed.month:02d}",
+        })
+    print(f"✓ Found {len(rows):,} mosaics under {root}")
+    return pd.DataFrame(rows, columns=["path", "chip_id", "time_id"])
+
+
+# -----------------------------
+# On-disk cache
+# -----------------------------
+
+def _file_key(path: Optional[str]) -> Optional[list]:
+    if not path or not os.path.exists(path):
+        return None
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+class RasterStatsCache:
+    """
+    One JSON entry per image, valid while the image and mask are unchanged.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _entry_path(self, image_path: str) -> str:
+        digest = hashlib.sha1(os.path.abspath(image_path).encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.json")
+
+    @staticmethod
+    def key(image_path: str, udm_path: Optional[str], settings: Dict) -> Dict:
+        return {
+            "version": CACHE_VERSION,
+            "image": _file_key(image_path),
+            "udm": _file_key(udm_path),
+            "settings": settings,
+        }
+
+    def get(self, image_path: str, key: Dict) -> Optional[Dict]:
+        try:
+            with open(self._entry_path(image_path)) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry["stats"] if entry.get("key") == key else None
+
+    def put(self, image_path: str, key: Dict, stats: Dict) -> None:
+        path = self._entry_path(image_path)
+        tmp = f"{path}.{os.getpid()}.{id(stats)}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"key": key, "stats": stats}, f)
+        os.replace(tmp, path)
+
+
+# -----------------------------
+# Windowed statistics
+# -----------------------------
+
+class _Moments:
+    __slots__ = ("n", "total", "sumsq")
+
+    def __init__(self):
+        self.n, self.total, self.sumsq = 0, 0.0, 0.0
+
+    def add(self, values: np.ndarray) -> None:
+        values = values.astype(np.float64, copy=False)
+        self.n += values.size
+        self.total += float(values.sum())
+        self.sumsq += float(np.square(values).sum())
+
+    def mean_std(self) -> Tuple[Optional[float], Optional[float]]:
+        if not self.n:
+            return None, None
+        mean = self.total / self.n
+        return mean, float(np.sqrt(max(self.sumsq / self.n - mean ** 2, 0.0)))
+
+
+def image_stats(
+    image_path: str,
+    udm_path: Optional[str] = None,
+    bands: Dict[str, int] = None,
+    ratios: Dict[str, Tuple[str, str]] = None,
+) -> Dict:
+    """
+    Band, ratio, valid and cloud statistics for one mosaic.
+    """
+    import rasterio
+
+    bands = bands or DEFAULT_BANDS
+    ratios = DEFAULT_RATIOS if ratios is None else ratios
+    band_moments = {name: _Moments() for name in bands}
+    ratio_moments = {name: _Moments() for name in ratios}
+    pixels = valid = cloud = cloud_seen = 0
+
+    udm = rasterio.open(udm_path) if udm_path and os.path.exists(udm_path) else None
+    try:
+        with rasterio.open(image_path) as src:
+            indexes = list(bands.values())
+            has_alpha = src.count >= ALPHA_BAND and ALPHA_BAND not in indexes
+
+            # Iterate the dataset's own blocks so each read is one tile/strip
+            for _, window in src.block_windows(1):
+                data = src.read(indexes, window=window)
+                if has_alpha:
+                    mask = src.read(ALPHA_BAND, window=window) > 0
+                else:
+                    mask = src.dataset_mask(window=window) > 0
+
+                pixels += mask.size
+                valid += int(mask.sum())
+                by_name = {name: data[i][mask] for i, name in enumerate(bands)}
+                for name, values in by_name.items():
+                    band_moments[name].add(values)
+
+                for name, (a, b) in ratios.items():
+                    num = by_name[a].astype(np.float64) - by_name[b]
+                    den = by_name[a].astype(np.float64) + by_name[b]
+                    ok = den != 0
+                    ratio_moments[name].add(num[ok] / den[ok])
+
+                if udm is not None:
+                    flags = udm.read(1, window=window)
+                    cloud += int((flags[mask] != 0).sum())
+                    cloud_seen += int(mask.sum())
+    finally:
+        if udm is not None:
+            udm.close()
+
+    stats = {"pixel_count": pixels, "valid_fraction": valid / pixels if pixels else None}
+    for name, m in {**band_moments, **ratio_moments}.items():
+        stats[f"{name}_mean"], stats[f"{name}_std"] = m.mean_std()
+    stats["cloud_fraction"] = cloud / cloud_seen if cloud_seen else None
+    return stats
+
+
+# -----------------------------
+# Driver
+# -----------------------------
+
+@instrument_stage("raster.build_raster_features")
+def build_raster_features(
+    mosaics: pd.DataFrame,
+    cache_dir: Optional[str] = "data/processed/raster_cache",
+    workers: Optional[int] = None,
+    bands: Dict[str, int] = None,
+    ratios: Dict[str, Tuple[str, str]] = None,
+) -> pd.DataFrame:
+    """
+    Raster features for every mosaic in ``mosaics`` (path, chip_id, time_id).
+    """
+    bands = bands or DEFAULT_BANDS
+    ratios = DEFAULT_RATIOS if ratios is None else ratios
+    settings = {"bands": bands, "ratios": {k: list(v) for k, v in ratios.items()}}
+    cache = RasterStatsCache(cache_dir) if cache_dir else None
+    workers = workers or min(32, (os.cpu_count() or 1) * 4)   # I/O bound
+
+    def run(path: str) -> Tuple[Dict, bool]:
+        udm = udm_path_for(path)
+        key = RasterStatsCache.key(path, udm, settings) if cache else None
+        if cache:
+            cached = cache.get(path, key)
+            if cached is not None:
+                return cached, True
+        stats = image_stats(path, udm, bands, ratios)
+        if cache:
+            cache.put(path, key, stats)
+        return stats, False
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        outcomes = list(pool.map(run, mosaics["path"]))
+    elapsed = time.perf_counter() - start
+
+    results = [stats for stats, _ in outcomes]
+    hits = sum(hit for _, hit in outcomes)
+
+    print(f"✓ Raster features for {len(results):,} mosaics in {elapsed:.1f}s "
+          f"({hits:,} from cache)")
+
+    stats = pd.DataFrame(results, index=mosaics.index)
+    return pd.concat([mosaics[["chip_id", "time_id"]], stats], axis=1)
+
+
+def _parse_pairs(values: Iterable[str]) -> Dict:
+    return dict(v.split("=", 1) for v in values)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-chip, per-month raster band statistics")
+    parser.add_argument("--root", required=True, help="Directory containing <aoi>/images/*.tif")
+    parser.add_argument("--output", required=True, help=".parquet or .csv")
+    parser.add_argument("--cache-dir", default="data/processed/raster_cache")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--band", action="append", default=[],
+                        help="name=index, e.g. nir=4 (default: red=1 green=2 blue=3)")
+    parser.add_argument("--ratio", action="append", default=[],
+                        help="name=a,b normalized difference, e.g. ndvi=nir,red")
+    args = parser.parse_args(argv)
+
+    bands = {k: int(v) for k, v in _parse_pairs(args.band).items()} or None
+    ratios = {k: tuple(v.split(",")) for k, v in _parse_pairs(args.ratio).items()} or None
+
+    features = build_raster_features(
+        find_mosaics(args.root),
+        cache_dir=args.cache_dir,
+        workers=args.workers,
+        bands=bands,
+        ratios=ratios,
+    )
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    if args.output.endswith((".parquet", ".pq")):
+        features.to_parquet(args.output, index=False)
+    else:
+        features.to_csv(args.output, index=False)
+    print(f"✓ Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
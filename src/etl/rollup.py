@@ -0,0 +1,287 @@
+"""
+rollup.py
+
+AOI × month × chip growth cube, precomputed once after the star schema load.
+
+Analysts used to aggregate fact_chip_observation with ad-hoc
+``GROUP BY aoi_id, time_id`` queries, each scanning the full fact table. This
+stage does that scan once and writes:
+- a chip-level cube (aoi_id, time_id, chip_id, building_count,
+  prev_building_count, delta_count, prediction) as a compressed Parquet file
+  sorted by (aoi_id, time_id, chip_id), served by ``GET /aoi/{aoi_id}/growth``
+- an AOI × month summary table ``agg_aoi_month_growth`` in Postgres
+
+Counts come from the in-memory fact frame (ETL) or from one GROUP BY over
+the loaded table (CLI). Predictions are the ``chip_id, time_id, prediction``
+output of ``models.batch_score``.
+
+Usage:
+    python -m etl.rollup --from-db \
+        --predictions data/processed/predictions.parquet \
+        --output data/processed/growth_cube.parquet --summary-table
+"""
+
+import argparse
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from etl.instrumentation import instrument_stage
+
+CUBE_KEYS = ["aoi_id", "time_id", "chip_id"]
+
+
+# ---------------------------------------------------------------------
+# Counts
+# ---------------------------------------------------------------------
+
+@instrument_stage("rollup.chip_month_counts")
+def chip_month_counts(fact: pd.DataFrame) -> pd.DataFrame:
+    """
+    Buildings per (aoi_id, time_id, chip_id) from fact rows.
+    """
+    counts = (
+        fact.groupby(CUBE_KEYS, observed=True, sort=False)
+        .size()
+        .rename("building_count")
+        .reset_index()
+    )
+    return counts
+
+
+@instrument_stage("rollup.read_chip_month_counts")
+def read_chip_month_counts(conn) -> pd.DataFrame:
+    """
+    Buildings per (aoi_id, time_id, chip_id) with one scan of the fact table.
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT aoi_id, time_id, chip_id, COUNT(*) "
+            "FROM fact_chip_observation GROUP BY aoi_id, time_id, chip_id;"
+        )
+        rows = cur.fetchall()
+    return pd.DataFrame(rows, columns=CUBE_KEYS + ["building_count"])
+
+
+# ---------------------------------------------------------------------
+# Cube
+# ---------------------------------------------------------------------
+
+@instrument_stage("rollup.build_growth_cube")
+def build_growth_cube(
+    counts: pd.DataFrame,
+    predictions: Optional[pd.DataFrame] = None,
+) -> pd.DataFrame:
+    """
+    Add prev_building_count / delta_count (previous observed month of the
+    same chip) and the cached prediction to chip-month counts.
+
+    Returned sorted by (aoi_id, time_id, chip_id) with categorical keys and
+    float32 measures.
+    """
+    keys = {c: pd.Categorical(counts[c].astype(str)) for c in CUBE_KEYS}
+    count = counts["building_count"].to_numpy(dtype=np.float64)
+
+    # time_id is YYYY_MM, so lexical category order is chronological
+    chip_codes = keys["chip_id"].codes.astype(np.int64)
+    time_codes = keys["time_id"].codes.astype(np.int64)
+    order = np.lexsort((time_codes, chip_codes))
+    prev = np.full(len(count), np.nan)
+    same_chip = chip_codes[order][1:] == chip_codes[order][:-1]
+    prev[order[1:][same_chip]] = count[order[:-1][same_chip]]
+
+    cube = pd.DataFrame({
+        "aoi_id": keys["aoi_id"],
+        "time_id": keys["time_id"],
+        "chip_id": keys["chip_id"],
+        "building_count": count.astype(np.int32),
+        "prev_building_count": prev.astype(np.float32),
+        "delta_count": (count - prev).astype(np.float32),
+    })
+
+    prediction = np.full(len(cube), np.nan, dtype=np.float32)
+    if predictions is not None and len(predictions):
+        preds = pd.Series(
+            predictions["prediction"].to_numpy(dtype=np.float32),
+            index=pd.MultiIndex.from_arrays([
+                predictions["chip_id"].astype(str), predictions["time_id"].astype(str),
+            ]),
+        )
+        preds = preds[~preds.index.duplicated(keep="last")]
+        lookup = pd.MultiIndex.from_arrays([
+            np.asarray(keys["chip_id"], dtype=object), np.asarray(keys["time_id"], dtype=object),
+        ])
+        pos = preds.index.get_indexer(lookup)
+        prediction[pos >= 0] = preds.to_numpy()[pos[pos >= 0]]
+    cube["prediction"] = prediction
+
+    return cube.sort_values(CUBE_KEYS, ignore_index=True)
+
+
+@instrument_stage("rollup.summarize_growth_cube")
+def summarize_growth_cube(cube: pd.DataFrame) -> pd.DataFrame:
+    """
+    AOI × month totals: chips, buildings, observed and predicted growth.
+    """
+    grouped = cube.groupby(["aoi_id", "time_id"], observed=True, sort=True)
+    summary = grouped.agg(
+        chips=("chip_id", "size"),
+        building_count=("building_count", "sum"),
+        delta_count=("delta_count", "sum"),
+        predicted_growth=("prediction", "sum"),
+        predicted_chips=("prediction", "count"),
+    ).reset_index()
+    summary["mean_prediction"] = (
+        summary["predicted_growth"] / summary["predicted_chips"].replace(0, np.nan)
+    )
+    summary.loc[summary["predicted_chips"] == 0, "predicted_growth"] = np.nan
+    return summary.drop(columns="predicted_chips")
+
+
+def write_growth_cube(cube: pd.DataFrame, path: str) -> None:
+    """
+    Write the cube as zstd Parquet atomically, so readers never see a partial file.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    cube.to_parquet(tmp, index=False, compression="zstd")
+    os.replace(tmp, path)
+
+
+# ---------------------------------------------------------------------
+# Summary table
+# ---------------------------------------------------------------------
+
+DDL_AGG_AOI_MONTH_GROWTH = """
+CREATE TABLE IF NOT EXISTS agg_aoi_month_growth (
+    aoi_id TEXT REFERENCES dim_aoi(aoi_id),
+    time_id TEXT REFERENCES dim_time(time_id),
+    chips INT,
+    building_count BIGINT,
+    delta_count DOUBLE PRECISION,
+    predicted_growth DOUBLE PRECISION,
+    mean_prediction DOUBLE PRECISION,
+    PRIMARY KEY (aoi_id, time_id)
+);
+"""
+
+
+@instrument_stage("rollup.replace_aoi_month_growth")
+def replace_aoi_month_growth(conn, summary: pd.DataFrame) -> None:
+    """
+    Replace agg_aoi_month_growth with ``summary`` in one transaction.
+    """
+    from psycopg2.extras import execute_values
+
+    def _value(v):
+        return None if v != v else float(v)
+
+    rows = [
+        (str(a), str(t), int(c), int(b), _value(d), _value(p), _value(m))
+        for a, t, c, b, d, p, m in zip(
+            summary["aoi_id"], summary["time_id"], summary["chips"],
+            summary["building_count"], summary["delta_count"],
+            summary["predicted_growth"], summary["mean_prediction"],
+        )
+    ]
+
+    with conn.cursor() as cur:
+        cur.execute(DDL_AGG_AOI_MONTH_GROWTH)
+        cur.execute("TRUNCATE agg_aoi_month_growth;")
+        execute_values(
+            cur,
+            """
+            INSERT INTO agg_aoi_month_growth (
+                aoi_id, time_id, chips, building_count,
+                delta_count, predicted_growth, mean_prediction
+            ) VALUES %s;
+            """,
+            rows,
+        )
+    conn.commit()
+
+
+def read_predictions(path: Optional[str]) -> Optional[pd.DataFrame]:
+    """
+    Read cached predictions (chip_id, time_id, prediction), if available.
+    """
+    if not path or not os.path.exists(path):
+        return None
+    columns = ["chip_id", "time_id", "prediction"]
+    if path.endswith((".parquet", ".pq")) or os.path.isdir(path):
+        return pd.read_parquet(path, columns=columns)
+    return pd.read_csv(path, usecols=columns, dtype={"chip_id": str, "time_id": str})
+
+
+@instrument_stage("rollup.run_growth_rollup")
+def run_growth_rollup(
+    counts: pd.DataFrame,
+    output_path: str,
+    predictions: Optional[pd.DataFrame] = None,
+    conn=None,
+) -> pd.DataFrame:
+    """
+    Build and write the cube; with ``conn``, also replace the summary table.
+    """
+    cube = build_growth_cube(counts, predictions)
+    write_growth_cube(cube, output_path)
+    summary = summarize_growth_cube(cube)
+    if conn is not None:
+        replace_aoi_month_growth(conn, summary)
+    return summary
+
+
+# ---------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute the AOI × month growth cube")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--from-db", action="store_true",
+                        help="Count from fact_chip_observation (PG* environment variables)")
+    source.add_argument("--fact", help="Fact table (Geo)Parquet written by the ETL")
+    parser.add_argument("--predictions", default=None,
+                        help="Cached predictions (chip_id, time_id, prediction)")
+    parser.add_argument("--output", default="data/processed/growth_cube.parquet")
+    parser.add_argument("--summary-table", action="store_true",
+                        help="Also replace agg_aoi_month_growth in Postgres")
+    args = parser.parse_args(argv)
+
+    conn = None
+    if args.from_db or args.summary_table:
+        from etl.load import get_connection
+
+        conn = get_connection(
+            os.environ.get("PGDATABASE"),
+            os.environ.get("PGUSER"),
+            os.environ.get("PGPASSWORD"),
+            host=os.environ.get("PGHOST", "localhost"),
+            port=int(os.environ.get("PGPORT", 5432)),
+        )
+
+    try:
+        if args.from_db:
+            counts = read_chip_month_counts(conn)
+        else:
+            counts = chip_month_counts(pd.read_parquet(args.fact, columns=CUBE_KEYS))
+        print(f"✓ Counted {len(counts):,} chip-months")
+
+        summary = run_growth_rollup(
+            counts,
+            args.output,
+            predictions=read_predictions(args.predictions),
+            conn=conn if args.summary_table else None,
+        )
+    finally:
+        if conn is not None:
+            conn.close()
+
+    print(f"✓ Wrote growth cube to {args.output} "
+          f"({summary['aoi_id'].nunique()} AOIs × {summary['time_id'].nunique()} months)")
+
+
+if __name__ == "__main__":
+    main()
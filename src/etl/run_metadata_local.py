@@ -4,12 +4,15 @@ run_metadata_local.py
 Local test runner for the SpaceNet7 metadata ETL pipeline.
 This version does NOT require an AOI GeoJSON file.
 It generates AOI polygons directly from chip geometries.
+Stage timings, row counts and RSS for the whole run are written as JSON
+and Prometheus text at the end (see etl/instrumentation.py).
 """
 
 # ---------------------------------------------------------
 # Imports
 # ---------------------------------------------------------
 
+from etl.instrumentation import RunReport
 from etl.metadata import build_sn7_metadata
 from etl.build_aoi_polygons import build_aoi_polygons
 from etl.schema import (
@@ -26,6 +29,9 @@ from etl.load import (
     insert_dim_time,
     insert_fact_chip_observation,
 )
+from etl.footprints import build_footprint_stats, replace_footprint_stats
+from etl.rollup import chip_month_counts, run_growth_rollup
+from etl.tracking import build_building_lifecycle, replace_building_lifecycle
 
 # ---------------------------------------------------------
 # 1. File paths (UPDATE THESE)
@@ -38,65 +44,83 @@ pixel_csv = r"C:/Users/kraem/OneDrive/[04] Data Science/[02] Learning/[04] Datas
 # We no longer need an AOI GeoJSON file.
 # AOI polygons will be generated automatically.
 
+report_path = "reports/etl_run_local.json"
+prometheus_path = "reports/etl_run_local.prom"
+
 # ---------------------------------------------------------
 # 2. Build metadata (chip geometries + parsed filenames)
 # ---------------------------------------------------------
 
-print("Running metadata ETL...")
-metadata = build_sn7_metadata(pixel_csv_path=pixel_csv, aoi_geojson_path=None)
-print(f"Metadata records: {len(metadata)}")
+# Every instrumented stage below is recorded in one run report
+with RunReport("metadata_etl_local") as report:
+    print("Running metadata ETL...")
+    metadata = build_sn7_metadata(pixel_csv_path=pixel_csv, aoi_geojson_path=None)
+    print(f"Metadata records: {len(metadata)}")
 
-# ---------------------------------------------------------
-# 3. Generate AOI polygons from chip geometries
-# ---------------------------------------------------------
+    # ---------------------------------------------------------
+    # 3. Generate AOI polygons from chip geometries
+    # ---------------------------------------------------------
 
-print("Generating AOI polygons from chip geometries...")
-aoi_gdf = build_aoi_polygons(metadata)
-print(f"AOIs generated: {len(aoi_gdf)}")
+    print("Generating AOI polygons from chip geometries...")
+    aoi_gdf = build_aoi_polygons(metadata)
+    print(f"AOIs generated: {len(aoi_gdf)}")
 
-# ---------------------------------------------------------
-# 4. Build star schema tables
-# ---------------------------------------------------------
+    # ---------------------------------------------------------
+    # 4. Build star schema tables
+    # ---------------------------------------------------------
 
-print("Building star schema tables...")
+    print("Building star schema tables...")
 
-dim_aoi = build_dim_aoi(aoi_gdf)
-dim_chip = build_dim_chip(metadata)
-dim_time = build_dim_time(metadata)
-fact = build_fact_chip_observation(metadata)
+    dim_aoi = build_dim_aoi(aoi_gdf)
+    dim_chip = build_dim_chip(metadata)
+    dim_time = build_dim_time(metadata)
+    fact = build_fact_chip_observation(metadata)
 
-print("Dimensions built:")
-print(f"  AOIs: {len(dim_aoi)}")
-print(f"  Chips: {len(dim_chip)}")
-print(f"  Time: {len(dim_time)}")
-print(f"  Fact rows: {len(fact)}")
+    print("Dimensions built:")
+    print(f"  AOIs: {len(dim_aoi)}")
+    print(f"  Chips: {len(dim_chip)}")
+    print(f"  Time: {len(dim_time)}")
+    print(f"  Fact rows: {len(fact)}")
 
-# ---------------------------------------------------------
-# 5. Load into Postgres
-# ---------------------------------------------------------
+    # ---------------------------------------------------------
+    # 5. Load into Postgres
+    # ---------------------------------------------------------
+
+    db_config = {
+        "dbname": "sn7",
+        "user": "PGUSER",
+        "password": "PGPASSWORD",  # <-- UPDATE THIS
+        "host": "localhost",
+        "port": 5432,
+    }
+
+    print("Connecting to Postgres...")
+    conn = get_connection(**db_config)
+
+    print("Creating tables (if not exist)...")
+    create_tables(conn)
 
-db_config = {
-    "dbname": "sn7",
-    "user": "PGUSER",
-    "password": "PGPASSWORD",  # <-- UPDATE THIS
-    "host": "localhost",
-    "port": 5432,
-}
+    print("Loading dimensions...")
+    insert_dim_aoi(conn, dim_aoi)
+    insert_dim_chip(conn, dim_chip)
+    insert_dim_time(conn, dim_time)
 
-print("Connecting to Postgres...")
-conn = get_connection(**db_config)
+    print("Loading fact table...")
+    insert_fact_chip_observation(conn, fact)
 
-print("Creating tables (if not exist)...")
-create_tables(conn)
+    print("Building AOI × month growth rollup...")
+    run_growth_rollup(chip_month_counts(fact), "data/processed/growth_cube.parquet", conn=conn)
 
-print("Loading dimensions...")
-insert_dim_aoi(conn, dim_aoi)
-insert_dim_chip(conn, dim_chip)
-insert_dim_time(conn, dim_time)
+    print("Tracking building footprints month to month...")
+    replace_building_lifecycle(conn, build_building_lifecycle(pixel_csv))
 
-print("Loading fact table...")
-insert_fact_chip_observation(conn, fact)
+    print("Building chip-month footprint statistics...")
+    replace_footprint_stats(conn, build_footprint_stats(pixel_csv))
 
-conn.close()
+    conn.close()
 
 print("ETL complete and loaded into Postgres.")
+print(report.summary())
+report.write_json(report_path)
+report.write_prometheus(prometheus_path)
+print(f"✓ Run report written to {report_path} and {prometheus_path}")
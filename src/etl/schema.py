@@ -2,62 +2,144 @@
 schema.py
 
 Defines the star schema tables for SpaceNet7 metadata.
+
+The builders project the columns they need without a deep copy of the
+metadata frame. time_id is derived once as an integer month code and
+exposed as an ordered categorical of ``YYYY_MM`` strings (categories sort
+chronologically), so only the distinct months are ever formatted.
+chip_id and aoi_id are categoricals as well. Loaders see the same string
+values as before.
 """
 
+import numpy as np
 import pandas as pd
 import geopandas as gpd
 
+from etl.instrumentation import instrument_stage
+
+
+# -----------------------------
+# Column helpers
+# -----------------------------
+
+def time_id_categorical(year, month) -> pd.Categorical:
+    """
+    Ordered ``YYYY_MM`` categorical from year/month arrays.
+
+    Months are coded as offsets from the earliest year and deduplicated with
+    a bincount, so this is O(n) with no per-row string work.
+    """
+    year = np.asarray(year, dtype=np.int64)
+    month = np.asarray(month, dtype=np.int64)
+    if not len(year):
+        return pd.Categorical([], categories=pd.Index([], dtype=object), ordered=True)
+
+    base = int(year.min())
+    code = (year - base) * 12 + (month - 1)
+    present = np.flatnonzero(np.bincount(code))
+
+    # Map each month offset to its position among the months present
+    lookup = np.full(int(code.max()) + 1, -1, dtype=np.int32)
+    lookup[present] = np.arange(len(present), dtype=np.int32)
+    labels = [f"{base + c // 12}_{c % 12 + 1:02d}" for c in present]
+    return pd.Categorical.from_codes(lookup[code], categories=labels, ordered=True)
+
+
+def _categorical(values) -> pd.Categorical:
+    """
+    Categorical view of an id column (no-op if it already is one).
+    """
+    if isinstance(getattr(values, "dtype", None), pd.CategoricalDtype):
+        return values.array
+    return pd.Categorical(values)
+
+
+def _project(gdf: gpd.GeoDataFrame, columns, rows=None) -> gpd.GeoDataFrame:
+    """
+    New frame over ``columns`` of ``gdf`` that shares their data.
+
+    ``gdf[columns]`` consolidates same-dtype columns into fresh 2D blocks,
+    which for the fact table copies three object geometry columns of every
+    row. Building from per-column arrays with copy=False keeps each column's
+    existing buffer.
+    """
+    data = {}
+    for col in columns:
+        values = gdf[col].array
+        data[col] = values if rows is None else values[rows]
+    geometry = gdf.geometry.name if gdf.geometry.name in columns else None
+    frame = pd.DataFrame(data, index=gdf.index if rows is None else gdf.index[rows], copy=False)
+    return gpd.GeoDataFrame(frame, geometry=geometry, crs=gdf.crs)
+
 
+@instrument_stage("schema.build_dim_aoi")
 def build_dim_aoi(aoi_gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
     """
     Build dim_aoi from AOI polygons.
     """
-    dim = aoi_gdf.copy()
-    dim["aoi_id"] = dim["aoi_id"].astype(str)
-    dim["name"] = dim["aoi_id"]  # simple mapping for now
-    return dim[["aoi_id", "name", "geometry"]]
+    dim = _project(aoi_gdf, ["aoi_id", "geometry"])
+    dim["aoi_id"] = _categorical(dim["aoi_id"].astype(str))
+    dim.insert(1, "name", dim["aoi_id"])  # simple mapping for now
+    return dim
 
 
+@instrument_stage("schema.build_dim_chip")
 def build_dim_chip(metadata_gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
     """
     Build dim_chip from parsed metadata.
+
+    Only the first row of each chip is materialized; the full metadata
+    frame is never copied.
     """
     cols = [
         "chip_id", "year", "month", "zoom",
         "tile_x", "tile_y", "utm_x", "utm_y", "utm_zone",
         "geometry", "centroid"
     ]
-    return metadata_gdf[cols].drop_duplicates("chip_id")
+    first = np.flatnonzero(~metadata_gdf["chip_id"].duplicated().to_numpy())
+    dim = _project(metadata_gdf, cols, rows=first)
+    dim["chip_id"] = _categorical(dim["chip_id"])
+    return dim
 
 
+@instrument_stage("schema.build_dim_time")
 def build_dim_time(metadata_gdf: gpd.GeoDataFrame) -> pd.DataFrame:
     """
     Build dim_time from year/month combinations.
     """
-    df = metadata_gdf[["year", "month"]].drop_duplicates()
-    df["time_id"] = df["year"].astype(str) + "_" + df["month"].astype(str).str.zfill(2)
-    return df[["time_id", "year", "month"]]
+    times = time_id_categorical(metadata_gdf["year"], metadata_gdf["month"])
+    labels = list(times.categories)
+    return pd.DataFrame({
+        "time_id": pd.Categorical(labels, categories=labels, ordered=True),
+        "year": np.array([int(t[:4]) for t in labels], dtype=np.int16),
+        "month": np.array([int(t[5:]) for t in labels], dtype=np.int8),
+    })
 
 
+@instrument_stage("schema.build_fact_chip_observation")
 def build_fact_chip_observation(metadata_gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
     """
     Build fact table linking chip, AOI, time, and building observations.
-    Pixel-level geometry is not yet available, so it is excluded.
-    """
-    df = metadata_gdf.copy()
+    Building polygons are not carried here; chip-month footprint statistics
+    are built separately by etl.footprints.build_footprint_stats.
 
-    # Build time_id
-    df["time_id"] = df["year"].astype(str) + "_" + df["month"].astype(str).str.zfill(2)
-
-    # Select available fields
-    return df[
+    The geometry and building id columns share the metadata frame's
+    buffers; only the three id columns are new (as categorical codes).
+    """
+    fact = _project(
+        metadata_gdf,
         [
             "chip_id",
             "aoi_id",
-            "time_id",
             "id",          # building_id from pixel CSV
             "geometry",    # chip geometry
             "centroid",    # chip centroid
             "aoi_geometry" # AOI polygon
-        ]
-    ]
+        ],
+    )
+    fact["chip_id"] = _categorical(fact["chip_id"])
+    fact["aoi_id"] = _categorical(fact["aoi_id"])
+    fact.insert(
+        2, "time_id", time_id_categorical(metadata_gdf["year"], metadata_gdf["month"])
+    )
+    return fact
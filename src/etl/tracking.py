@@ -0,0 +1,426 @@
+"""
+tracking.py
+
+Month-to-month tracking of individual building footprints.
+
+The growth target only compares chip-month counts. This stage follows each
+building polygon of the pixel ground truth through the months of its chip
+and records whether it appeared, persisted or disappeared.
+
+For every pair of consecutive observed months of a chip:
+- an ``STRtree`` is built over the later month's footprints
+- all earlier footprints are queried against it in one bulk call
+  (``predicate="intersects"``)
+- IoU is computed for every candidate pair with vectorized
+  ``shapely.intersection`` / ``shapely.area``
+- pairs with IoU >= ``min_iou`` are resolved one-to-one, best IoU first, and
+  a matched footprint inherits the earlier footprint's track id
+
+Chips are independent, so contiguous batches of whole chips are tracked
+across a process pool. Each worker parses its own WKT and reduces its
+observations to one lifecycle row per track, so only the small lifecycle
+frame travels back to the parent.
+
+A building that is missed for a month and detected again starts a new
+track; only consecutive observed months of a chip are compared.
+
+Usage:
+    python -m etl.tracking \
+        --input data/raw/spacenet/sn7_train_ground_truth_pix.csv \
+        --output data/processed/building_lifecycle.parquet
+"""
+
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import shapely
+
+from etl.footprints import _chip_time_keys
+from etl.instrumentation import instrument_stage
+
+MIN_IOU = 0.5
+
+LIFECYCLE_COLUMNS = [
+    "chip_id",
+    "track_id",
+    "building_id",
+    "first_time_id",
+    "last_time_id",
+    "months_observed",
+    "appeared",
+    "disappeared",
+    "first_area",
+    "last_area",
+    "mean_iou",
+    "centroid_x",
+    "centroid_y",
+]
+
+
+# -----------------------------
+# Matching
+# -----------------------------
+
+def match_footprints(
+    prev: np.ndarray,
+    nxt: np.ndarray,
+    min_iou: float = MIN_IOU,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    One-to-one IoU matches between two months of footprints.
+
+    Returns (prev index, next index, IoU) arrays. Candidate pairs come from
+    a single STRtree query over ``nxt``; they are accepted greedily by
+    descending IoU so each footprint is used at most once.
+    """
+    empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0))
+    if not len(prev) or not len(nxt):
+        return empty
+
+    src, dst = shapely.STRtree(nxt).query(prev, predicate="intersects")
+    prev_area, next_area = shapely.area(prev), shapely.area(nxt)
+
+    # Upper bound from bounding boxes and areas, so neighbours that merely
+    # touch never reach the (expensive) exact intersection
+    pb, nb = shapely.bounds(prev)[src], shapely.bounds(nxt)[dst]
+    box = (
+        (np.minimum(pb[:, 2], nb[:, 2]) - np.maximum(pb[:, 0], nb[:, 0])).clip(min=0)
+        * (np.minimum(pb[:, 3], nb[:, 3]) - np.maximum(pb[:, 1], nb[:, 1])).clip(min=0)
+    )
+    a, b = prev_area[src], next_area[dst]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        bound = np.minimum(box, np.minimum(a, b)) / np.maximum(a, b)
+    keep = bound >= min_iou
+    src, dst = src[keep], dst[keep]
+    if not len(src):
+        return empty
+
+    inter = shapely.area(shapely.intersection(prev[src], nxt[dst]))
+    iou = inter / (prev_area[src] + next_area[dst] - inter)
+
+    keep = iou >= min_iou
+    src, dst, iou = src[keep], dst[keep], iou[keep]
+
+    # Best pairs first; a pair is accepted only if neither footprint has
+    # already been taken by a better one
+    order = np.argsort(-iou, kind="stable")
+    src, dst, iou = src[order], dst[order], iou[order]
+    used_prev = np.zeros(len(prev), dtype=bool)
+    used_next = np.zeros(len(nxt), dtype=bool)
+    accepted = np.zeros(len(src), dtype=bool)
+    for k, (i, j) in enumerate(zip(src.tolist(), dst.tolist())):
+        if not used_prev[i] and not used_next[j]:
+            used_prev[i] = used_next[j] = accepted[k] = True
+    return src[accepted], dst[accepted], iou[accepted]
+
+
+# -----------------------------
+# Per-batch tracking
+# -----------------------------
+
+def assign_tracks(
+    chip_codes: np.ndarray,
+    time_codes: np.ndarray,
+    geoms: np.ndarray,
+    min_iou: float = MIN_IOU,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Track id (per chip) and IoU with the previous month for each footprint.
+
+    Rows must be sorted by (chip, time).
+    """
+    n = len(geoms)
+    track = np.empty(n, dtype=np.int64)
+    iou_prev = np.full(n, np.nan)
+
+    key = chip_codes.astype(np.int64) * (int(time_codes.max(initial=0)) + 1) + time_codes
+    starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]]) if n else np.empty(0, dtype=np.int64)
+    ends = np.r_[starts[1:], n].astype(np.int64)
+
+    next_id = 0
+    for b, (s, e) in enumerate(zip(starts.tolist(), ends.tolist())):
+        if b == 0 or chip_codes[s] != chip_codes[starts[b - 1]]:
+            track[s:e] = np.arange(e - s)
+            next_id = e - s
+            continue
+
+        ps = int(starts[b - 1])
+        src, dst, iou = match_footprints(geoms[ps:s], geoms[s:e], min_iou)
+        block = np.full(e - s, -1, dtype=np.int64)
+        block[dst] = track[ps + src]
+        iou_prev[s + dst] = iou
+
+        new = block < 0
+        block[new] = next_id + np.arange(int(new.sum()))
+        next_id += int(new.sum())
+        track[s:e] = block
+
+    return track, iou_prev
+
+
+def track_chips(chunk: pd.DataFrame, min_iou: float = MIN_IOU) -> pd.DataFrame:
+    """
+    Lifecycle rows for a batch of whole chips.
+
+    ``chunk`` has chip_id, time_id, geometry (WKT) and optionally id
+    columns; every chip in it must be complete.
+    """
+    geoms = shapely.from_wkt(chunk["geometry"].to_numpy(dtype=object), on_invalid="ignore")
+    valid = ~(shapely.is_missing(geoms) | shapely.is_empty(geoms))
+
+    chip = pd.Categorical(chunk["chip_id"].to_numpy()[valid])
+    times = pd.Categorical(chunk["time_id"].to_numpy()[valid])   # YYYY_MM sorts by month
+    building = (
+        chunk["id"].to_numpy()[valid] if "id" in chunk else np.full(int(valid.sum()), -1)
+    )
+
+    chip_codes = chip.codes.astype(np.int64)
+    time_codes = times.codes.astype(np.int64)
+    order = np.lexsort((time_codes, chip_codes))
+    chip_codes, time_codes = chip_codes[order], time_codes[order]
+    geoms, building = geoms[valid][order], building[order]
+
+    track, iou_prev = assign_tracks(chip_codes, time_codes, geoms, min_iou)
+    centroids = shapely.centroid(geoms)
+
+    obs = pd.DataFrame({
+        "chip": chip_codes,
+        "track_id": track,
+        "time": time_codes,
+        "building_id": building,
+        "area": shapely.area(geoms),
+        "iou": iou_prev,
+        "centroid_x": shapely.get_x(centroids),
+        "centroid_y": shapely.get_y(centroids),
+    })
+    return summarize_tracks(obs, chip.categories, times.categories)
+
+
+def summarize_tracks(obs: pd.DataFrame, chip_labels, time_labels) -> pd.DataFrame:
+    """
+    One lifecycle row per (chip, track) from time-ordered observations.
+    """
+    grouped = obs.groupby(["chip", "track_id"], sort=True)
+    life = grouped.agg(
+        building_id=("building_id", "first"),
+        first_time=("time", "first"),
+        last_time=("time", "last"),
+        months_observed=("time", "size"),
+        first_area=("area", "first"),
+        last_area=("area", "last"),
+        mean_iou=("iou", "mean"),
+        centroid_x=("centroid_x", "mean"),
+        centroid_y=("centroid_y", "mean"),
+    ).reset_index()
+
+    chip_span = obs.groupby("chip", sort=True)["time"].agg(["min", "max"])
+    chip_first = chip_span["min"].to_numpy()[life["chip"].to_numpy()]
+    chip_last = chip_span["max"].to_numpy()[life["chip"].to_numpy()]
+
+    chip_labels = np.asarray(chip_labels, dtype=object)
+    time_labels = np.asarray(time_labels, dtype=object)
+    return pd.DataFrame({
+        "chip_id": chip_labels[life["chip"].to_numpy()],
+        "track_id": life["track_id"].to_numpy(dtype=np.int32),
+        "building_id": life["building_id"].to_numpy(dtype=np.int64),
+        "first_time_id": time_labels[life["first_time"].to_numpy()],
+        "last_time_id": time_labels[life["last_time"].to_numpy()],
+        "months_observed": life["months_observed"].to_numpy(dtype=np.int32),
+        "appeared": life["first_time"].to_numpy() > chip_first,
+        "disappeared": life["last_time"].to_numpy() < chip_last,
+        "first_area": life["first_area"].to_numpy(),
+        "last_area": life["last_area"].to_numpy(),
+        "mean_iou": life["mean_iou"].to_numpy(),
+        "centroid_x": life["centroid_x"].to_numpy(),
+        "centroid_y": life["centroid_y"].to_numpy(),
+    })
+
+
+# -----------------------------
+# Driver
+# -----------------------------
+
+def read_footprints(source) -> pd.DataFrame:
+    """
+    (filename, id, geometry) rows from a CSV/Parquet path or a DataFrame.
+    """
+    if isinstance(source, pd.DataFrame):
+        return source
+    if str(source).endswith((".parquet", ".pq")):
+        return pd.read_parquet(source)
+    return pd.read_csv(source, dtype={"filename": str, "geometry": str})
+
+
+def iter_chip_batches(pixels: pd.DataFrame, batch_rows: int) -> Iterator[pd.DataFrame]:
+    """
+    Yield (chip_id, time_id, id, geometry) frames of whole chips, ~batch_rows each.
+    """
+    keys = _chip_time_keys(pixels["filename"])
+    chip_codes, _ = pd.factorize(keys["chip_id"])
+    order = np.argsort(chip_codes, kind="stable")
+
+    sorted_codes = chip_codes[order]
+    chip_starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    # Cut at the start of the chip holding every batch_rows-th row
+    targets = np.arange(0, len(order), max(batch_rows, 1))
+    cuts = chip_starts[np.unique(np.searchsorted(chip_starts, targets, side="right") - 1)]
+    bounds = np.r_[cuts, len(order)]
+
+    columns = [c for c in ("id", "geometry") if c in pixels]
+    for s, e in zip(bounds[:-1], bounds[1:]):
+        rows = order[s:e]
+        batch = pixels[columns].iloc[rows].reset_index(drop=True)
+        batch.insert(0, "chip_id", keys["chip_id"].to_numpy()[rows])
+        batch.insert(1, "time_id", keys["time_id"].to_numpy()[rows])
+        yield batch
+
+
+@instrument_stage("tracking.build_building_lifecycle")
+def build_building_lifecycle(
+    source,
+    min_iou: float = MIN_IOU,
+    workers: Optional[int] = None,
+    batch_rows: int = 200_000,
+) -> pd.DataFrame:
+    """
+    Building lifecycle table (one row per tracked building) from the pixel
+    ground truth (path or DataFrame).
+    """
+    workers = os.cpu_count() if workers is None else workers
+    start = time.perf_counter()
+
+    pixels = read_footprints(source)
+    batches = iter_chip_batches(pixels, batch_rows)
+    parts: List[pd.DataFrame] = []
+    if workers <= 1:
+        parts = [track_chips(batch, min_iou) for batch in batches]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Bounded in-flight batches, as in etl.footprints
+            pending = deque()
+            for batch in batches:
+                pending.append(pool.submit(track_chips, batch, min_iou))
+                if len(pending) >= 2 * workers:
+                    parts.append(pending.popleft().result())
+            while pending:
+                parts.append(pending.popleft().result())
+
+    lifecycle = (
+        pd.concat(parts, ignore_index=True)
+        if parts else pd.DataFrame(columns=LIFECYCLE_COLUMNS)
+    )
+    lifecycle = lifecycle.sort_values(["chip_id", "track_id"], ignore_index=True)
+
+    elapsed = time.perf_counter() - start
+    print(f"✓ Tracked {len(pixels):,} footprints → {len(lifecycle):,} buildings "
+          f"in {elapsed:.1f}s ({len(pixels) / max(elapsed, 1e-9):,.0f} rows/sec)")
+    return lifecycle
+
+
+# ---------------------------------------------------------------------
+# Star schema table
+# ---------------------------------------------------------------------
+
+DDL_FACT_BUILDING_LIFECYCLE = """
+CREATE TABLE IF NOT EXISTS fact_building_lifecycle (
+    chip_id TEXT REFERENCES dim_chip(chip_id),
+    track_id INT,
+    building_id INT,
+    first_time_id TEXT REFERENCES dim_time(time_id),
+    last_time_id TEXT REFERENCES dim_time(time_id),
+    months_observed INT,
+    appeared BOOLEAN,
+    disappeared BOOLEAN,
+    first_area DOUBLE PRECISION,
+    last_area DOUBLE PRECISION,
+    mean_iou DOUBLE PRECISION,
+    centroid_x DOUBLE PRECISION,
+    centroid_y DOUBLE PRECISION,
+    PRIMARY KEY (chip_id, track_id)
+);
+"""
+
+
+@instrument_stage("tracking.replace_building_lifecycle")
+def replace_building_lifecycle(conn, lifecycle: pd.DataFrame, page_size: int = 10_000) -> None:
+    """
+    Replace the lifecycle rows of every chip in ``lifecycle`` in one transaction.
+    """
+    from psycopg2.extras import execute_values
+
+    def _value(v):
+        return None if v != v else float(v)
+
+    rows = [
+        (c, int(t), None if b < 0 else int(b), first, last, int(m), bool(a), bool(d),
+         _value(fa), _value(la), _value(iou), _value(x), _value(y))
+        for c, t, b, first, last, m, a, d, fa, la, iou, x, y in zip(
+            *(lifecycle[col].tolist() for col in LIFECYCLE_COLUMNS)
+        )
+    ]
+    chips = sorted(set(lifecycle["chip_id"].astype(str)))
+
+    with conn.cursor() as cur:
+        cur.execute(DDL_FACT_BUILDING_LIFECYCLE)
+        cur.execute("DELETE FROM fact_building_lifecycle WHERE chip_id = ANY(%s);", (chips,))
+        execute_values(
+            cur,
+            f"""
+            INSERT INTO fact_building_lifecycle ({", ".join(LIFECYCLE_COLUMNS)})
+            VALUES %s;
+            """,
+            rows,
+            page_size=page_size,
+        )
+    conn.commit()
+
+
+# -----------------------------
+# CLI
+# -----------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Month-to-month building footprint tracking")
+    parser.add_argument("--input", required=True, help="Pixel ground truth CSV or Parquet")
+    parser.add_argument("--output", default="data/processed/building_lifecycle.parquet",
+                        help=".parquet or .csv")
+    parser.add_argument("--min-iou", type=float, default=MIN_IOU)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--load", action="store_true",
+                        help="Also replace fact_building_lifecycle in Postgres (PG* variables)")
+    args = parser.parse_args(argv)
+
+    lifecycle = build_building_lifecycle(args.input, min_iou=args.min_iou, workers=args.workers)
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    if args.output.endswith((".parquet", ".pq")):
+        lifecycle.to_parquet(args.output, index=False)
+    else:
+        lifecycle.to_csv(args.output, index=False)
+    print(f"✓ Wrote {args.output}")
+
+    if args.load:
+        from etl.load import get_connection
+
+        conn = get_connection(
+            os.environ.get("PGDATABASE"),
+            os.environ.get("PGUSER"),
+            os.environ.get("PGPASSWORD"),
+            host=os.environ.get("PGHOST", "localhost"),
+            port=int(os.environ.get("PGPORT", 5432)),
+        )
+        try:
+            replace_building_lifecycle(conn, lifecycle)
+        finally:
+            conn.close()
+        print(f"✓ Loaded {len(lifecycle):,} rows into fact_building_lifecycle")
+
+
+if __name__ == "__main__":
+    main()
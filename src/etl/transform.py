@@ -9,10 +9,14 @@ Transformation utilities for SpaceNet7:
 """
 
 import math
+import numpy as np
+import pandas as pd
 import geopandas as gpd
+import shapely
 from shapely.geometry import box
 
 from etl.ingest import ParsedFilename
+from etl.instrumentation import instrument_stage
 
 
 # -----------------------------
@@ -68,6 +72,7 @@ def compute_chip_geometry(parsed: ParsedFilename):
 # Build GeoDataFrame of chip centroids
 # -----------------------------
 
+@instrument_stage("transform.build_chip_geometries")
 def build_chip_geometries(df):
     """
     Add bounding boxes and centroids to chip metadata.
@@ -100,6 +105,7 @@ def build_chip_geometries(df):
 # Spatial join: chips → AOIs
 # -----------------------------
 
+@instrument_stage("transform.join_chips_to_aois")
 def join_chips_to_aois(chip_gdf, aoi_gdf):
     """
     Attach AOI polygons to chips using aoi_id, not a spatial join.
@@ -121,3 +127,102 @@ def join_chips_to_aois(chip_gdf, aoi_gdf):
 
     return joined
 
+
+# -----------------------------
+# True spatial join: chips → external AOI polygons
+# -----------------------------
+
+def _transform_geoms(geoms, src_crs: str, dst_crs: str):
+    """
+    Reproject an array of shapely geometries in one vectorized pass.
+    """
+    proj = pyproj.Transformer.from_crs(src_crs, dst_crs, always_xy=True)
+
+    def _xy(coords):
+        x, y = proj.transform(coords[:, 0], coords[:, 1])
+        return np.column_stack([x, y])
+
+    return shapely.transform(np.asarray(geoms, dtype=object), _xy)
+
+
+@instrument_stage("transform.spatial_join_chips_to_aois")
+def spatial_join_chips_to_aois(chip_gdf, aoi_gdf, how: str = "centroid"):
+    """
+    Assign chips to externally supplied AOI polygons with a spatial join.
+
+    AOIs are indexed once in an STRtree (EPSG:4326). Unique chips are
+    reprojected from their own UTM zone and queried in bulk:
+    - how="centroid": chip centroid intersects the AOI (point-in-polygon)
+    - how="intersects": chip polygon intersects the AOI
+
+    A chip matching several AOIs goes to the AOI with the largest overlap.
+    The AOI polygon is returned as 'aoi_geometry' in the chip's UTM zone,
+    so it shares a CRS with the chip geometry on every row.
+    """
+    if how not in ("centroid", "intersects"):
+        raise ValueError(f"Unknown join mode: {how}")
+    if aoi_gdf.crs is None:
+        raise ValueError("AOI polygons must have a CRS")
+
+    aoi_ll = aoi_gdf.to_crs("EPSG:4326")
+    aoi_geoms = np.asarray(aoi_ll.geometry.array, dtype=object)
+    aoi_ids = aoi_gdf["aoi_id"].astype(str).to_numpy()
+    tree = shapely.STRtree(aoi_geoms)
+    shapely.prepare(aoi_geoms)
+
+    # Chip geometry is constant per chip_id; join unique chips only
+    chips = chip_gdf.drop_duplicates("chip_id")
+    chip_polys = np.empty(len(chips), dtype=object)
+    zones = chips["utm_zone"].to_numpy()
+
+    for zone in np.unique(zones):
+        idx = np.nonzero(zones == zone)[0]
+        chip_polys[idx] = _transform_geoms(
+            chips.geometry.array[idx], f"EPSG:326{zone}", "EPSG:4326"
+        )
+
+    query = shapely.centroid(chip_polys) if how == "centroid" else chip_polys
+    chip_idx, aoi_idx = tree.query(query, predicate="intersects")
+
+    # Tie-break only chips with several candidates, by overlap area. An AOI
+    # that covers the whole chip overlaps by the chip's own area, so the
+    # expensive intersection is only computed for partial overlaps.
+    area = np.zeros(len(chip_idx))
+    multi = np.nonzero(np.bincount(chip_idx, minlength=len(chips))[chip_idx] > 1)[0]
+    if len(multi):
+        cand_chips = chip_polys[chip_idx[multi]]
+        cand_aois = aoi_geoms[aoi_idx[multi]]
+        covered = shapely.covers(cand_aois, cand_chips)
+        area[multi[covered]] = shapely.area(cand_chips[covered])
+        partial = multi[~covered]
+        area[partial] = shapely.area(
+            shapely.intersection(chip_polys[chip_idx[partial]], aoi_geoms[aoi_idx[partial]])
+        )
+    order = np.lexsort((-area, chip_idx))
+    chip_sorted = chip_idx[order]
+    first = order[np.r_[True, chip_sorted[1:] != chip_sorted[:-1]]] if len(order) else order
+
+    best_aoi = np.full(len(chips), -1)
+    best_aoi[chip_idx[first]] = aoi_idx[first]
+    matched = best_aoi >= 0
+
+    # AOI polygons back into each chip's UTM zone
+    aoi_geometry = np.full(len(chips), None, dtype=object)
+    for zone in np.unique(zones[matched]):
+        idx = np.nonzero(matched & (zones == zone))[0]
+        aoi_geometry[idx] = _transform_geoms(
+            aoi_geoms[best_aoi[idx]], "EPSG:4326", f"EPSG:326{zone}"
+        )
+
+    assignment = pd.DataFrame({
+        "chip_id": chips["chip_id"].to_numpy(),
+        "aoi_id": np.where(matched, aoi_ids[best_aoi], None),
+        "aoi_geometry": gpd.GeoSeries(aoi_geometry, crs=chip_gdf.crs).array,
+    })
+
+    print(f"✓ Spatially matched {int(matched.sum()):,} of {len(chips):,} unique chips "
+          f"to {len(aoi_gdf):,} AOIs")
+
+    return chip_gdf.drop(columns=["aoi_id"], errors="ignore").merge(
+        assignment, on="chip_id", how="left"
+    )
@@ -1,6 +1,6 @@
 from fastapi import FastAPI
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 import logging
 import time
 import joblib
@@ -8,6 +8,7 @@ import os
 import pandas as pd
 
 from ml_end_to_end_pipeline.version import __version__
+from ml_end_to_end_pipeline.logging_config import REQUEST_LOGGER, configure_logging
 from ml_end_to_end_pipeline.models.predict import (
     run_single_inference,
     run_batch_inference
@@ -16,11 +17,10 @@ from ml_end_to_end_pipeline.models.predict import (
 # ---------------------------------------------------------
 # Logging Configuration
 # ---------------------------------------------------------
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s | %(levelname)s | %(message)s"
-)
+# JSON logs written by a background QueueListener; see logging_config.yaml
+configure_logging()
 logger = logging.getLogger(__name__)
+request_logger = logging.getLogger(REQUEST_LOGGER)
 
 # ---------------------------------------------------------
 # Load model once at startup
@@ -66,8 +66,6 @@ def health():
 def predict(request: PredictionRequest):
     start = time.time()
 
-    logger.info(f"Received single prediction request for chip {request.chip_id}")
-
     # Convert to DataFrame for your existing inference function
     df = pd.DataFrame([{
         "chip_id": request.chip_id,
@@ -78,8 +76,11 @@ def predict(request: PredictionRequest):
     pred = model.predict(df)[0]
 
     latency = round((time.time() - start) * 1000, 2)
-    logger.info(
-        f"Single prediction completed in {latency} ms | model_version={__version__}"
+    request_logger.info(
+        "Single prediction completed in %s ms",
+        latency,
+        extra={"endpoint": "/predict", "chip_id": request.chip_id,
+               "latency_ms": latency, "model_version": __version__},
     )
 
     return {"prediction": float(pred)}
@@ -93,8 +94,6 @@ def predict_batch(request: BatchPredictionRequest):
     start = time.time()
     num_records = len(request.records)
 
-    logger.info(f"Received batch prediction request with {num_records} records")
-
     df = pd.DataFrame([{
         "chip_id": r.chip_id,
         "building_count": r.building_count,
@@ -104,19 +103,36 @@ def predict_batch(request: BatchPredictionRequest):
     preds = model.predict(df).tolist()
 
     latency = round((time.time() - start) * 1000, 2)
-    logger.info(
-        f"Batch prediction completed in {latency} ms | "
-        f"records={num_records} | model_version={__version__}"
+    request_logger.info(
+        "Batch prediction completed in %s ms for %s records",
+        latency,
+        num_records,
+        extra={"endpoint": "/predict/batch", "records": num_records,
+               "latency_ms": latency, "model_version": __version__},
     )
 
     return {"predictions": preds}
 from ml_end_to_end_pipeline.models.predict import load_model
+from ml_end_to_end_pipeline.api.chip_index import ChipIndexManager, DEFAULT_LIMIT
+from ml_end_to_end_pipeline.api.growth_cube import GrowthCubeManager, etag_matches
+from ml_end_to_end_pipeline.api.drift_monitor import DriftMonitor
+from ml_end_to_end_pipeline.models.explain import load_explainer
 from ml_end_to_end_pipeline.api.schemas import (
     PredictionRequest,
     BatchPredictionRequest,
     PredictionResponse,
     BatchPredictionResponse,
+    BatchExplanationResponse,
+    ChipsResponse,
+)
+from ml_end_to_end_pipeline.api.columnar import (
+    ColumnarRoutingMiddleware,
+    ColumnarValidationError,
+    columnar_response,
+    parse_columnar_batch,
 )
+from fastapi import HTTPException, Query, Request, Response
+from starlette.concurrency import run_in_threadpool
 import pandas as pd
 
 app = FastAPI(title="Building Growth Prediction API")
@@ -124,6 +140,45 @@ app = FastAPI(title="Building Growth Prediction API")
 # Load model once at startup
 model = load_model()
 
+# Per-tree node-value tables for /predict/explain, built once from the model
+explainer = load_explainer(model)
+
+# Chip spatial index (built once here, rebuilt in the background on change)
+chip_index = ChipIndexManager.from_env()
+if chip_index.configured:
+    chip_index.rebuild()
+
+# AOI × month growth cube written by etl.rollup (reloaded when the file changes)
+growth_cube = GrowthCubeManager.from_env()
+if growth_cube.configured:
+    growth_cube.reload()
+
+# Streaming input/prediction sketches compared with the training profile
+drift_monitor = DriftMonitor.from_env()
+MONITORED_COLUMNS = ["chip_id", "building_count", "prev_building_count"]
+
+
+def observe_batch(df: pd.DataFrame, preds) -> None:
+    drift_monitor.observe({c: df[c].to_numpy() for c in MONITORED_COLUMNS}, preds)
+
+
+# /predict/batch with the columnar content type goes to the columnar handler
+app.add_middleware(ColumnarRoutingMiddleware)
+
+
+@app.on_event("startup")
+def start_chip_index_watcher():
+    chip_index.start()
+    growth_cube.start()
+    drift_monitor.start()
+
+
+@app.on_event("shutdown")
+def stop_chip_index_watcher():
+    chip_index.stop()
+    growth_cube.stop()
+    drift_monitor.stop()
+
 
 @app.get("/health")
 def health_check():
@@ -132,14 +187,165 @@ def health_check():
 
 @app.post("/predict", response_model=PredictionResponse)
 def predict_single(request: PredictionRequest):
+    start = time.time()
     df = pd.DataFrame([request.dict()])
-    pred = model.predict(df)[0]
+    preds = model.predict(df)
+    pred = preds[0]
+    observe_batch(df, preds)
+
+    latency = round((time.time() - start) * 1000, 2)
+    request_logger.info(
+        "Single prediction completed in %s ms",
+        latency,
+        extra={"endpoint": "/predict", "chip_id": request.chip_id,
+               "latency_ms": latency, "model_version": __version__},
+    )
     return PredictionResponse(prediction=float(pred))
 
 
 @app.post("/predict/batch", response_model=BatchPredictionResponse)
 def predict_batch(request: BatchPredictionRequest):
+    start = time.time()
     df = pd.DataFrame([r.dict() for r in request.records])
     preds = model.predict(df)
+    observe_batch(df, preds)
     responses = [PredictionResponse(prediction=float(p)) for p in preds]
+
+    latency = round((time.time() - start) * 1000, 2)
+    request_logger.info(
+        "Batch prediction completed in %s ms for %s records",
+        latency,
+        len(df),
+        extra={"endpoint": "/predict/batch", "records": len(df),
+               "latency_ms": latency, "model_version": __version__},
+    )
     return BatchPredictionResponse(predictions=responses)
+
+
+@app.post("/predict/explain", response_model=BatchExplanationResponse)
+def predict_explain(request: BatchPredictionRequest):
+    start = time.time()
+    if explainer is None:
+        raise HTTPException(status_code=503, detail="Loaded model does not support explanations")
+
+    df = pd.DataFrame([r.dict() for r in request.records])
+    explanations = explainer.explain_records(df)
+
+    latency = round((time.time() - start) * 1000, 2)
+    request_logger.info(
+        "Explained %s predictions in %s ms",
+        len(df),
+        latency,
+        extra={"endpoint": "/predict/explain", "records": len(df),
+               "latency_ms": latency, "model_version": __version__},
+    )
+    return {"explanations": explanations}
+
+
+@app.get("/chips", response_model=ChipsResponse)
+def chips_in_bbox(
+    bbox: str = Query(..., description="minx,miny,maxx,maxy in lon/lat"),
+    time_id: Optional[str] = None,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=100_000),
+):
+    start = time.time()
+
+    index = chip_index.index
+    if index is None:
+        raise HTTPException(status_code=503, detail="Chip index not loaded")
+
+    try:
+        minx, miny, maxx, maxy = (float(v) for v in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=422, detail="bbox must be minx,miny,maxx,maxy")
+    if minx > maxx or miny > maxy:
+        raise HTTPException(status_code=422, detail="bbox min must not exceed max")
+
+    chips, total = index.query_with_total((minx, miny, maxx, maxy), time_id=time_id, limit=limit)
+
+    latency = round((time.time() - start) * 1000, 2)
+    request_logger.info(
+        "Chip bbox query returned %s chips in %s ms",
+        len(chips),
+        latency,
+        extra={"endpoint": "/chips", "chips": len(chips), "total": total, "latency_ms": latency},
+    )
+
+    return {
+        "count": len(chips),
+        "total": total,
+        "truncated": total > len(chips),
+        "index_version": index.version,
+        "chips": chips,
+    }
+
+
+@app.get("/aoi/{aoi_id}/growth")
+def aoi_growth(
+    aoi_id: str,
+    request: Request,
+    start: Optional[str] = Query(None, description="first time_id (YYYY_MM), inclusive"),
+    end: Optional[str] = Query(None, description="last time_id (YYYY_MM), inclusive"),
+    chips: bool = Query(False, description="include chip-level rows"),
+):
+    t0 = time.time()
+
+    cube = growth_cube.cube
+    if cube is None:
+        raise HTTPException(status_code=503, detail="Growth cube not loaded")
+
+    result = cube.response(aoi_id, start=start, end=end, chips=chips)
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"Unknown aoi_id: {aoi_id}")
+    etag, body = result
+
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    not_modified = etag_matches(request.headers.get("if-none-match"), etag)
+
+    latency = round((time.time() - t0) * 1000, 2)
+    request_logger.info(
+        "AOI growth slice served in %s ms",
+        latency,
+        extra={"endpoint": "/aoi/growth", "aoi_id": aoi_id,
+               "not_modified": not_modified, "latency_ms": latency},
+    )
+
+    if not_modified:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@app.get("/monitoring/drift")
+def monitoring_drift(chip_id: Optional[str] = Query(None, description="also estimate this chip's rows")):
+    return drift_monitor.report(chip_id=chip_id)
+
+
+@app.post("/monitoring/drift/reset")
+def monitoring_drift_reset():
+    drift_monitor.reset()
+    return {"status": "ok"}
+
+
+@app.post("/predict/batch/columnar")
+async def predict_batch_columnar(request: Request):
+    start = time.time()
+
+    body = await request.body()
+    # Parsing and inference are CPU-bound; keep them off the event loop
+    try:
+        df = await run_in_threadpool(parse_columnar_batch, body)
+    except ColumnarValidationError as exc:
+        raise HTTPException(status_code=422, detail=exc.errors)
+
+    preds = await run_in_threadpool(model.predict, df)
+    observe_batch(df, preds)
+
+    latency = round((time.time() - start) * 1000, 2)
+    request_logger.info(
+        "Columnar batch prediction completed in %s ms for %s records",
+        latency,
+        len(df),
+        extra={"endpoint": "/predict/batch/columnar", "records": len(df),
+               "latency_ms": latency, "model_version": __version__},
+    )
+    return Response(content=columnar_response(preds), media_type="application/json")
@@ -0,0 +1,346 @@
+"""
+chip_index.py
+
+In-memory spatial index behind ``GET /chips``.
+
+Chip polygons from ``dim_chip`` are loaded once (from a GeoParquet snapshot
+or straight from the star schema), reprojected from each chip's UTM zone
+to lon/lat, and packed into a shapely STRtree. Cached predictions (the
+``chip_id, time_id, prediction`` output of ``models.batch_score``) are
+pivoted into one array per time_id aligned with the tree, so a viewport
+query is a tree lookup plus array indexing, with no database round trip.
+
+``ChipIndexManager`` owns the live index. A background thread polls the
+snapshot and prediction files and, when either changes, builds a new index
+off to the side and swaps it in with a single reference assignment;
+in-flight requests keep using the index they started with.
+
+Configuration (environment):
+    CHIP_SNAPSHOT_PATH      GeoParquet export of dim_chip
+    CHIP_PREDICTIONS_PATH   cached predictions (CSV or Parquet)
+    CHIP_INDEX_FROM_DB=1    load dim_chip from Postgres (PG* variables)
+    CHIP_INDEX_POLL_SECONDS snapshot poll interval (default 30)
+"""
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+INDEX_CRS = "EPSG:4326"
+DEFAULT_LIMIT = 5000
+
+
+def _reproject(geoms: np.ndarray, src_crs: str, dst_crs: str) -> np.ndarray:
+    import pyproj
+    import shapely
+
+    proj = pyproj.Transformer.from_crs(src_crs, dst_crs, always_xy=True)
+
+    def _xy(coords):
+        x, y = proj.transform(coords[:, 0], coords[:, 1])
+        return np.column_stack([x, y])
+
+    return shapely.transform(geoms, _xy)
+
+
+def _file_version(path: Optional[str]) -> Optional[tuple]:
+    if not path or not os.path.exists(path):
+        return None
+    st = os.stat(path)
+    return (st.st_size, st.st_mtime_ns)
+
+
+# ---------------------------------------------------------------------
+# Loading
+# ---------------------------------------------------------------------
+
+def read_chip_snapshot(path: str) -> pd.DataFrame:
+    """
+    Read a dim_chip GeoParquet snapshot (chip_id, utm_zone, geometry).
+    """
+    import geopandas as gpd
+
+    gdf = gpd.read_parquet(path)
+    return pd.DataFrame({
+        "chip_id": gdf["chip_id"].astype(str).to_numpy(),
+        "utm_zone": gdf["utm_zone"].to_numpy(),
+        "geometry": np.asarray(gdf.geometry.array, dtype=object),
+    })
+
+
+def read_chips_from_db(dbname, user, password, host="localhost", port=5432) -> pd.DataFrame:
+    """
+    Read chip polygons from the star schema's dim_chip table.
+    """
+    import psycopg2
+    import shapely
+
+    conn = psycopg2.connect(dbname=dbname, user=user, password=password, host=host, port=port)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT chip_id, utm_zone, ST_AsBinary(geometry) FROM dim_chip;")
+            rows = cur.fetchall()
+    finally:
+        conn.close()
+
+    chip_ids, zones, wkb = zip(*rows) if rows else ((), (), ())
+    return pd.DataFrame({
+        "chip_id": list(chip_ids),
+        "utm_zone": list(zones),
+        "geometry": shapely.from_wkb([bytes(b) for b in wkb]) if rows else [],
+    })
+
+
+def read_predictions(path: str) -> pd.DataFrame:
+    """
+    Read cached predictions (chip_id, time_id, prediction).
+    """
+    columns = ["chip_id", "time_id", "prediction"]
+    if path.endswith((".parquet", ".pq")) or os.path.isdir(path):
+        return pd.read_parquet(path, columns=columns)
+    return pd.read_csv(path, usecols=columns, dtype={"chip_id": str, "time_id": str})
+
+
+# ---------------------------------------------------------------------
+# Index
+# ---------------------------------------------------------------------
+
+@dataclass
+class ChipIndex:
+    chip_ids: np.ndarray
+    bounds: np.ndarray                       # (n, 4) lon/lat bounds
+    tree: object                             # shapely.STRtree over lon/lat polygons
+    predictions: Dict[str, np.ndarray] = field(default_factory=dict)
+    latest: Optional[np.ndarray] = None      # most recent prediction per chip
+    latest_time: Optional[np.ndarray] = None
+    version: str = ""
+
+    @classmethod
+    def build(
+        cls,
+        chips: pd.DataFrame,
+        predictions: Optional[pd.DataFrame] = None,
+        version: str = "",
+    ) -> "ChipIndex":
+        """
+        Build the index from chip rows (chip_id, utm_zone, geometry in the
+        chip's UTM zone) and optional cached predictions.
+        """
+        import shapely
+
+        chips = chips.drop_duplicates("chip_id")
+        chip_ids = chips["chip_id"].astype(str).to_numpy()
+        geoms = np.asarray(chips["geometry"].to_numpy(), dtype=object)
+        zones = chips["utm_zone"].to_numpy()
+
+        lonlat = np.empty(len(geoms), dtype=object)
+        for zone in np.unique(zones):
+            idx = np.nonzero(zones == zone)[0]
+            lonlat[idx] = _reproject(geoms[idx], f"EPSG:{32600 + int(zone)}", INDEX_CRS)
+
+        index = cls(
+            chip_ids=chip_ids,
+            bounds=shapely.bounds(lonlat) if len(lonlat) else np.empty((0, 4)),
+            tree=shapely.STRtree(lonlat),
+            version=version,
+        )
+        if predictions is not None and len(predictions):
+            index._attach_predictions(predictions)
+        return index
+
+    def _attach_predictions(self, predictions: pd.DataFrame) -> None:
+        """
+        Pivot predictions to one chip-aligned array per time_id.
+        """
+        position = pd.Series(np.arange(len(self.chip_ids)), index=self.chip_ids)
+        preds = predictions.assign(
+            chip_id=predictions["chip_id"].astype(str),
+            time_id=predictions["time_id"].astype(str),
+        )
+        preds = preds[preds["chip_id"].isin(position.index)]
+        rows = position.loc[preds["chip_id"]].to_numpy()
+        values = preds["prediction"].to_numpy(dtype=float)
+        times = preds["time_id"].to_numpy()
+
+        for time_id in np.unique(times):
+            mask = times == time_id
+            arr = np.full(len(self.chip_ids), np.nan)
+            arr[rows[mask]] = values[mask]
+            self.predictions[time_id] = arr
+
+        # time_id strings are YYYY_MM, so the lexical max is the latest month
+        self.latest = np.full(len(self.chip_ids), np.nan)
+        self.latest_time = np.full(len(self.chip_ids), None, dtype=object)
+        for time_id in sorted(self.predictions):
+            arr = self.predictions[time_id]
+            has = ~np.isnan(arr)
+            self.latest[has] = arr[has]
+            self.latest_time[has] = time_id
+
+    def __len__(self) -> int:
+        return len(self.chip_ids)
+
+    def query(
+        self,
+        bbox: Sequence[float],
+        time_id: Optional[str] = None,
+        limit: int = DEFAULT_LIMIT,
+    ) -> List[Dict]:
+        """
+        Chips whose polygon intersects ``bbox`` (minx, miny, maxx, maxy in
+        lon/lat), with the prediction for ``time_id`` or the latest one.
+        """
+        return self.query_with_total(bbox, time_id, limit)[0]
+
+    def query_with_total(
+        self,
+        bbox: Sequence[float],
+        time_id: Optional[str] = None,
+        limit: int = DEFAULT_LIMIT,
+    ) -> Tuple[List[Dict], int]:
+        """
+        Like ``query``, plus the number of intersecting chips before
+        ``limit`` was applied.
+        """
+        import shapely
+
+        idx = self.tree.query(shapely.box(*bbox), predicate="intersects")
+        total = len(idx)
+        idx = np.sort(idx)[:limit]
+
+        if time_id is not None:
+            values = self.predictions.get(time_id)
+            preds = values[idx] if values is not None else np.full(len(idx), np.nan)
+            times = np.full(len(idx), time_id, dtype=object)
+        elif self.latest is not None:
+            preds, times = self.latest[idx], self.latest_time[idx]
+        else:
+            preds, times = np.full(len(idx), np.nan), np.full(len(idx), None, dtype=object)
+
+        bounds = self.bounds[idx].round(7).tolist()
+        chips = [
+            {
+                "chip_id": chip_id,
+                "bounds": b,
+                "time_id": t if p == p else None,
+                "prediction": p if p == p else None,
+            }
+            for chip_id, b, t, p in zip(
+                self.chip_ids[idx].tolist(), bounds, times.tolist(), preds.tolist()
+            )
+        ]
+        return chips, total
+
+
+# ---------------------------------------------------------------------
+# Live index + background rebuild
+# ---------------------------------------------------------------------
+
+class ChipIndexManager:
+    """
+    Holds the live ChipIndex and rebuilds it when its sources change.
+    """
+
+    def __init__(
+        self,
+        snapshot_path: Optional[str] = None,
+        predictions_path: Optional[str] = None,
+        db: Optional[Dict] = None,
+        poll_seconds: float = 30.0,
+    ):
+        self.snapshot_path = snapshot_path
+        self.predictions_path = predictions_path
+        self.db = db
+        self.poll_seconds = poll_seconds
+        self.index: Optional[ChipIndex] = None
+        self._versions = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls) -> "ChipIndexManager":
+        db = None
+        if os.environ.get("CHIP_INDEX_FROM_DB") == "1":
+            db = {
+                "dbname": os.environ.get("PGDATABASE"),
+                "user": os.environ.get("PGUSER"),
+                "password": os.environ.get("PGPASSWORD"),
+                "host": os.environ.get("PGHOST", "localhost"),
+                "port": int(os.environ.get("PGPORT", 5432)),
+            }
+        return cls(
+            snapshot_path=os.environ.get("CHIP_SNAPSHOT_PATH"),
+            predictions_path=os.environ.get("CHIP_PREDICTIONS_PATH"),
+            db=db,
+            poll_seconds=float(os.environ.get("CHIP_INDEX_POLL_SECONDS", 30)),
+        )
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.snapshot_path or self.db)
+
+    def _source_versions(self) -> tuple:
+        return (_file_version(self.snapshot_path), _file_version(self.predictions_path))
+
+    def rebuild(self) -> Optional[ChipIndex]:
+        """
+        Build a fresh index from the configured sources and swap it in.
+        """
+        if not self.configured:
+            return None
+        versions = self._source_versions()
+        start = time.perf_counter()
+
+        if self.snapshot_path:
+            chips = read_chip_snapshot(self.snapshot_path)
+        else:
+            chips = read_chips_from_db(**self.db)
+        predictions = None
+        if self.predictions_path and os.path.exists(self.predictions_path):
+            predictions = read_predictions(self.predictions_path)
+
+        index = ChipIndex.build(chips, predictions, version=f"{hash(versions) & 0xFFFFFFFF:08x}")
+        self.index, self._versions = index, versions
+
+        latency = round((time.perf_counter() - start) * 1000, 2)
+        logger.info("Chip index built: %s chips in %s ms | version=%s", len(index), latency, index.version)
+        return index
+
+    def check_for_changes(self) -> bool:
+        """
+        Rebuild if the snapshot or predictions changed since the last build.
+        """
+        if self._source_versions() == self._versions:
+            return False
+        self.rebuild()
+        return True
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.check_for_changes()
+            except Exception:
+                # Keep serving the previous index
+                logger.exception("Chip index rebuild failed")
+
+    def start(self) -> None:
+        # Only file sources can be watched; a DB-backed index is built once
+        if not self.configured or self._thread is not None or not self.snapshot_path:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="chip-index-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_seconds + 1)
+            self._thread = None
@@ -0,0 +1,256 @@
+"""
+growth_cube.py
+
+In-memory AOI × month growth cube behind ``GET /aoi/{aoi_id}/growth``.
+
+The cube is the Parquet file written by ``etl.rollup`` (one row per
+aoi_id, time_id, chip_id, sorted in that order). At load it is split into one
+contiguous block per AOI and the per-month totals are precomputed, so a
+request is a dict lookup plus a ``searchsorted`` on that AOI's months.
+
+Every response carries an ETag derived from the cube version and the query.
+Requests whose ``If-None-Match`` lists that tag (weak comparison) or ``*``
+get ``304 Not Modified`` without a body. Serialized bodies are kept in a small LRU per cube version.
+
+Configuration (environment):
+    GROWTH_CUBE_PATH          Parquet cube written by etl.rollup
+    GROWTH_CUBE_POLL_SECONDS  reload poll interval (default 30)
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import orjson
+import pandas as pd
+
+from ml_end_to_end_pipeline.api.chip_index import _file_version
+
+logger = logging.getLogger(__name__)
+
+MEASURES = ["building_count", "prev_building_count", "delta_count", "prediction"]
+CACHE_SIZE = 1024
+
+
+def _nan_to_none(values: np.ndarray) -> list:
+    return [None if v != v else v for v in values.tolist()]
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    True if an If-None-Match header lists ``etag`` or is ``*``.
+
+    Tags are compared exactly after dropping the weak ``W/`` prefix.
+    """
+    if not if_none_match:
+        return False
+    target = etag[2:] if etag.startswith("W/") else etag
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or (tag[2:] if tag.startswith("W/") else tag) == target:
+            return True
+    return False
+
+
+@dataclass
+class AoiSlice:
+    time_ids: np.ndarray                 # sorted month of each cube row
+    chip_ids: np.ndarray
+    measures: Dict[str, np.ndarray]
+    months: pd.DataFrame                 # per-month totals, sorted by time_id
+
+
+@dataclass
+class GrowthCube:
+    aois: Dict[str, AoiSlice]
+    version: str = ""
+    _cache: "OrderedDict[tuple, Tuple[str, bytes]]" = field(default_factory=OrderedDict)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    @classmethod
+    def build(cls, cube: pd.DataFrame, version: str = "") -> "GrowthCube":
+        """
+        Split a cube frame into per-AOI blocks with precomputed monthly totals.
+        """
+        cube = cube.assign(
+            aoi_id=cube["aoi_id"].astype(str),
+            time_id=cube["time_id"].astype(str),
+            chip_id=cube["chip_id"].astype(str),
+        ).sort_values(["aoi_id", "time_id", "chip_id"], ignore_index=True)
+
+        aoi_ids = cube["aoi_id"].to_numpy()
+        starts = np.flatnonzero(np.r_[True, aoi_ids[1:] != aoi_ids[:-1]]) if len(cube) else []
+        bounds = zip(starts, list(starts[1:]) + [len(cube)])
+
+        aois = {}
+        for start, end in bounds:
+            block = cube.iloc[start:end]
+            months = block.groupby("time_id", sort=True).agg(
+                chips=("chip_id", "size"),
+                building_count=("building_count", "sum"),
+                delta_count=("delta_count", "sum"),
+                predicted_growth=("prediction", lambda p: p.sum(min_count=1)),
+            ).reset_index()
+            aois[aoi_ids[start]] = AoiSlice(
+                time_ids=block["time_id"].to_numpy(),
+                chip_ids=block["chip_id"].to_numpy(),
+                measures={m: block[m].to_numpy(dtype=np.float64) for m in MEASURES},
+                months=months,
+            )
+        return cls(aois=aois, version=version)
+
+    def __len__(self) -> int:
+        return len(self.aois)
+
+    def etag(self, aoi_id: str, start: Optional[str], end: Optional[str], chips: bool) -> str:
+        key = f"{self.version}|{aoi_id}|{start}|{end}|{int(chips)}"
+        return '"' + hashlib.blake2b(key.encode(), digest_size=12).hexdigest() + '"'
+
+    def response(
+        self,
+        aoi_id: str,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        chips: bool = False,
+    ) -> Optional[Tuple[str, bytes]]:
+        """
+        (ETag, JSON body) for one AOI and inclusive month range; None if the
+        AOI is not in the cube.
+        """
+        key = (aoi_id, start, end, chips)
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit is not None:
+                self._cache.move_to_end(key)
+                return hit
+
+        aoi = self.aois.get(aoi_id)
+        if aoi is None:
+            return None
+        result = (self.etag(aoi_id, start, end, chips), self._serialize(aoi_id, aoi, start, end, chips))
+
+        with self._lock:
+            self._cache[key] = result
+            if len(self._cache) > CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return result
+
+    def _serialize(self, aoi_id, aoi: AoiSlice, start, end, chips) -> bytes:
+        months = aoi.months
+        m_times = months["time_id"].to_numpy()
+        lo = np.searchsorted(m_times, start, side="left") if start else 0
+        hi = np.searchsorted(m_times, end, side="right") if end else len(m_times)
+        months = months.iloc[lo:hi]
+
+        body = {
+            "aoi_id": aoi_id,
+            "cube_version": self.version,
+            "months": [
+                {
+                    "time_id": t,
+                    "chips": int(c),
+                    "building_count": int(b),
+                    "delta_count": d,
+                    "predicted_growth": p,
+                }
+                for t, c, b, d, p in zip(
+                    months["time_id"].tolist(),
+                    months["chips"].tolist(),
+                    months["building_count"].tolist(),
+                    _nan_to_none(months["delta_count"].to_numpy(dtype=np.float64)),
+                    _nan_to_none(months["predicted_growth"].to_numpy(dtype=np.float64)),
+                )
+            ],
+        }
+        if chips:
+            r_lo = np.searchsorted(aoi.time_ids, start, side="left") if start else 0
+            r_hi = np.searchsorted(aoi.time_ids, end, side="right") if end else len(aoi.time_ids)
+            rows = slice(r_lo, r_hi)
+            columns = [aoi.time_ids[rows].tolist(), aoi.chip_ids[rows].tolist()]
+            columns += [_nan_to_none(aoi.measures[m][rows]) for m in MEASURES]
+            body["chips"] = [
+                dict(zip(["time_id", "chip_id"] + MEASURES, values))
+                for values in zip(*columns)
+            ]
+        return orjson.dumps(body)
+
+
+# ---------------------------------------------------------------------
+# Live cube + background reload
+# ---------------------------------------------------------------------
+
+class GrowthCubeManager:
+    """
+    Holds the live GrowthCube and reloads it when the file changes.
+    """
+
+    def __init__(self, path: Optional[str] = None, poll_seconds: float = 30.0):
+        self.path = path
+        self.poll_seconds = poll_seconds
+        self.cube: Optional[GrowthCube] = None
+        self._version = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls) -> "GrowthCubeManager":
+        return cls(
+            path=os.environ.get("GROWTH_CUBE_PATH"),
+            poll_seconds=float(os.environ.get("GROWTH_CUBE_POLL_SECONDS", 30)),
+        )
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.path) and os.path.exists(self.path)
+
+    def reload(self) -> Optional[GrowthCube]:
+        """
+        Load the cube file and swap it in.
+        """
+        if not self.configured:
+            return None
+        version = _file_version(self.path)
+        start = time.perf_counter()
+
+        cube = GrowthCube.build(
+            pd.read_parquet(self.path),
+            version=f"{hash(version) & 0xFFFFFFFF:08x}",
+        )
+        self.cube, self._version = cube, version
+
+        latency = round((time.perf_counter() - start) * 1000, 2)
+        logger.info("Growth cube loaded: %s AOIs in %s ms | version=%s", len(cube), latency, cube.version)
+        return cube
+
+    def check_for_changes(self) -> bool:
+        if _file_version(self.path) == self._version:
+            return False
+        self.reload()
+        return True
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.check_for_changes()
+            except Exception:
+                # Keep serving the previous cube
+                logger.exception("Growth cube reload failed")
+
+    def start(self) -> None:
+        if not self.path or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="growth-cube-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_seconds + 1)
+            self._thread = None
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 
 class PredictionRequest(BaseModel):
@@ -18,3 +18,28 @@ class PredictionResponse(BaseModel):
 
 class BatchPredictionResponse(BaseModel):
     predictions: List[PredictionResponse]
+
+
+class Explanation(BaseModel):
+    prediction: float
+    bias: float
+    contributions: Dict[str, float]
+
+
+class BatchExplanationResponse(BaseModel):
+    explanations: List[Explanation]
+
+
+class ChipFeature(BaseModel):
+    chip_id: str
+    bounds: List[float]
+    time_id: Optional[str] = None
+    prediction: Optional[float] = None
+
+
+class ChipsResponse(BaseModel):
+    count: int
+    total: int
+    truncated: bool
+    index_version: str
+    chips: List[ChipFeature]
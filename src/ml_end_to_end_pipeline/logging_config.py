@@ -0,0 +1,153 @@
+"""
+logging_config.py
+
+Non-blocking, structured logging for the API.
+
+``configure_logging()`` applies ``logging_config.yaml`` (JSON output via
+python-json-logger) and then moves every configured handler behind a single
+``QueueHandler``/``QueueListener`` pair. Request threads only append the
+record to an in-memory queue; formatting and the write to stdout happen on
+the listener thread, so stdout contention no longer shows up in request
+latency.
+
+Records are enqueued unformatted (``LazyQueueHandler``), so
+``logger.info("... %s", value)`` and ``extra={...}`` fields are only
+rendered by the listener, and only for records that survive sampling.
+
+Request logs can be sampled per endpoint with ``EndpointSampler``, either
+from the YAML (``filters.request_sampling.rates``) or the
+``LOG_SAMPLE_RATES`` environment variable, e.g. ``/predict=0.05,default=1``.
+Warnings and errors are never sampled out.
+"""
+
+import atexit
+import logging
+import logging.config
+import os
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+DEFAULT_CONFIG_PATH = "logging_config.yaml"
+REQUEST_LOGGER = "ml_end_to_end_pipeline.api.requests"
+
+_LISTENER: Optional[QueueListener] = None
+
+
+# ---------------------------------------------------------
+# Sampling
+# ---------------------------------------------------------
+
+def parse_sample_rates(spec: Optional[str]) -> Dict[str, float]:
+    """
+    Parse "endpoint=rate,..." (e.g. "/predict=0.1,default=1") into a dict.
+    """
+    rates = {}
+    for item in (spec or "").split(","):
+        if "=" in item:
+            endpoint, rate = item.rsplit("=", 1)
+            rates[endpoint.strip()] = float(rate)
+    return rates
+
+
+class EndpointSampler(logging.Filter):
+    """
+    Keep a fraction of INFO/DEBUG records per ``record.endpoint``.
+    """
+
+    def __init__(self, rates: Optional[Dict[str, float]] = None, default: float = 1.0, seed=None):
+        super().__init__()
+        rates = dict(rates or {})
+        rates.update(parse_sample_rates(os.environ.get("LOG_SAMPLE_RATES")))
+        self.default = float(rates.pop("default", default))
+        self.rates = {k: float(v) for k, v in rates.items()}
+        self._random = random.Random(seed).random
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(getattr(record, "endpoint", None), self.default)
+        return rate >= 1.0 or (rate > 0.0 and self._random() < rate)
+
+
+# ---------------------------------------------------------
+# Queue handler
+# ---------------------------------------------------------
+
+class LazyQueueHandler(QueueHandler):
+    """
+    QueueHandler that defers message formatting to the listener thread.
+
+    The stock ``prepare()`` merges ``msg % args`` in the calling thread;
+    here the record is enqueued as-is (the queue is in-process, so nothing
+    needs to be pickled).
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def install_queue_logging(
+    logger_names=None,
+    log_queue: Optional[queue.Queue] = None,
+    include_root: bool = True,
+) -> QueueListener:
+    """
+    Move the handlers of the root and the given loggers behind one queue.
+    """
+    global _LISTENER
+    stop_queue_logging()
+
+    loggers = [logging.getLogger(n) for n in (logger_names or [])]
+    if include_root:
+        loggers.insert(0, logging.getLogger())
+    handlers = []
+    for lg in loggers:
+        for h in lg.handlers:
+            if h not in handlers:
+                handlers.append(h)
+
+    log_queue = log_queue or queue.SimpleQueue()
+    queue_handler = LazyQueueHandler(log_queue)
+    for lg in loggers:
+        if lg.handlers:
+            for h in list(lg.handlers):
+                lg.removeHandler(h)
+            lg.addHandler(queue_handler)
+
+    _LISTENER = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _LISTENER.start()
+    return _LISTENER
+
+
+def stop_queue_logging() -> None:
+    """
+    Flush the queue and stop the listener thread (safe to call twice).
+    """
+    global _LISTENER
+    if _LISTENER is not None and _LISTENER._thread is not None:
+        _LISTENER.stop()
+    _LISTENER = None
+
+
+def configure_logging(config_path: str = None, use_queue: bool = True) -> Optional[QueueListener]:
+    """
+    Apply the YAML logging config and, by default, route it through a queue.
+    """
+    import yaml
+
+    config_path = config_path or os.environ.get("LOG_CONFIG", DEFAULT_CONFIG_PATH)
+    if not os.path.exists(config_path):
+        logging.basicConfig(level=logging.INFO)
+        return None
+
+    with open(config_path) as f:
+        config = yaml.safe_load(f)
+    logging.config.dictConfig(config)
+
+    if not use_queue:
+        return None
+    listener = install_queue_logging(config.get("loggers", {}).keys())
+    atexit.register(stop_queue_logging)
+    return listener
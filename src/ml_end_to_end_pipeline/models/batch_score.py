@@ -0,0 +1,304 @@
+"""
+batch_score.py
+
+High-throughput offline batch scoring for full-history backfills.
+
+The input (CSV or Parquet) is streamed in fixed-size chunks, chunks are
+scored across a process pool, and results are written back in input order
+as they complete, so memory stays bounded by ``chunk_size × in-flight``
+instead of the size of the file.
+
+A JSON checkpoint next to the output records how many chunks have been
+written; rerunning the same command resumes after the last completed chunk.
+
+This is the engine behind the ``--input/--output`` mode of
+``models.predict``; it can also be run directly:
+
+    python -m ml_end_to_end_pipeline.models.batch_score \
+        --input data/new_data.csv \
+        --output predictions.parquet \
+        --chunk-size 250000 --workers 8
+"""
+
+import argparse
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, Optional
+
+import pandas as pd
+
+from ml_end_to_end_pipeline.models.compact import load_model_artifact
+
+DEFAULT_MODEL_PATH = "models/best_regression_model.joblib"
+PREDICTION_COLUMN = "prediction"
+
+
+# ---------------------------------------------------------------------
+# Input streaming
+# ---------------------------------------------------------------------
+
+def _is_parquet(path: str) -> bool:
+    return path.endswith((".parquet", ".pq")) or os.path.isdir(path)
+
+
+def iter_chunks(path: str, chunk_size: int, skip_chunks: int = 0) -> Iterator[pd.DataFrame]:
+    """
+    Yield DataFrame chunks of ``chunk_size`` rows from a CSV or Parquet input.
+    """
+    if _is_parquet(path):
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        dataset = ds.dataset(path, format="parquet")
+        buffered, n_buffered, index = [], 0, 0
+
+        # Row groups rarely line up with chunk_size; re-slice so checkpoints
+        # always count identical chunks across runs.
+        for batch in dataset.to_batches(batch_size=chunk_size):
+            buffered.append(batch)
+            n_buffered += batch.num_rows
+            while n_buffered >= chunk_size:
+                table = pa.Table.from_batches(buffered, schema=dataset.schema)
+                head, rest = table.slice(0, chunk_size), table.slice(chunk_size)
+                if index >= skip_chunks:
+                    yield head.to_pandas()
+                index += 1
+                buffered, n_buffered = rest.to_batches(), rest.num_rows
+
+        if n_buffered and index >= skip_chunks:
+            yield pa.Table.from_batches(buffered, schema=dataset.schema).to_pandas()
+        return
+
+    reader = pd.read_csv(path, chunksize=chunk_size)
+    for index, chunk in enumerate(reader):
+        if index >= skip_chunks:
+            yield chunk.reset_index(drop=True)
+
+
+# ---------------------------------------------------------------------
+# Output sinks
+# ---------------------------------------------------------------------
+
+class _CsvSink:
+    """
+    Append-only CSV writer; resumes by truncating to the checkpointed size.
+    """
+
+    def __init__(self, path: str, resume_bytes: int):
+        mode = "r+b" if resume_bytes and os.path.exists(path) else "wb"
+        self._f = open(path, mode)
+        self._f.truncate(resume_bytes if mode == "r+b" else 0)
+        self._f.seek(0, os.SEEK_END)
+
+    def write(self, df: pd.DataFrame) -> None:
+        df.to_csv(self._f, header=self._f.tell() == 0, index=False)
+        self._f.flush()
+
+    def position(self) -> int:
+        return self._f.tell()
+
+    def close(self) -> None:
+        self._f.close()
+
+
+class _ParquetSink:
+    """
+    Writes one Parquet part file per chunk into an output directory.
+    """
+
+    def __init__(self, path: str, start_chunk: int):
+        os.makedirs(path, exist_ok=True)
+        self._path = path
+        self._next = start_chunk
+
+        # Parts beyond the checkpoint belong to an interrupted run
+        for name in os.listdir(path):
+            if name.startswith("part-") and int(name[5:10]) >= start_chunk:
+                os.remove(os.path.join(path, name))
+
+    def write(self, df: pd.DataFrame) -> None:
+        part = os.path.join(self._path, f"part-{self._next:05d}.parquet")
+        df.to_parquet(part + ".tmp", index=False)
+        os.replace(part + ".tmp", part)
+        self._next += 1
+
+    def position(self) -> int:
+        return self._next
+
+    def close(self) -> None:
+        pass
+
+
+# ---------------------------------------------------------------------
+# Checkpointing
+# ---------------------------------------------------------------------
+
+def checkpoint_path(output_path: str) -> str:
+    return output_path.rstrip("/\\") + ".checkpoint.json"
+
+
+def _read_checkpoint(output_path: str, input_path: str, chunk_size: int) -> Dict:
+    path = checkpoint_path(output_path)
+    if not os.path.exists(path):
+        return {"chunks_done": 0, "rows_done": 0, "output_position": 0}
+
+    with open(path) as f:
+        state = json.load(f)
+
+    if state["input"] != os.path.abspath(input_path) or state["chunk_size"] != chunk_size:
+        raise ValueError(
+            f"Checkpoint {path} was written for a different input or chunk size; "
+            "delete it to start over"
+        )
+    return state
+
+
+def _write_checkpoint(output_path: str, state: Dict) -> None:
+    path = checkpoint_path(output_path)
+    with open(path + ".tmp", "w") as f:
+        json.dump(state, f)
+    os.replace(path + ".tmp", path)
+
+
+# ---------------------------------------------------------------------
+# Worker
+# ---------------------------------------------------------------------
+
+_WORKER_MODEL = None
+
+
+def _init_worker(model_path: str) -> None:
+    global _WORKER_MODEL
+    _WORKER_MODEL = load_model_artifact(model_path)
+
+
+def _score_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    chunk[PREDICTION_COLUMN] = _WORKER_MODEL.predict(chunk)
+    return chunk
+
+
+# ---------------------------------------------------------------------
+# Engine
+# ---------------------------------------------------------------------
+
+def score_file(
+    input_path: str,
+    output_path: str,
+    model_path: str = DEFAULT_MODEL_PATH,
+    chunk_size: int = 250_000,
+    workers: Optional[int] = None,
+    max_in_flight: Optional[int] = None,
+    resume: bool = True,
+) -> Dict:
+    """
+    Score ``input_path`` chunk by chunk and write predictions to ``output_path``.
+
+    Parquet output (``.parquet`` suffix) is a directory of part files; any
+    other suffix is written as a single CSV. Returns a summary with row
+    counts and throughput.
+    """
+    workers = os.cpu_count() if workers is None else workers
+    max_in_flight = max_in_flight or max(2, 2 * workers)
+
+    state = (
+        _read_checkpoint(output_path, input_path, chunk_size)
+        if resume
+        else {"chunks_done": 0, "rows_done": 0, "output_position": 0}
+    )
+    state.update({"input": os.path.abspath(input_path), "chunk_size": chunk_size})
+
+    if state["chunks_done"]:
+        print(f"Resuming after {state['chunks_done']} chunks ({state['rows_done']:,} rows)")
+
+    if _is_parquet(output_path):
+        sink = _ParquetSink(output_path, state["chunks_done"])
+    else:
+        sink = _CsvSink(output_path, state["output_position"])
+
+    chunks = iter_chunks(input_path, chunk_size, skip_chunks=state["chunks_done"])
+    start = time.perf_counter()
+    rows_this_run = 0
+
+    def commit(scored: pd.DataFrame) -> None:
+        nonlocal rows_this_run
+        sink.write(scored)
+        rows_this_run += len(scored)
+        state["chunks_done"] += 1
+        state["rows_done"] += len(scored)
+        state["output_position"] = sink.position()
+        _write_checkpoint(output_path, state)
+
+        elapsed = time.perf_counter() - start
+        print(
+            f"✓ Chunk {state['chunks_done']} | {state['rows_done']:,} rows | "
+            f"{rows_this_run / max(elapsed, 1e-9):,.0f} rows/sec"
+        )
+
+    try:
+        if workers <= 1:
+            _init_worker(model_path)
+            for chunk in chunks:
+                commit(_score_chunk(chunk))
+        else:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(model_path,),
+            ) as pool:
+                pending = deque()
+                for chunk in chunks:
+                    pending.append(pool.submit(_score_chunk, chunk))
+                    # Bounded in-flight work; results drain in submission order
+                    if len(pending) >= max_in_flight:
+                        commit(pending.popleft().result())
+                while pending:
+                    commit(pending.popleft().result())
+    finally:
+        sink.close()
+
+    elapsed = time.perf_counter() - start
+    summary = {
+        "rows": state["rows_done"],
+        "rows_this_run": rows_this_run,
+        "chunks": state["chunks_done"],
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round(rows_this_run / max(elapsed, 1e-9), 1),
+    }
+    state["completed"] = True
+    _write_checkpoint(output_path, state)
+    return summary
+
+
+# ---------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Chunked, parallel batch scoring")
+    parser.add_argument("--input", required=True, help="CSV or Parquet input")
+    parser.add_argument("--output", required=True, help="CSV file or .parquet directory")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--chunk-size", type=int, default=250_000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--no-resume", action="store_true")
+    args = parser.parse_args(argv)
+
+    summary = score_file(
+        args.input,
+        args.output,
+        model_path=args.model,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        resume=not args.no_resume,
+    )
+    print(
+        f"✓ Scored {summary['rows']:,} rows in {summary['seconds']}s "
+        f"({summary['rows_per_sec']:,.0f} rows/sec)"
+    )
+
+
+if __name__ == "__main__":
+    main()
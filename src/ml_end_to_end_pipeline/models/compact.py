@@ -0,0 +1,635 @@
+"""
+compact.py
+
+Compact, memory-mappable artifact format for the RandomForest pipeline.
+
+The joblib artifact pickles every fitted tree object, which makes it large on
+disk, slow to load, and private to each API worker. This module flattens the
+forest into contiguous NumPy arrays (feature, threshold, children, value) and
+stores them, together with the scaler statistics and one-hot vocabularies,
+in a single file that can be memory-mapped and shared through the page cache.
+
+File layout:
+    8 bytes   magic  b"SN7FRST1"
+    8 bytes   little-endian uint64 header length
+    N bytes   JSON header (preprocessing spec + array offsets)
+    ...       64-byte aligned raw array blocks
+
+Usage:
+    python -m ml_end_to_end_pipeline.models.compact export \
+        --model models/best_regression_model.joblib \
+        --output models/best_regression_model.forest
+
+    python -m ml_end_to_end_pipeline.models.compact benchmark \
+        --model models/best_regression_model.joblib \
+        --compact models/best_regression_model.forest
+"""
+
+import argparse
+import json
+import os
+import struct
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+MAGIC = b"SN7FRST1"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+COMPACT_SUFFIX = ".forest"
+
+# Rows × trees processed per traversal chunk; bounds the node-index matrix.
+_TRAVERSAL_CELLS = 4_000_000
+
+
+# ---------------------------------------------------------------------
+# Model introspection
+# ---------------------------------------------------------------------
+
+def _unwrap_estimator(model):
+    """
+    Return the fitted estimator behind a GridSearchCV-style wrapper.
+    """
+    return getattr(model, "best_estimator_", model)
+
+
+def _split_pipeline(model):
+    """
+    Split a fitted model into (preprocessor, forest).
+
+    Supports a bare forest or a Pipeline whose last step is the forest and
+    whose only preceding step is a ColumnTransformer.
+    """
+    model = _unwrap_estimator(model)
+
+    if hasattr(model, "estimators_") and not hasattr(model, "steps"):
+        return None, model
+
+    steps = getattr(model, "steps", None)
+    if not steps:
+        raise ValueError(f"Unsupported model type: {type(model).__name__}")
+
+    forest = steps[-1][1]
+    preprocessors = [est for _, est in steps[:-1] if est not in (None, "passthrough")]
+
+    if not hasattr(forest, "estimators_"):
+        raise ValueError("Final pipeline step must be a fitted tree ensemble")
+    if len(preprocessors) > 1:
+        raise ValueError("Only a single preprocessing step is supported")
+
+    return (preprocessors[0] if preprocessors else None), forest
+
+
+def _column_names(ct, columns) -> List[str]:
+    """
+    Normalise ColumnTransformer column selectors to a list of names.
+    """
+    if isinstance(columns, str):
+        columns = [columns]
+    names = []
+    for col in columns:
+        if isinstance(col, (int, np.integer)):
+            names.append(str(ct.feature_names_in_[col]))
+        else:
+            names.append(str(col))
+    return names
+
+
+def _describe_transformer(name: str, est, columns: List[str]) -> Optional[Dict]:
+    """
+    Describe one fitted ColumnTransformer block as a JSON-serialisable spec.
+    """
+    if est == "drop" or not columns:
+        return None
+
+    if est == "passthrough":
+        return {"kind": "passthrough", "columns": columns}
+
+    kind = type(est).__name__
+
+    if kind == "StandardScaler":
+        return {
+            "kind": "scale",
+            "columns": columns,
+            "mean": None if est.mean_ is None else np.asarray(est.mean_).tolist(),
+            "scale": None if est.scale_ is None else np.asarray(est.scale_).tolist(),
+        }
+
+    if kind == "OneHotEncoder":
+        if est.drop is not None:
+            raise ValueError("OneHotEncoder with drop= is not supported")
+        if getattr(est, "_infrequent_enabled", False):
+            raise ValueError("OneHotEncoder infrequent categories are not supported")
+        return {
+            "kind": "onehot",
+            "columns": columns,
+            "categories": [np.asarray(c).tolist() for c in est.categories_],
+            "handle_unknown": est.handle_unknown,
+        }
+
+    raise ValueError(f"Unsupported transformer '{name}': {kind}")
+
+
+def describe_preprocessor(preprocessor) -> Optional[List[Dict]]:
+    """
+    Convert a fitted ColumnTransformer into an ordered list of block specs.
+    """
+    if preprocessor is None:
+        return None
+
+    if not hasattr(preprocessor, "transformers_"):
+        raise ValueError(
+            f"Unsupported preprocessor: {type(preprocessor).__name__}"
+        )
+
+    blocks = []
+    for name, est, columns in preprocessor.transformers_:
+        spec = _describe_transformer(
+            name, est, _column_names(preprocessor, columns)
+        )
+        if spec is not None:
+            blocks.append(spec)
+    return blocks
+
+
+# ---------------------------------------------------------------------
+# Forest flattening
+# ---------------------------------------------------------------------
+
+def flatten_forest(forest) -> Dict[str, np.ndarray]:
+    """
+    Concatenate all fitted trees into flat node arrays.
+
+    Child indices are rewritten to global node positions, so a single
+    gather per level walks every tree at once. Leaves keep feature < 0.
+    """
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+
+    for est in forest.estimators_:
+        tree = est.tree_
+        if tree.n_outputs != 1:
+            raise ValueError("Only single-output forests are supported")
+
+        left = tree.children_left.astype(np.int32)
+        right = tree.children_right.astype(np.int32)
+        is_leaf = left < 0
+
+        features.append(np.where(is_leaf, -1, tree.feature).astype(np.int32))
+        thresholds.append(tree.threshold.astype(np.float64))
+        lefts.append(np.where(is_leaf, -1, left + offset).astype(np.int32))
+        rights.append(np.where(is_leaf, -1, right + offset).astype(np.int32))
+        values.append(tree.value[:, 0, 0].astype(np.float64))
+        roots.append(offset)
+
+        offset += tree.node_count
+        max_depth = max(max_depth, int(tree.max_depth))
+
+    return {
+        "feature": np.concatenate(features),
+        "threshold": np.concatenate(thresholds),
+        "left": np.concatenate(lefts),
+        "right": np.concatenate(rights),
+        "value": np.concatenate(values),
+        "roots": np.asarray(roots, dtype=np.int32),
+        "max_depth": max_depth,
+    }
+
+
+# ---------------------------------------------------------------------
+# Compact model
+# ---------------------------------------------------------------------
+
+class CompactForestModel:
+    """
+    Predict-only forest backed by flat (optionally memory-mapped) arrays.
+
+    Exposes ``predict(df)`` with the same input contract as the joblib
+    pipeline, so it can be dropped into the API and CLI unchanged.
+    """
+
+    def __init__(
+        self,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        left: np.ndarray,
+        right: np.ndarray,
+        value: np.ndarray,
+        roots: np.ndarray,
+        max_depth: int,
+        preprocess: Optional[List[Dict]] = None,
+        feature_names: Optional[List[str]] = None,
+        metadata: Optional[Dict] = None,
+    ):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.preprocess = preprocess
+        self.feature_names = feature_names
+        self.metadata = metadata or {}
+        self._category_index = {}
+
+        for block in preprocess or []:
+            if block["kind"] == "onehot":
+                for col, cats in zip(block["columns"], block["categories"]):
+                    self._category_index[col] = pd.Index(cats)
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def input_columns(self) -> List[str]:
+        if self.preprocess is None:
+            return list(self.feature_names or [])
+        cols = []
+        for block in self.preprocess:
+            cols.extend(c for c in block["columns"] if c not in cols)
+        return cols
+
+    # -----------------------------
+    # Preprocessing
+    # -----------------------------
+
+    def _onehot(self, X: pd.DataFrame, block: Dict) -> np.ndarray:
+        parts = []
+        for col in block["columns"]:
+            cats = self._category_index[col]
+            codes = cats.get_indexer(X[col])
+            if block["handle_unknown"] == "error" and (codes < 0).any():
+                unknown = X[col][codes < 0].unique()[:5].tolist()
+                raise ValueError(f"Found unknown categories {unknown} in column '{col}'")
+            out = np.zeros((len(X), len(cats)), dtype=np.float64)
+            known = np.nonzero(codes >= 0)[0]
+            out[known, codes[known]] = 1.0
+            parts.append(out)
+        return np.hstack(parts)
+
+    def transform(self, X) -> np.ndarray:
+        """
+        Reproduce the fitted ColumnTransformer on a DataFrame.
+        """
+        if self.preprocess is None:
+            if isinstance(X, pd.DataFrame) and self.feature_names:
+                X = X[self.feature_names]
+            return np.asarray(X, dtype=np.float64)
+
+        blocks = []
+        for block in self.preprocess:
+            if block["kind"] == "onehot":
+                blocks.append(self._onehot(X, block))
+                continue
+
+            vals = X[block["columns"]].to_numpy(dtype=np.float64, copy=True)
+            if block["kind"] == "scale":
+                if block["mean"] is not None:
+                    vals -= np.asarray(block["mean"])
+                if block["scale"] is not None:
+                    vals /= np.asarray(block["scale"])
+            blocks.append(vals)
+
+        return np.hstack(blocks)
+
+    # -----------------------------
+    # Inference
+    # -----------------------------
+
+    def _traverse(self, Xt: np.ndarray) -> np.ndarray:
+        """
+        Walk every tree for every row; returns leaf node indices (rows × trees).
+        """
+        n = Xt.shape[0]
+        node = np.broadcast_to(self.roots, (n, self.n_trees)).copy()
+        rows = np.arange(n)[:, None]
+
+        for _ in range(self.max_depth):
+            feat = self.feature[node]
+            internal = feat >= 0
+            if not internal.any():
+                break
+            x = Xt[rows, np.where(internal, feat, 0)]
+            nxt = np.where(x <= self.threshold[node], self.left[node], self.right[node])
+            node = np.where(internal, nxt, node)
+
+        return node
+
+    def _leaf_values(self, X, reduce) -> np.ndarray:
+        # Trees compare float32 inputs against float64 thresholds, as sklearn does
+        Xt = self.transform(X).astype(np.float32)
+        chunk = max(1, _TRAVERSAL_CELLS // max(self.n_trees, 1))
+
+        parts = []
+        for start in range(0, Xt.shape[0], chunk):
+            leaves = self._traverse(Xt[start:start + chunk])
+            parts.append(reduce(self.value[leaves]))
+        if not parts:
+            return reduce(np.empty((0, self.n_trees), dtype=np.float64))
+        return np.concatenate(parts)
+
+    def predict(self, X) -> np.ndarray:
+        """
+        Predict the forest mean for each row of X.
+        """
+        return self._leaf_values(X, lambda v: v.mean(axis=1, dtype=np.float64))
+
+    def predict_per_tree(self, X) -> np.ndarray:
+        """
+        Leaf value of every tree for every row (rows × trees).
+        """
+        return self._leaf_values(X, lambda v: v.astype(np.float64))
+
+    # -----------------------------
+    # Construction
+    # -----------------------------
+
+    @classmethod
+    def from_estimator(cls, model) -> "CompactForestModel":
+        """
+        Build a compact model from a fitted pipeline or forest.
+        """
+        preprocessor, forest = _split_pipeline(model)
+        arrays = flatten_forest(forest)
+        max_depth = arrays.pop("max_depth")
+
+        feature_names = None
+        if preprocessor is None and hasattr(forest, "feature_names_in_"):
+            feature_names = [str(c) for c in forest.feature_names_in_]
+
+        return cls(
+            **arrays,
+            max_depth=max_depth,
+            preprocess=describe_preprocessor(preprocessor),
+            feature_names=feature_names,
+            metadata={"source_estimator": type(forest).__name__},
+        )
+
+
+# ---------------------------------------------------------------------
+# Serialisation
+# ---------------------------------------------------------------------
+
+ARRAY_FIELDS = ("feature", "threshold", "left", "right", "value", "roots")
+
+
+def _align(n: int) -> int:
+    return (n + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def save_compact_model(model: CompactForestModel, path: str) -> str:
+    """
+    Write a CompactForestModel to a single memory-mappable file.
+    """
+    arrays = {name: np.ascontiguousarray(getattr(model, name)) for name in ARRAY_FIELDS}
+
+    header = {
+        "format_version": FORMAT_VERSION,
+        "n_trees": model.n_trees,
+        "max_depth": model.max_depth,
+        "preprocess": model.preprocess,
+        "feature_names": model.feature_names,
+        "metadata": model.metadata,
+        "arrays": {},
+    }
+
+    # Offsets depend on the header size, so size the header with placeholders
+    # first; widening offsets to their final values can only grow the JSON by
+    # a bounded amount, which the padding below absorbs.
+    for name, arr in arrays.items():
+        header["arrays"][name] = {
+            "offset": 0,
+            "dtype": arr.dtype.str,
+            "shape": list(arr.shape),
+        }
+    header_len = _align(len(json.dumps(header).encode()) + 16 + 32 * len(arrays))
+
+    offset = header_len
+    for name, arr in arrays.items():
+        header["arrays"][name]["offset"] = offset
+        offset = _align(offset + arr.nbytes)
+
+    header_bytes = json.dumps(header).encode()
+    prefix = len(MAGIC) + 8
+    if prefix + len(header_bytes) > header_len:
+        raise RuntimeError("Compact header overflowed reserved space")
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header_bytes)))
+        f.write(header_bytes)
+        for name, arr in arrays.items():
+            f.write(b"\0" * (header["arrays"][name]["offset"] - f.tell()))
+            f.write(arr.tobytes())
+
+    return path
+
+
+def read_compact_header(path: str) -> Dict:
+    """
+    Read only the JSON header of a compact model file.
+    """
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"Not a compact forest file: {path}")
+        (length,) = struct.unpack("<Q", f.read(8))
+        return json.loads(f.read(length))
+
+
+def load_compact_model(path: str, mmap: bool = True) -> CompactForestModel:
+    """
+    Load a compact model. With mmap=True the node arrays are read-only views
+    over the file, so concurrent workers share one copy in the page cache.
+    """
+    header = read_compact_header(path)
+    if header["format_version"] != FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported compact format version: {header['format_version']}"
+        )
+
+    if mmap:
+        buf = np.memmap(path, dtype=np.uint8, mode="r")
+    else:
+        buf = np.fromfile(path, dtype=np.uint8)
+
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"]))
+        start = spec["offset"]
+        raw = buf[start:start + count * dtype.itemsize]
+        arrays[name] = raw.view(dtype).reshape(spec["shape"])
+
+    return CompactForestModel(
+        **arrays,
+        max_depth=header["max_depth"],
+        preprocess=header["preprocess"],
+        feature_names=header["feature_names"],
+        metadata=header["metadata"],
+    )
+
+
+def export_compact_model(model, path: str) -> str:
+    """
+    Export a fitted pipeline (or the path to its joblib artifact) to the
+    compact format. Intended to run straight after training.
+    """
+    if isinstance(model, (str, os.PathLike)):
+        import joblib
+        model = joblib.load(model)
+
+    compact = CompactForestModel.from_estimator(model)
+    return save_compact_model(compact, path)
+
+
+def load_model_artifact(path: str):
+    """
+    Load either artifact format based on the file contents.
+
+    This is the hook for ``models.predict.load_model``: pass it the
+    configured model path and it returns an object with ``predict(df)``.
+    """
+    with open(path, "rb") as f:
+        is_compact = f.read(len(MAGIC)) == MAGIC
+
+    if is_compact:
+        return load_compact_model(path)
+
+    import joblib
+    return joblib.load(path)
+
+
+# ---------------------------------------------------------------------
+# Benchmark: compact vs joblib
+# ---------------------------------------------------------------------
+
+def current_rss_bytes() -> int:
+    """
+    Resident set size of this process (Linux /proc, falling back to peak RSS).
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        # ru_maxrss is KiB on Linux, bytes on macOS; only used as a fallback
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def synthetic_inputs(compact: CompactForestModel, n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Build a random input frame matching the model's expected columns.
+    """
+    rng = np.random.default_rng(seed)
+    data = {}
+    for col in compact.input_columns:
+        if col in compact._category_index:
+            cats = compact._category_index[col]
+            data[col] = cats[rng.integers(0, len(cats), n_rows)]
+        else:
+            data[col] = rng.integers(0, 200, n_rows).astype(float)
+    return pd.DataFrame(data)
+
+
+def _measure(path: str, sample: pd.DataFrame, repeats: int, queue) -> None:
+    """
+    Child-process body: load one artifact and time it in a clean interpreter.
+    """
+    rss_before = current_rss_bytes()
+    start = time.perf_counter()
+    model = load_model_artifact(path)
+    load_s = time.perf_counter() - start
+
+    # First predict touches the mapped pages; count it as part of warm-up
+    model.predict(sample.iloc[:1])
+    rss_after = current_rss_bytes()
+
+    single, batch = [], []
+    for i in range(repeats):
+        row = sample.iloc[[i % len(sample)]]
+        t0 = time.perf_counter()
+        model.predict(row)
+        single.append(time.perf_counter() - t0)
+
+    for _ in range(max(1, repeats // 20)):
+        t0 = time.perf_counter()
+        model.predict(sample)
+        batch.append(time.perf_counter() - t0)
+
+    queue.put({
+        "load_seconds": round(load_s, 4),
+        "rss_delta_mb": round((rss_after - rss_before) / 2**20, 2),
+        "predict_single_p50_ms": round(float(np.percentile(single, 50)) * 1000, 3),
+        "predict_single_p99_ms": round(float(np.percentile(single, 99)) * 1000, 3),
+        "predict_batch_p50_ms": round(float(np.percentile(batch, 50)) * 1000, 3),
+    })
+
+
+def compare_with_joblib(
+    joblib_path: str,
+    compact_path: str,
+    n_rows: int = 1000,
+    repeats: int = 200,
+) -> Dict[str, Dict]:
+    """
+    Measure load time, RSS growth and predict latency for both formats,
+    each in a fresh spawned process so neither pollutes the other.
+    """
+    import multiprocessing as mp
+
+    sample = synthetic_inputs(load_compact_model(compact_path), n_rows)
+    ctx = mp.get_context("spawn")
+    results = {}
+
+    for label, path in (("joblib", joblib_path), ("compact", compact_path)):
+        queue = ctx.Queue()
+        proc = ctx.Process(target=_measure, args=(path, sample, repeats, queue))
+        proc.start()
+        stats = queue.get()
+        proc.join()
+        stats["file_size_mb"] = round(os.path.getsize(path) / 2**20, 2)
+        results[label] = stats
+
+    return results
+
+
+# ---------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compact forest artifact tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    exp = sub.add_parser("export", help="Export a joblib pipeline to compact format")
+    exp.add_argument("--model", default="models/best_regression_model.joblib")
+    exp.add_argument("--output", default=None)
+
+    bench = sub.add_parser("benchmark", help="Compare compact and joblib artifacts")
+    bench.add_argument("--model", default="models/best_regression_model.joblib")
+    bench.add_argument("--compact", default=None)
+    bench.add_argument("--rows", type=int, default=1000)
+    bench.add_argument("--repeats", type=int, default=200)
+
+    args = parser.parse_args(argv)
+    default_compact = os.path.splitext(args.model)[0] + COMPACT_SUFFIX
+
+    if args.command == "export":
+        out = export_compact_model(args.model, args.output or default_compact)
+        print(f"✓ Wrote compact model to {out} ({os.path.getsize(out) / 2**20:.2f} MB)")
+        return
+
+    results = compare_with_joblib(
+        args.model, args.compact or default_compact, args.rows, args.repeats
+    )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
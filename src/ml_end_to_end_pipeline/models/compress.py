@@ -0,0 +1,384 @@
+"""
+compress.py
+
+Post-training compression of the RandomForest pipeline for latency-critical
+serving.
+
+Starting from the fitted ``models.pipeline`` model, this tool builds a grid
+of compressed variants and measures each one on the temporal validation
+split:
+
+- Tree-count pruning: trees are ranked by their individual MAE on a
+  selection part of the validation split and the best ``k`` are kept.
+- Depth capping: nodes below ``max_depth`` are collapsed into leaves that
+  predict the node mean.
+- float32 thresholds and leaf values (thresholds rounded down, so every
+  float32 input takes the same branch as before).
+
+Every variant is reported as MAE / RMSE / R² against p50 / p99 single-row
+predict latency, and the fastest variant within the accuracy budget is saved
+as a compact artifact (see ``models/compact.py``).
+
+Accuracy is measured on rows the tree ranking did not see, otherwise the
+curve would favour pruned forests. Pass a separate ``--selection`` CSV, or
+``--selection-fraction`` of the validation rows (default half, chosen with a
+fixed seed) is held out for ranking.
+
+Usage:
+    python -m ml_end_to_end_pipeline.models.compress \
+        --model models/best_regression_model.joblib \
+        --validation data/processed/val.csv \
+        --output models/best_regression_model.compressed.forest
+"""
+
+import argparse
+import itertools
+import json
+import os
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ml_end_to_end_pipeline.models.compact import (
+    CompactForestModel,
+    save_compact_model,
+)
+
+TARGET_COLUMN = "delta_count"
+
+
+# ---------------------------------------------------------------------
+# Flat-array surgery
+# ---------------------------------------------------------------------
+
+def _node_depths(model: CompactForestModel) -> np.ndarray:
+    """
+    Depth of every reachable node (-1 for unreachable nodes).
+    """
+    depth = np.full(len(model.feature), -1, dtype=np.int32)
+    frontier = np.asarray(model.roots, dtype=np.int64)
+    level = 0
+    while frontier.size:
+        depth[frontier] = level
+        internal = frontier[model.feature[frontier] >= 0]
+        frontier = np.concatenate([model.left[internal], model.right[internal]])
+        level += 1
+    return depth
+
+
+def _rebuild(model: CompactForestModel, keep: np.ndarray, roots: np.ndarray,
+             feature, threshold, left, right, value) -> CompactForestModel:
+    """
+    Drop nodes outside ``keep`` and renumber children/roots to match.
+    """
+    new_index = np.cumsum(keep, dtype=np.int64) - 1
+
+    def remap(children):
+        out = np.where(children >= 0, new_index[np.maximum(children, 0)], -1)
+        return out[keep].astype(np.int32)
+
+    depth_after = _node_depths(CompactForestModel(
+        feature, threshold, left, right, value, roots, model.max_depth,
+    ))[keep]
+
+    return CompactForestModel(
+        feature=feature[keep].astype(np.int32),
+        threshold=threshold[keep],
+        left=remap(left),
+        right=remap(right),
+        value=value[keep],
+        roots=new_index[roots].astype(np.int32),
+        max_depth=int(depth_after.max()),
+        preprocess=model.preprocess,
+        feature_names=model.feature_names,
+        metadata=dict(model.metadata),
+    )
+
+
+def select_trees(model: CompactForestModel, tree_indices: Sequence[int]) -> CompactForestModel:
+    """
+    Keep only the given trees (by position in the forest).
+    """
+    ends = np.append(model.roots[1:], len(model.feature))
+    keep = np.zeros(len(model.feature), dtype=bool)
+    selected = np.sort(np.asarray(tree_indices, dtype=np.int64))
+    for i in selected:
+        keep[model.roots[i]:ends[i]] = True
+
+    return _rebuild(
+        model, keep, np.asarray(model.roots)[selected],
+        np.asarray(model.feature), np.asarray(model.threshold),
+        np.asarray(model.left), np.asarray(model.right), np.asarray(model.value),
+    )
+
+
+def cap_depth(model: CompactForestModel, max_depth: int) -> CompactForestModel:
+    """
+    Collapse every node at ``max_depth`` into a leaf predicting its mean.
+    """
+    depth = _node_depths(model)
+    at_cap = depth == max_depth
+
+    feature = np.where(at_cap, -1, model.feature)
+    left = np.where(at_cap, -1, model.left)
+    right = np.where(at_cap, -1, model.right)
+    keep = (depth >= 0) & (depth <= max_depth)
+
+    return _rebuild(
+        model, keep, np.asarray(model.roots),
+        feature, np.asarray(model.threshold), left, right, np.asarray(model.value),
+    )
+
+
+def to_float32(model: CompactForestModel) -> CompactForestModel:
+    """
+    Store thresholds and leaf values as float32.
+
+    Thresholds are rounded toward -inf: for a float32 input x, x <= t holds
+    exactly when x <= floor32(t), so routing is unchanged.
+    """
+    thr = np.asarray(model.threshold)
+    thr32 = thr.astype(np.float32)
+    too_high = thr32.astype(np.float64) > thr
+    thr32[too_high] = np.nextafter(thr32[too_high], np.float32(-np.inf))
+
+    return CompactForestModel(
+        feature=np.asarray(model.feature),
+        threshold=thr32,
+        left=np.asarray(model.left),
+        right=np.asarray(model.right),
+        value=np.asarray(model.value).astype(np.float32),
+        roots=np.asarray(model.roots),
+        max_depth=model.max_depth,
+        preprocess=model.preprocess,
+        feature_names=model.feature_names,
+        metadata=dict(model.metadata),
+    )
+
+
+# ---------------------------------------------------------------------
+# Evaluation
+# ---------------------------------------------------------------------
+
+def regression_metrics(y_true, y_pred) -> Dict[str, float]:
+    """
+    MAE, RMSE and R² (same definitions as the training report).
+    """
+    y_true = np.asarray(y_true, dtype=np.float64)
+    err = np.asarray(y_pred, dtype=np.float64) - y_true
+    ss_tot = float(((y_true - y_true.mean()) ** 2).sum())
+    return {
+        "mae": float(np.abs(err).mean()),
+        "rmse": float(np.sqrt((err ** 2).mean())),
+        "r2": 1.0 - float((err ** 2).sum()) / ss_tot if ss_tot > 0 else 0.0,
+    }
+
+
+def predict_latency(model, X: pd.DataFrame, repeats: int = 200) -> Dict[str, float]:
+    """
+    p50/p99 latency (ms) of single-row predicts, the API hot path.
+    """
+    model.predict(X.iloc[:1])  # warm-up
+    timings = []
+    for i in range(repeats):
+        row = X.iloc[[i % len(X)]]
+        t0 = time.perf_counter()
+        model.predict(row)
+        timings.append(time.perf_counter() - t0)
+    timings = np.asarray(timings) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(timings, 50)), 4),
+        "p99_ms": round(float(np.percentile(timings, 99)), 4),
+    }
+
+
+def rank_trees(model: CompactForestModel, X_val: pd.DataFrame, y_val) -> np.ndarray:
+    """
+    Order trees by their individual validation MAE (best first).
+    """
+    per_tree = model.predict_per_tree(X_val)
+    mae = np.abs(per_tree - np.asarray(y_val, dtype=np.float64)[:, None]).mean(axis=0)
+    return np.argsort(mae, kind="stable")
+
+
+def selection_split(
+    X_val: pd.DataFrame,
+    y_val,
+    selection_fraction: float = 0.5,
+    seed: int = 0,
+) -> Tuple[pd.DataFrame, pd.Series, pd.DataFrame, pd.Series]:
+    """
+    Split validation rows into (X_select, y_select, X_eval, y_eval).
+    """
+    if not 0 < selection_fraction < 1:
+        raise ValueError(f"selection_fraction must be in (0, 1), got {selection_fraction}")
+    y_val = pd.Series(np.asarray(y_val), index=X_val.index)
+    rows = np.random.default_rng(seed).permutation(len(X_val))
+    n_select = max(1, min(len(X_val) - 1, int(round(len(X_val) * selection_fraction))))
+    select, evaluate = np.sort(rows[:n_select]), np.sort(rows[n_select:])
+    return X_val.iloc[select], y_val.iloc[select], X_val.iloc[evaluate], y_val.iloc[evaluate]
+
+
+def _default_tree_counts(n_trees: int) -> List[int]:
+    counts = {n_trees}
+    k = n_trees
+    while k > 5:
+        k //= 2
+        counts.add(k)
+    return sorted(counts)
+
+
+def compression_curve(
+    model,
+    X_val: pd.DataFrame,
+    y_val,
+    tree_counts: Optional[Sequence[int]] = None,
+    depth_caps: Sequence[Optional[int]] = (None, 12, 8, 6),
+    float32: Sequence[bool] = (False, True),
+    latency_repeats: int = 200,
+    X_select: Optional[pd.DataFrame] = None,
+    y_select=None,
+    selection_fraction: float = 0.5,
+) -> Tuple[pd.DataFrame, List[CompactForestModel]]:
+    """
+    Evaluate every (tree count, depth cap, dtype) combination.
+
+    Trees are ranked on (X_select, y_select) and variants scored on
+    (X_val, y_val). Without a selection set, ``selection_fraction`` of the
+    validation rows is split off for ranking and the rest is scored.
+
+    Returns (curve, variants): one curve row per variant with accuracy and
+    latency columns, and the matching list of compressed models.
+    """
+    if X_select is None:
+        X_select, y_select, X_val, y_val = selection_split(X_val, y_val, selection_fraction)
+
+    base = model if isinstance(model, CompactForestModel) else CompactForestModel.from_estimator(model)
+    order = rank_trees(base, X_select, y_select)
+    tree_counts = sorted(set(tree_counts or _default_tree_counts(base.n_trees)))
+
+    rows, variants = [], []
+    for k, cap, f32 in itertools.product(tree_counts, depth_caps, float32):
+        if k > base.n_trees or (cap is not None and cap >= base.max_depth):
+            continue
+
+        variant = select_trees(base, order[:k]) if k < base.n_trees else base
+        if cap is not None:
+            variant = cap_depth(variant, cap)
+        if f32:
+            variant = to_float32(variant)
+
+        row = {
+            "n_trees": k,
+            "max_depth": variant.max_depth,
+            "float32": f32,
+            "n_nodes": len(variant.feature),
+            "size_mb": round(sum(
+                np.asarray(getattr(variant, f)).nbytes
+                for f in ("feature", "threshold", "left", "right", "value")
+            ) / 2**20, 3),
+        }
+        row.update(regression_metrics(y_val, variant.predict(X_val)))
+        row.update(predict_latency(variant, X_val, latency_repeats))
+
+        variant.metadata.update({"compression": {
+            "n_trees": k, "depth_cap": cap, "float32": f32,
+        }})
+        rows.append(row)
+        variants.append(variant)
+
+    return pd.DataFrame(rows), variants
+
+
+def choose_variant(curve: pd.DataFrame, max_r2_drop: float = 0.01) -> int:
+    """
+    Index of the lowest-p99 variant whose R² is within ``max_r2_drop`` of
+    the best variant on the curve.
+    """
+    eligible = curve[curve["r2"] >= curve["r2"].max() - max_r2_drop]
+    return int(eligible.sort_values(["p99_ms", "size_mb"]).index[0])
+
+
+def compress_model(
+    model,
+    X_val: pd.DataFrame,
+    y_val,
+    output_path: str,
+    max_r2_drop: float = 0.01,
+    **curve_kwargs,
+):
+    """
+    Build the curve, save the chosen variant and return (curve, chosen).
+    """
+    curve, variants = compression_curve(model, X_val, y_val, **curve_kwargs)
+    idx = choose_variant(curve, max_r2_drop)
+    chosen = variants[idx]
+
+    save_compact_model(chosen, output_path)
+    curve["chosen"] = curve.index == idx
+    return curve, chosen
+
+
+# ---------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compress the RandomForest for serving")
+    parser.add_argument("--model", default="models/best_regression_model.joblib")
+    parser.add_argument("--validation", required=True,
+                        help="CSV of the temporal validation split (models/split.py)")
+    parser.add_argument("--selection", default=None,
+                        help="CSV used only to rank trees (default: split off --validation)")
+    parser.add_argument("--selection-fraction", type=float, default=0.5,
+                        help="Share of --validation used to rank trees without --selection")
+    parser.add_argument("--output", default="models/best_regression_model.compressed.forest")
+    parser.add_argument("--report", default="reports/compression_curve.json")
+    parser.add_argument("--max-r2-drop", type=float, default=0.01)
+    parser.add_argument("--depth-caps", type=int, nargs="*", default=[12, 8, 6])
+    parser.add_argument("--tree-counts", type=int, nargs="*", default=None)
+    args = parser.parse_args(argv)
+
+    import joblib
+
+    print(f"Loading model from: {args.model}")
+    model = joblib.load(args.model)
+    val = pd.read_csv(args.validation)
+    print(f"✓ Loaded {len(val):,} validation rows")
+
+    if args.selection:
+        select = pd.read_csv(args.selection)
+        X_select, y_select = select, select[TARGET_COLUMN]
+        print(f"✓ Loaded {len(select):,} tree-selection rows")
+    else:
+        X_select, y_select, val, _ = selection_split(
+            val, val[TARGET_COLUMN], args.selection_fraction
+        )
+        print(f"✓ Ranking trees on {len(X_select):,} rows, scoring on {len(val):,}")
+
+    curve, chosen = compress_model(
+        model,
+        val,
+        val[TARGET_COLUMN],
+        args.output,
+        max_r2_drop=args.max_r2_drop,
+        tree_counts=args.tree_counts,
+        depth_caps=[None, *args.depth_caps],
+        X_select=X_select,
+        y_select=y_select,
+    )
+
+    print(curve.to_string(index=False))
+
+    os.makedirs(os.path.dirname(args.report) or ".", exist_ok=True)
+    with open(args.report, "w") as f:
+        json.dump(curve.to_dict(orient="records"), f, indent=2)
+
+    print(f"✓ Saved compressed model ({chosen.n_trees} trees, depth {chosen.max_depth}) to {args.output}")
+    print(f"✓ Wrote accuracy/latency curve to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
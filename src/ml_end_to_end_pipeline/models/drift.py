@@ -0,0 +1,392 @@
+"""
+drift.py
+
+Constant-memory, mergeable sketches of the model's inputs and outputs, and
+the training-time reference profile they are compared against.
+
+- ``QuantileSketch``: log-bucketed quantile sketch (DDSketch-style) with a
+  fixed bucket layout. Any value in [min_value, max_value] is stored with
+  ``relative_accuracy`` error, and negative values and zero are supported.
+  Updates are a vectorized bucket computation plus one ``np.bincount``.
+  Two sketches with the same layout merge by adding counts.
+- ``CountMinSketch``: approximate per-key counters (``chip_id``) in a fixed
+  ``depth × width`` table, hashed with ``pd.util.hash_array`` so hashes are
+  stable across processes and sketches from several workers can be summed.
+- ``ReferenceProfile``: the sketches of the training inputs and predictions
+  plus the one-hot vocabulary. It is saved as JSON next to the model
+  artifact (``<model>.profile.json``).
+
+Drift between a reference and a live sketch is scored with the population
+stability index over the reference deciles and a KS-style maximum CDF gap.
+Both are computed on bucket counts, so they never touch raw values.
+
+Build a profile after training:
+
+    python -m ml_end_to_end_pipeline.models.drift \
+        --model models/best_regression_model.joblib \
+        --features data/processed/train_features.csv
+"""
+
+import argparse
+import json
+import math
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+NUMERIC_FEATURES = ["building_count", "prev_building_count"]
+CATEGORICAL_FEATURES = ["chip_id"]
+PREDICTION = "prediction"
+PROFILE_VERSION = 1
+PSI_WARN = 0.1
+PSI_DRIFT = 0.25
+
+
+def profile_path(model_path: str) -> str:
+    """
+    Reference profile path that travels with a model artifact.
+    """
+    return os.path.splitext(model_path)[0] + ".profile.json"
+
+
+# ---------------------------------------------------------------------
+# Sketches
+# ---------------------------------------------------------------------
+
+class QuantileSketch:
+    """
+    Fixed-layout log-bucketed quantile sketch.
+
+    Buckets are ordered by value: negative buckets (largest magnitude
+    first), one zero bucket for |x| < min_value, then positive buckets.
+    Magnitudes beyond max_value land in the outermost bucket.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, min_value: float = 1e-3, max_value: float = 1e7):
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.max_value = max_value
+
+        gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(gamma)
+        self._k_min = math.ceil(math.log(min_value) / self._log_gamma)
+        self._m = math.ceil(math.log(max_value) / self._log_gamma) - self._k_min + 1
+
+        # Representative value of each bucket (relative error <= accuracy)
+        mag = 2 * gamma ** (np.arange(self._m) + self._k_min) / (gamma + 1)
+        self.values = np.concatenate([-mag[::-1], [0.0], mag])
+        self.counts = np.zeros(2 * self._m + 1, dtype=np.int64)
+        self.missing = 0
+
+    @property
+    def layout(self) -> tuple:
+        return (self.relative_accuracy, self.min_value, self.max_value)
+
+    @property
+    def count(self) -> int:
+        return int(self.counts.sum())
+
+    def buckets(self, values) -> np.ndarray:
+        """
+        Bucket index of every (finite) value.
+        """
+        x = np.asarray(values, dtype=np.float64)
+        mag = np.abs(x)
+        small = mag < self.min_value
+        with np.errstate(divide="ignore"):
+            k = np.ceil(np.log(np.where(small, self.min_value, mag)) / self._log_gamma)
+        k = np.clip(k.astype(np.int64) - self._k_min, 0, self._m - 1)
+        idx = np.where(x > 0, self._m + 1 + k, self._m - 1 - k)
+        return np.where(small, self._m, idx)
+
+    def update(self, values) -> None:
+        x = np.asarray(values, dtype=np.float64).ravel()
+        finite = np.isfinite(x)
+        if not finite.all():
+            self.missing += int((~finite).sum())
+            x = x[finite]
+        if len(x):
+            self.counts += np.bincount(self.buckets(x), minlength=len(self.counts))
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        if other.layout != self.layout:
+            raise ValueError("Cannot merge quantile sketches with different layouts")
+        self.counts += other.counts
+        self.missing += other.missing
+        return self
+
+    def quantiles(self, qs) -> List[Optional[float]]:
+        n = self.count
+        if not n:
+            return [None for _ in qs]
+        cum = np.cumsum(self.counts)
+        ranks = np.asarray(qs, dtype=np.float64) * (n - 1)
+        idx = np.searchsorted(cum, ranks, side="right")
+        return self.values[idx].tolist()
+
+    def cdf(self) -> np.ndarray:
+        """
+        Fraction of values in each bucket or below.
+        """
+        n = self.count
+        return np.cumsum(self.counts) / n if n else np.zeros(len(self.counts))
+
+    def to_dict(self) -> Dict:
+        nonzero = np.flatnonzero(self.counts)
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "min_value": self.min_value,
+            "max_value": self.max_value,
+            "buckets": nonzero.tolist(),
+            "counts": self.counts[nonzero].tolist(),
+            "missing": self.missing,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "QuantileSketch":
+        sketch = cls(data["relative_accuracy"], data["min_value"], data["max_value"])
+        sketch.counts[np.asarray(data["buckets"], dtype=np.int64)] = data["counts"]
+        sketch.missing = int(data.get("missing", 0))
+        return sketch
+
+
+def hash_keys(keys) -> np.ndarray:
+    """
+    Process-independent uint64 hash of string keys.
+    """
+    keys = np.asarray(keys, dtype=object)
+    # Factorizing first only pays off once keys repeat within the batch
+    return pd.util.hash_array(keys, categorize=len(keys) > 256)
+
+
+class CountMinSketch:
+    """
+    Approximate counts per key in a fixed depth × width table.
+
+    Estimates never undercount; the overcount is at most
+    ``e / width × total`` with probability ``1 - exp(-depth)``.
+    """
+
+    def __init__(self, width: int = 2048, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self.total = 0
+
+    def _cells(self, hashes: np.ndarray) -> np.ndarray:
+        # Double hashing: row i uses h1 + i * h2
+        h1 = (hashes & 0xFFFFFFFF).astype(np.int64)
+        h2 = (hashes >> np.uint64(32)).astype(np.int64) | 1
+        rows = np.arange(self.depth, dtype=np.int64)[:, None]
+        return rows * self.width + (h1 + rows * h2) % self.width
+
+    def update_hashes(self, hashes: np.ndarray) -> None:
+        if len(hashes):
+            self.table += np.bincount(
+                self._cells(hashes).ravel(), minlength=self.table.size
+            ).reshape(self.table.shape)
+            self.total += len(hashes)
+
+    def update(self, keys) -> None:
+        self.update_hashes(hash_keys(keys))
+
+    def estimate(self, key: str) -> int:
+        cells = self._cells(hash_keys([key]))[:, 0]
+        return int(self.table.ravel()[cells].min())
+
+    def merge(self, other: "CountMinSketch") -> "CountMinSketch":
+        if (other.width, other.depth) != (self.width, self.depth):
+            raise ValueError("Cannot merge count-min sketches of different shapes")
+        self.table += other.table
+        self.total += other.total
+        return self
+
+
+# ---------------------------------------------------------------------
+# Drift scores
+# ---------------------------------------------------------------------
+
+def population_stability_index(reference: QuantileSketch, live: QuantileSketch, bins: int = 10) -> Optional[float]:
+    """
+    PSI of ``live`` against ``reference``, binned at the reference quantiles.
+    """
+    if not reference.count or not live.count:
+        return None
+    # Bucket boundaries closest to the reference quantiles
+    edges = np.searchsorted(reference.cdf(), np.arange(1, bins) / bins, side="left")
+    edges = np.unique(np.r_[0, edges + 1])
+    edges = edges[edges < len(reference.counts)]
+
+    ref = np.add.reduceat(reference.counts, edges) / reference.count
+    cur = np.add.reduceat(live.counts, edges) / live.count
+    eps = 1e-4
+    ref, cur = np.maximum(ref, eps), np.maximum(cur, eps)
+    return float(np.sum((cur - ref) * np.log(cur / ref)))
+
+
+def max_cdf_gap(reference: QuantileSketch, live: QuantileSketch) -> Optional[float]:
+    """
+    Kolmogorov-Smirnov statistic evaluated at the bucket boundaries.
+    """
+    if not reference.count or not live.count:
+        return None
+    return float(np.abs(reference.cdf() - live.cdf()).max())
+
+
+def drift_status(psi: Optional[float]) -> str:
+    if psi is None:
+        return "insufficient_data"
+    if psi >= PSI_DRIFT:
+        return "drift"
+    if psi >= PSI_WARN:
+        return "warn"
+    return "ok"
+
+
+# ---------------------------------------------------------------------
+# Reference profile
+# ---------------------------------------------------------------------
+
+@dataclass
+class ReferenceProfile:
+    sketches: Dict[str, QuantileSketch]          # numeric features + prediction
+    categories: Dict[str, List[str]]             # one-hot vocabulary
+    n_rows: int = 0
+    metadata: Dict = field(default_factory=dict)
+    _known: Dict[str, np.ndarray] = field(default_factory=dict, repr=False)
+
+    def __post_init__(self):
+        # Sorted hashes for vectorized membership tests
+        self._known = {c: np.sort(hash_keys(v)) for c, v in self.categories.items()}
+
+    def unseen(self, column: str, hashes: np.ndarray) -> np.ndarray:
+        """
+        Mask of hashed values outside the training vocabulary of ``column``.
+        """
+        known = self._known.get(column)
+        if known is None or not len(known):
+            return np.zeros(len(hashes), dtype=bool)
+        pos = np.searchsorted(known, hashes).clip(max=len(known) - 1)
+        return known[pos] != hashes
+
+    def to_dict(self) -> Dict:
+        return {
+            "profile_version": PROFILE_VERSION,
+            "n_rows": self.n_rows,
+            "metadata": self.metadata,
+            "sketches": {name: s.to_dict() for name, s in self.sketches.items()},
+            "categories": self.categories,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ReferenceProfile":
+        if data.get("profile_version") != PROFILE_VERSION:
+            raise ValueError(f"Unsupported profile version: {data.get('profile_version')}")
+        return cls(
+            sketches={n: QuantileSketch.from_dict(s) for n, s in data["sketches"].items()},
+            categories=data["categories"],
+            n_rows=data["n_rows"],
+            metadata=data.get("metadata", {}),
+        )
+
+
+def onehot_categories(model) -> Dict[str, List[str]]:
+    """
+    One-hot vocabulary of a compact model or a fitted sklearn pipeline.
+    """
+    from ml_end_to_end_pipeline.models.compact import CompactForestModel
+
+    compact = model if isinstance(model, CompactForestModel) else CompactForestModel.from_estimator(model)
+    categories = {}
+    for block in compact.preprocess or []:
+        if block["kind"] == "onehot":
+            for column, cats in zip(block["columns"], block["categories"]):
+                categories[column] = [str(c) for c in cats]
+    return categories
+
+
+def build_reference_profile(
+    X: pd.DataFrame,
+    predictions,
+    categories: Optional[Dict[str, List[str]]] = None,
+    metadata: Optional[Dict] = None,
+) -> ReferenceProfile:
+    """
+    Sketch the training inputs and the model's predictions on them.
+
+    Without ``categories``, the vocabulary is the set of values seen in ``X``.
+    """
+    sketches = {}
+    for column in NUMERIC_FEATURES:
+        sketches[column] = QuantileSketch()
+        sketches[column].update(X[column].to_numpy(dtype=np.float64))
+    sketches[PREDICTION] = QuantileSketch()
+    sketches[PREDICTION].update(predictions)
+
+    if categories is None:
+        categories = {c: sorted(X[c].astype(str).unique().tolist()) for c in CATEGORICAL_FEATURES}
+
+    return ReferenceProfile(
+        sketches=sketches,
+        categories=categories,
+        n_rows=len(X),
+        metadata=dict(metadata or {}, created_at=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())),
+    )
+
+
+def save_reference_profile(profile: ReferenceProfile, path: str) -> str:
+    """
+    Write the profile atomically next to the model artifact.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(profile.to_dict(), f)
+    os.replace(tmp, path)
+    return path
+
+
+def load_reference_profile(path: str) -> ReferenceProfile:
+    with open(path) as f:
+        return ReferenceProfile.from_dict(json.load(f))
+
+
+def write_model_profile(model, X: pd.DataFrame, model_path: str, metadata: Optional[Dict] = None) -> str:
+    """
+    Profile ``X`` and the model's predictions on it, saved beside ``model_path``.
+    """
+    try:
+        categories = onehot_categories(model)
+    except (ValueError, AttributeError, KeyError):
+        categories = None
+    profile = build_reference_profile(X, model.predict(X), categories=categories, metadata=metadata)
+    return save_reference_profile(profile, profile_path(model_path))
+
+
+# ---------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the training-time drift reference profile")
+    parser.add_argument("--model", default="models/best_regression_model.joblib")
+    parser.add_argument("--features", required=True, help="CSV of the training feature table")
+    args = parser.parse_args(argv)
+
+    from ml_end_to_end_pipeline.models.compact import load_model_artifact
+    from ml_end_to_end_pipeline.version import __version__
+
+    model = load_model_artifact(args.model)
+    df = pd.read_csv(args.features, dtype={"chip_id": str})
+    print(f"✓ Loaded {len(df):,} training rows")
+
+    path = write_model_profile(model, df, args.model, metadata={"model_version": __version__})
+    print(f"✓ Wrote reference profile to {path}")
+
+
+if __name__ == "__main__":
+    main()
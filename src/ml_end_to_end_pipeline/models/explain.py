@@ -0,0 +1,192 @@
+"""
+explain.py
+
+Exact per-prediction feature contributions for the RandomForest.
+
+Uses the Saabas path decomposition: walking a row down a tree, each split
+moves the prediction from the parent's value to the child's value, and that
+difference is credited to the split feature. Summed over the path and
+averaged over trees,
+
+    prediction = bias + sum(contributions)
+
+holds exactly, where bias is the mean root value (the training mean).
+
+Everything that does not depend on the input is precomputed once at model
+load from the flat node arrays of ``CompactForestModel``:
+- ``delta[node]``: (value[node] - value[parent]) / n_trees
+- ``group[node]``: input column of the parent's split feature; the one-hot
+  columns of ``chip_id`` all map back to ``chip_id``
+
+A batch is then one level-by-level walk of every tree for every row (the same
+gather loop as ``CompactForestModel._traverse``, restricted to the
+(row, tree) cells still on an internal node), with one ``np.bincount`` per
+level to accumulate contributions into a rows × inputs matrix. Repeated
+inputs are answered from an LRU cache.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ml_end_to_end_pipeline.models.compact import _TRAVERSAL_CELLS, CompactForestModel
+
+DEFAULT_CACHE_SIZE = 4096
+
+
+class ForestExplainer:
+    """
+    Batched Saabas contributions over a compact forest.
+    """
+
+    def __init__(self, compact: CompactForestModel, cache_size: int = DEFAULT_CACHE_SIZE):
+        self.compact = compact
+        self.input_columns = compact.input_columns
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[tuple, Tuple[float, np.ndarray]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        feature = np.asarray(compact.feature)
+        value = np.asarray(compact.value, dtype=np.float64)
+        internal = np.flatnonzero(feature >= 0)
+
+        parent = np.full(len(feature), -1, dtype=np.int64)
+        parent[compact.left[internal]] = internal
+        parent[compact.right[internal]] = internal
+        child = parent >= 0
+
+        self.delta = np.zeros(len(feature))
+        self.delta[child] = (value[child] - value[parent[child]]) / compact.n_trees
+
+        groups = self._feature_groups()
+        self.group = np.zeros(len(feature), dtype=np.int64)
+        self.group[child] = groups[feature[parent[child]]]
+
+        self.bias = float(value[np.asarray(compact.roots)].mean())
+
+    @classmethod
+    def from_model(cls, model, cache_size: int = DEFAULT_CACHE_SIZE) -> "ForestExplainer":
+        """
+        Build from a CompactForestModel or a fitted pipeline / forest.
+        """
+        if not isinstance(model, CompactForestModel):
+            model = CompactForestModel.from_estimator(model)
+        return cls(model, cache_size=cache_size)
+
+    def _feature_groups(self) -> np.ndarray:
+        """
+        Input column index of every transformed feature.
+        """
+        position = {c: i for i, c in enumerate(self.input_columns)}
+        if self.compact.preprocess is None:
+            return np.arange(len(self.input_columns))
+
+        groups: List[int] = []
+        for block in self.compact.preprocess:
+            if block["kind"] == "onehot":
+                for col, cats in zip(block["columns"], block["categories"]):
+                    groups.extend([position[col]] * len(cats))
+            else:
+                groups.extend(position[c] for c in block["columns"])
+        return np.asarray(groups, dtype=np.int64)
+
+    # -----------------------------
+    # Decomposition
+    # -----------------------------
+
+    def _contributions(self, Xt: np.ndarray) -> np.ndarray:
+        """
+        Rows × inputs contribution matrix for transformed rows.
+        """
+        c = self.compact
+        n, n_inputs = Xt.shape[0], len(self.input_columns)
+        # Flat (row, tree) cells; cells that reach a leaf drop out of the walk
+        node = np.tile(np.asarray(c.roots, dtype=np.int64), n)
+        row = np.repeat(np.arange(n), c.n_trees)
+        out = np.zeros(n * n_inputs)
+
+        for _ in range(c.max_depth):
+            feat = c.feature[node]
+            active = feat >= 0
+            if not active.all():
+                node, row, feat = node[active], row[active], feat[active]
+            if not len(node):
+                break
+            go_left = Xt[row, feat] <= c.threshold[node]
+            node = np.where(go_left, c.left[node], c.right[node]).astype(np.int64)
+            out += np.bincount(
+                row * n_inputs + self.group[node],
+                weights=self.delta[node],
+                minlength=n * n_inputs,
+            )
+
+        return out.reshape(n, n_inputs)
+
+    def explain_array(self, X: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (predictions, rows × inputs contributions) without the cache.
+        """
+        # Same float32 comparison as CompactForestModel.predict
+        Xt = self.compact.transform(X).astype(np.float32)
+        chunk = max(1, _TRAVERSAL_CELLS // max(self.compact.n_trees, 1))
+        parts = [self._contributions(Xt[s:s + chunk]) for s in range(0, Xt.shape[0], chunk)]
+        contrib = np.concatenate(parts) if parts else np.zeros((0, len(self.input_columns)))
+        return self.bias + contrib.sum(axis=1), contrib
+
+    def explain(self, X: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Like ``explain_array``, answering repeated rows from the LRU cache and
+        computing all misses in a single batch.
+        """
+        keys = list(zip(*(X[col].tolist() for col in self.input_columns)))
+        preds = np.empty(len(keys))
+        contrib = np.empty((len(keys), len(self.input_columns)))
+
+        misses: Dict[tuple, List[int]] = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                hit = self._cache.get(key)
+                if hit is None:
+                    misses.setdefault(key, []).append(i)
+                    continue
+                self._cache.move_to_end(key)
+                preds[i], contrib[i] = hit
+
+        if misses:
+            first = [rows[0] for rows in misses.values()]
+            p, c = self.explain_array(X.iloc[first])
+            with self._lock:
+                for j, (key, rows) in enumerate(misses.items()):
+                    preds[rows], contrib[rows] = p[j], c[j]
+                    self._cache[key] = (float(p[j]), c[j].copy())
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        return preds, contrib
+
+    def explain_records(self, X: pd.DataFrame) -> List[Dict]:
+        """
+        One {prediction, bias, contributions} dict per row.
+        """
+        preds, contrib = self.explain(X)
+        return [
+            {
+                "prediction": float(p),
+                "bias": self.bias,
+                "contributions": dict(zip(self.input_columns, row)),
+            }
+            for p, row in zip(preds.tolist(), contrib.tolist())
+        ]
+
+
+def load_explainer(model, cache_size: int = DEFAULT_CACHE_SIZE) -> Optional[ForestExplainer]:
+    """
+    Explainer for a loaded serving model, or None if it is not a supported forest.
+    """
+    try:
+        return ForestExplainer.from_model(model, cache_size=cache_size)
+    except (ValueError, AttributeError, KeyError):
+        return None
@@ -0,0 +1,286 @@
+"""
+incremental.py
+
+Monthly incremental retraining of the RandomForest pipeline.
+
+Instead of refitting on all history every time a month of imagery lands,
+the current artifact is loaded and ``n_new_trees`` trees fitted on the most
+recent ``window_months`` months are appended with ``warm_start``. With
+``max_trees`` the oldest trees are dropped afterwards, giving a
+sliding-window forest whose trees all come from recent data.
+
+The preprocessing step (scaler statistics and one-hot vocabulary) is frozen.
+Existing trees split on fixed column positions, so refitting it would change
+what every old split means. chip_ids first seen after the last full retrain
+encode as all zeros (``handle_unknown="ignore"``) for old and new trees
+alike; their share of the training window is reported and, above
+``max_unseen_fraction``, the full retrain is promoted instead so the
+vocabulary catches up.
+
+Before anything is saved, the incremental candidate is compared with a full
+retrain on the holdout months (MAE / RMSE / R² and wall time). The
+incremental model is promoted when its MAE is within ``max_mae_increase``
+(relative) of the full retrain's. The winning strategy is then refitted
+with the holdout months added back (window + holdout for incremental, all
+months for full), so the saved model has seen the newest month. The drift
+reference profile (``models.drift``) is rewritten beside it from the same
+rows.
+
+Usage:
+    python -m ml_end_to_end_pipeline.models.incremental \
+        --model models/best_regression_model.joblib \
+        --features data/processed/features.csv \
+        --window-months 3 --holdout-months 1 \
+        --n-new-trees 50 --max-trees 300
+"""
+
+import argparse
+import copy
+import json
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ml_end_to_end_pipeline.models.compress import TARGET_COLUMN, regression_metrics
+from ml_end_to_end_pipeline.models.drift import write_model_profile
+
+TIME_COLUMN = "time_id"
+
+
+# ---------------------------------------------------------------------
+# Data windows
+# ---------------------------------------------------------------------
+
+def time_windows(
+    df: pd.DataFrame,
+    window_months: int,
+    holdout_months: int = 1,
+) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Split into (history, recent window, holdout) by time_id.
+
+    The holdout is the last ``holdout_months`` months, the window the
+    ``window_months`` before it, and history everything before the holdout.
+    """
+    months = np.sort(df[TIME_COLUMN].astype(str).unique())
+    if len(months) <= holdout_months:
+        raise ValueError(f"Need more than {holdout_months} months, got {len(months)}")
+
+    time_ids = df[TIME_COLUMN].astype(str).to_numpy()
+    holdout_start = months[-holdout_months]
+    window_start = months[max(len(months) - holdout_months - window_months, 0)]
+
+    in_history = time_ids < holdout_start
+    return (
+        df[in_history],
+        df[in_history & (time_ids >= window_start)],
+        df[~in_history],
+    )
+
+
+def unseen_fraction(pipeline, df: pd.DataFrame) -> float:
+    """
+    Share of rows with a category the fitted one-hot vocabulary lacks.
+    """
+    from sklearn.preprocessing import OneHotEncoder
+
+    unseen = np.zeros(len(df), dtype=bool)
+    for _, transformer, columns in pipeline[-2].transformers_:
+        if not isinstance(transformer, OneHotEncoder):
+            continue
+        for column, categories in zip(columns, transformer.categories_):
+            unseen |= ~df[column].isin(categories).to_numpy()
+    return float(unseen.mean()) if len(df) else 0.0
+
+
+# ---------------------------------------------------------------------
+# Warm-start update
+# ---------------------------------------------------------------------
+
+def warm_start_update(
+    pipeline,
+    X: pd.DataFrame,
+    y,
+    n_new_trees: int,
+    max_trees: Optional[int] = None,
+):
+    """
+    Return a copy of ``pipeline`` with ``n_new_trees`` trees fitted on X
+    appended; with ``max_trees``, the oldest trees beyond it are dropped.
+
+    The input pipeline is not modified.
+    """
+    updated = copy.deepcopy(pipeline)
+    forest = updated[-1]
+    Xt = updated[:-1].transform(X)
+
+    n_before = len(forest.estimators_)
+    forest.set_params(warm_start=True, n_estimators=n_before + n_new_trees)
+    forest.fit(Xt, np.asarray(y, dtype=np.float64))
+
+    # estimators_ is in insertion order, so the oldest trees come first
+    if max_trees is not None and len(forest.estimators_) > max_trees:
+        forest.estimators_ = forest.estimators_[-max_trees:]
+    forest.set_params(warm_start=False, n_estimators=len(forest.estimators_))
+    return updated
+
+
+def full_retrain(pipeline, X: pd.DataFrame, y):
+    """
+    Refit an unfitted clone of ``pipeline`` (same hyperparameters) on X.
+    """
+    from sklearn.base import clone
+
+    return clone(pipeline).fit(X, y)
+
+
+# ---------------------------------------------------------------------
+# Compare and promote
+# ---------------------------------------------------------------------
+
+def _timed(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, round(time.perf_counter() - t0, 3)
+
+
+def incremental_retrain(
+    pipeline,
+    df: pd.DataFrame,
+    window_months: int = 3,
+    holdout_months: int = 1,
+    n_new_trees: int = 50,
+    max_trees: Optional[int] = None,
+    max_mae_increase: float = 0.02,
+    max_unseen_fraction: float = 0.05,
+    target_column: str = TARGET_COLUMN,
+) -> Tuple[Dict, object]:
+    """
+    Build the incremental and full-retrain candidates, evaluate both on the
+    holdout months and return (report, promoted pipeline).
+
+    The promoted pipeline is the winning strategy refitted with the holdout
+    months included; ``report["training_months"]`` lists what it saw.
+    """
+    history, window, holdout = time_windows(df, window_months, holdout_months)
+    y_holdout = holdout[target_column]
+
+    incremental, inc_seconds = _timed(
+        warm_start_update, pipeline, window, window[target_column], n_new_trees, max_trees
+    )
+    full, full_seconds = _timed(full_retrain, pipeline, history, history[target_column])
+
+    report = {
+        "window_months": sorted(window[TIME_COLUMN].astype(str).unique().tolist()),
+        "holdout_months": sorted(holdout[TIME_COLUMN].astype(str).unique().tolist()),
+        "unseen_fraction": round(unseen_fraction(pipeline, window), 4),
+        "incremental": {
+            "n_trees": len(incremental[-1].estimators_),
+            "fit_seconds": inc_seconds,
+            **regression_metrics(y_holdout, incremental.predict(holdout)),
+        },
+        "full": {
+            "n_trees": len(full[-1].estimators_),
+            "fit_seconds": full_seconds,
+            **regression_metrics(y_holdout, full.predict(holdout)),
+        },
+    }
+
+    mae_limit = report["full"]["mae"] * (1 + max_mae_increase)
+    if report["unseen_fraction"] > max_unseen_fraction:
+        promoted, reason = "full", "unseen chip_ids above threshold"
+    elif report["incremental"]["mae"] > mae_limit:
+        promoted, reason = "full", "incremental MAE outside tolerance"
+    else:
+        promoted, reason = "incremental", "incremental MAE within tolerance"
+
+    # The holdout only decided the strategy; refit so the newest month is in
+    if promoted == "incremental":
+        train = pd.concat([window, holdout])
+        model = warm_start_update(pipeline, train, train[target_column], n_new_trees, max_trees)
+    else:
+        train = df
+        model = full_retrain(pipeline, train, train[target_column])
+
+    report["promoted"] = promoted
+    report["reason"] = reason
+    report["training_months"] = sorted(train[TIME_COLUMN].astype(str).unique().tolist())
+    return report, model
+
+
+def save_pipeline(pipeline, path: str) -> None:
+    """
+    Write the artifact atomically so the API never loads a partial file.
+    """
+    import joblib
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    joblib.dump(pipeline, tmp)
+    os.replace(tmp, path)
+
+
+# ---------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Incrementally retrain the RandomForest")
+    parser.add_argument("--model", default="models/best_regression_model.joblib")
+    parser.add_argument("--features", required=True,
+                        help="CSV of the full chip-month feature table")
+    parser.add_argument("--output", default=None,
+                        help="Where to write the promoted model (default: --model)")
+    parser.add_argument("--report", default="reports/incremental_retrain.json")
+    parser.add_argument("--window-months", type=int, default=3)
+    parser.add_argument("--holdout-months", type=int, default=1)
+    parser.add_argument("--n-new-trees", type=int, default=50)
+    parser.add_argument("--max-trees", type=int, default=None)
+    parser.add_argument("--max-mae-increase", type=float, default=0.02)
+    parser.add_argument("--max-unseen-fraction", type=float, default=0.05)
+    args = parser.parse_args(argv)
+
+    import joblib
+
+    print(f"Loading model from: {args.model}")
+    pipeline = joblib.load(args.model)
+    df = pd.read_csv(args.features, dtype={"chip_id": str, TIME_COLUMN: str})
+    print(f"✓ Loaded {len(df):,} feature rows")
+
+    report, promoted = incremental_retrain(
+        pipeline,
+        df,
+        window_months=args.window_months,
+        holdout_months=args.holdout_months,
+        n_new_trees=args.n_new_trees,
+        max_trees=args.max_trees,
+        max_mae_increase=args.max_mae_increase,
+        max_unseen_fraction=args.max_unseen_fraction,
+    )
+
+    for name in ("incremental", "full"):
+        r = report[name]
+        print(f"  {name:<12} trees={r['n_trees']:<5} fit={r['fit_seconds']:.2f}s "
+              f"MAE={r['mae']:.4f} RMSE={r['rmse']:.4f} R²={r['r2']:.4f}")
+
+    output = args.output or args.model
+    save_pipeline(promoted, output)
+    trained_on = df[df[TIME_COLUMN].astype(str).isin(report["training_months"])]
+    profile = write_model_profile(
+        promoted, trained_on, output, metadata={"promoted": report["promoted"]}
+    )
+
+    os.makedirs(os.path.dirname(args.report) or ".", exist_ok=True)
+    with open(args.report, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"✓ Promoted {report['promoted']} model ({report['reason']}) to {output}")
+    print(f"✓ Wrote comparison report to {args.report}")
+    print(f"✓ Wrote drift reference profile to {profile}")
+
+
+if __name__ == "__main__":
+    main()
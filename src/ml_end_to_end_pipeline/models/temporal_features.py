@@ -0,0 +1,311 @@
+"""
+temporal_features.py
+
+Vectorized lag / rolling temporal features over the chip-month feature table.
+
+The table is sorted once by (chip_id, month). Every row then gets an
+integer key ``chip_code * KEY_STRIDE + month_index``, so each chip occupies
+one contiguous, strictly increasing block of keys. All features become
+``np.searchsorted`` lookups over that key plus whole-column NumPy passes:
+
+- ``lag_k``: value at calendar month ``t - k`` of the same chip. A month the
+  chip was not observed in is NaN (``missing="nan"``) or the last observed
+  value at or before ``t - k`` (``missing="ffill"``). Lags never cross into
+  another chip's block.
+- ``rolling_mean_w`` / ``rolling_std_w``: mean / sample std over the
+  observed months in ``[t - w + 1, t]``, accumulated over the at most ``w``
+  rows of each window. Windows with fewer than ``min_periods`` observations
+  are NaN.
+- ``growth_k``: ``(value - lag_k) / max(lag_k, 1)``, so growth from an
+  empty chip is its absolute count.
+- ``months_since_first_building``: calendar months since the chip's first
+  month with ``building_count > 0``; NaN before that month.
+
+No per-chip Python loop or ``groupby().shift()`` is involved. Training and
+online inference share ``build_temporal_features``; for a request, pass the
+chip's stored history plus the new rows and use ``features_for_rows`` to
+pull out the rows being scored.
+
+Usage:
+    python -m ml_end_to_end_pipeline.models.temporal_features \
+        --features data/processed/features.csv \
+        --output data/processed/temporal_features.parquet \
+        --lags 1 2 3 --windows 3 6
+"""
+
+import argparse
+import time
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+CHIP_COLUMN = "chip_id"
+TIME_COLUMN = "time_id"
+VALUE_COLUMN = "building_count"
+
+# Month indices stay far below this, so keys of different chips never overlap
+KEY_STRIDE = 1 << 20
+
+DEFAULT_LAGS = (1, 2, 3)
+DEFAULT_WINDOWS = (3, 6)
+
+
+# ---------------------------------------------------------------------
+# Chip-month keys
+# ---------------------------------------------------------------------
+
+def month_index(time_ids) -> np.ndarray:
+    """
+    Convert ``YYYY_MM`` time_ids to consecutive integer months (year * 12 + month - 1).
+    """
+    # Parse each distinct time_id once; a table has a few dozen months at most
+    codes, uniques = pd.factorize(np.asarray(time_ids))
+    parts = pd.Series(uniques).astype(str).str.split("_", n=1, expand=True)
+    years = parts[0].astype(np.int64).to_numpy()
+    months = parts[1].astype(np.int64).to_numpy()
+    return (years * 12 + months - 1)[codes]
+
+
+def sort_chip_months(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Sort once by (chip_id, month).
+
+    Returns (order, keys, months): ``order`` maps sorted position to input
+    row, ``keys`` is the strictly increasing chip-month key in sorted order
+    and ``months`` the month index in sorted order.
+    """
+    chip_codes, _ = pd.factorize(df[CHIP_COLUMN], sort=True)
+    months = month_index(df[TIME_COLUMN].to_numpy())
+    if len(months) and months.min() < 0:
+        raise ValueError("time_id before year 0")
+    months_rel = months - (months.min() if len(months) else 0)
+    if len(months) and months_rel.max() >= KEY_STRIDE:
+        raise ValueError("time_id range too wide for KEY_STRIDE")
+
+    keys = chip_codes.astype(np.int64) * KEY_STRIDE + months_rel
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    if len(keys) > 1 and (np.diff(keys) == 0).any():
+        raise ValueError("Duplicate (chip_id, time_id) rows")
+    return order, keys, months[order]
+
+
+def _block_starts(keys: np.ndarray) -> np.ndarray:
+    """
+    Sorted position of each row's chip block start.
+    """
+    chip = keys // KEY_STRIDE
+    is_start = np.ones(len(keys), dtype=bool)
+    is_start[1:] = chip[1:] != chip[:-1]
+    starts = np.flatnonzero(is_start)
+    return np.repeat(starts, np.diff(np.append(starts, len(keys))))
+
+
+# ---------------------------------------------------------------------
+# Segment operations
+# ---------------------------------------------------------------------
+
+def lag_values(
+    keys: np.ndarray,
+    values: np.ndarray,
+    lag: int,
+    missing: str = "nan",
+    block_start: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Value at calendar month ``t - lag`` of the same chip, in sorted order.
+    """
+    target = keys - lag
+    if missing == "nan":
+        pos = np.searchsorted(keys, target, side="left")
+        pos_c = np.minimum(pos, len(keys) - 1)
+        found = (pos < len(keys)) & (keys[pos_c] == target)
+    elif missing == "ffill":
+        if block_start is None:
+            block_start = _block_starts(keys)
+        pos_c = np.searchsorted(keys, target, side="right") - 1
+        found = pos_c >= block_start
+        pos_c = np.maximum(pos_c, 0)
+    else:
+        raise ValueError(f"Unknown missing policy: {missing!r}")
+
+    out = np.full(len(keys), np.nan)
+    out[found] = values[pos_c[found]]
+    return out
+
+
+def rolling_stats(
+    keys: np.ndarray,
+    values: np.ndarray,
+    window: int,
+    min_periods: int = 1,
+    block_start: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Rolling mean and sample std over observed months in ``[t - window + 1, t]``.
+
+    A window holds at most ``window`` rows (one per chip month), so both
+    statistics are summed over row offsets 0..window-1 with a two-pass
+    variance. Differences of table-wide cumulative sums lose precision as
+    the table grows and give constant windows a non-zero std.
+    """
+    end = np.arange(1, len(keys) + 1)
+    start = np.searchsorted(keys, keys - window + 1, side="left")
+    if block_start is not None:
+        start = np.maximum(start, block_start)
+    count = end - start
+    n = count.astype(np.float64)
+    span = int(count.max()) if len(count) else 0
+
+    # Row end-1-k is in the window for k < count; other offsets add 0
+    total = np.zeros(len(keys))
+    for k in range(span):
+        total += np.where(k < count, values[end - 1 - k], 0.0)
+    mean = total / n
+
+    total2 = np.zeros(len(keys))
+    for k in range(span):
+        dev = values[end - 1 - k] - mean
+        total2 += np.where(k < count, dev * dev, 0.0)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        std = np.where(n > 1, np.sqrt(total2 / (n - 1)), np.nan)
+
+    short = n < min_periods
+    mean[short] = np.nan
+    std[short] = np.nan
+    return mean, std
+
+
+def months_since_first_positive(
+    keys: np.ndarray,
+    months: np.ndarray,
+    values: np.ndarray,
+    block_start: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Months since each chip's first month with a positive value (NaN before it).
+    """
+    if not len(keys):
+        return np.empty(0)
+    if block_start is None:
+        block_start = _block_starts(keys)
+
+    starts = np.unique(block_start)
+    candidate = np.where(values > 0, months, np.iinfo(np.int64).max)
+    first = np.minimum.reduceat(candidate, starts)
+    first = np.repeat(first, np.diff(np.append(starts, len(keys))))
+
+    out = (months - first).astype(np.float64)
+    out[out < 0] = np.nan
+    return out
+
+
+# ---------------------------------------------------------------------
+# Feature engine
+# ---------------------------------------------------------------------
+
+def build_temporal_features(
+    df: pd.DataFrame,
+    lags: Sequence[int] = DEFAULT_LAGS,
+    windows: Sequence[int] = DEFAULT_WINDOWS,
+    min_periods: int = 1,
+    missing: str = "nan",
+    value_column: str = VALUE_COLUMN,
+) -> pd.DataFrame:
+    """
+    Add lag, rolling, growth and months-since-first-building columns.
+
+    The result has the same index and row order as ``df``; input columns are
+    kept and new columns appended.
+    """
+    order, keys, months = sort_chip_months(df)
+    values = df[value_column].to_numpy(dtype=np.float64)[order]
+    block_start = _block_starts(keys)
+
+    features: Dict[str, np.ndarray] = {}
+    for lag in lags:
+        lagged = lag_values(keys, values, lag, missing=missing, block_start=block_start)
+        features[f"lag_{lag}"] = lagged
+        features[f"growth_{lag}"] = (values - lagged) / np.maximum(lagged, 1.0)
+
+    for window in windows:
+        mean, std = rolling_stats(
+            keys, values, window, min_periods=min_periods, block_start=block_start,
+        )
+        features[f"rolling_mean_{window}"] = mean
+        features[f"rolling_std_{window}"] = std
+
+    features["months_since_first_building"] = months_since_first_positive(
+        keys, months, values, block_start=block_start,
+    )
+
+    # Scatter back from sorted order to input order
+    inverse = np.empty_like(order)
+    inverse[order] = np.arange(len(order))
+    new = pd.DataFrame({name: col[inverse] for name, col in features.items()}, index=df.index)
+    return pd.concat([df, new], axis=1)
+
+
+def features_for_rows(
+    history: pd.DataFrame,
+    rows: pd.DataFrame,
+    **kwargs,
+) -> pd.DataFrame:
+    """
+    Online inference path: compute features for ``rows`` given each chip's
+    stored ``history``, through the same code as training.
+
+    History rows for a (chip_id, time_id) that also appears in ``rows`` are
+    replaced by the request row.
+    """
+    request_keys = pd.MultiIndex.from_frame(rows[[CHIP_COLUMN, TIME_COLUMN]].astype(str))
+    history_keys = pd.MultiIndex.from_frame(history[[CHIP_COLUMN, TIME_COLUMN]].astype(str))
+    history = history[~history_keys.isin(request_keys)]
+    history = history[history[CHIP_COLUMN].isin(rows[CHIP_COLUMN])]
+
+    combined = pd.concat([history, rows], ignore_index=True)
+    featured = build_temporal_features(combined, **kwargs)
+    return featured.iloc[len(history):].set_axis(rows.index)
+
+
+# ---------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build lag/rolling temporal features")
+    parser.add_argument("--features", required=True,
+                        help="CSV of the chip-month feature table")
+    parser.add_argument("--output", required=True,
+                        help="CSV or Parquet output path")
+    parser.add_argument("--lags", type=int, nargs="+", default=list(DEFAULT_LAGS))
+    parser.add_argument("--windows", type=int, nargs="+", default=list(DEFAULT_WINDOWS))
+    parser.add_argument("--min-periods", type=int, default=1)
+    parser.add_argument("--missing", choices=["nan", "ffill"], default="nan")
+    args = parser.parse_args(argv)
+
+    df = pd.read_csv(args.features, dtype={CHIP_COLUMN: str, TIME_COLUMN: str})
+    print(f"✓ Loaded {len(df):,} feature rows")
+
+    t0 = time.perf_counter()
+    out = build_temporal_features(
+        df,
+        lags=args.lags,
+        windows=args.windows,
+        min_periods=args.min_periods,
+        missing=args.missing,
+    )
+    print(f"✓ Built {out.shape[1] - df.shape[1]} temporal features in "
+          f"{time.perf_counter() - t0:.2f}s")
+
+    if args.output.endswith((".parquet", ".pq")):
+        out.to_parquet(args.output, index=False)
+    else:
+        out.to_csv(args.output, index=False)
+    print(f"✓ Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
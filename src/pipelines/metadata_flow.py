@@ -1,5 +1,54 @@
-from prefect import flow, task
-from etl.metadata import build_sn7_metadata
+"""
+metadata_flow.py
+
+Prefect flow for the SpaceNet7 metadata ETL.
+
+The pixel CSV is split once into per-AOI Parquet partitions. Each partition
+is then processed by mapped tasks running concurrently:
+- build_partition: parse filenames, chip geometries, AOI polygon, join
+- build_partition_fact: fact rows for the partition
+
+After the fact load, build_growth_rollup counts buildings per
+(aoi_id, time_id, chip_id) from the partition fact files. It writes the AOI ×
+month growth cube served by the API and refreshes the agg_aoi_month_growth
+summary table (see etl/rollup.py). track_buildings follows individual
+footprints across the months of each chip and replaces
+fact_building_lifecycle (see etl/tracking.py); it reads the pixel CSV
+directly because partitions split a chip's months apart. build_footprints
+computes chip-month footprint area/shape statistics and replaces
+fact_chip_footprint_stats (see etl/footprints.py).
+
+Compute tasks are cached on their inputs (which include a content hash of
+the partition file) plus the task source, and their outputs are persisted
+as (Geo)Parquet under ``work_dir``, so a rerun skips every unchanged
+partition. A cached result whose files have since been deleted (e.g. a
+cleaned ``work_dir``) is recomputed. Load tasks are also keyed on the
+database and table OIDs, so a dropped or recreated database is reloaded
+without ``force_reload``. Dimension loads run in parallel and are all committed before the
+per-partition fact loads start.
+
+The whole flow runs inside one RunReport (etl/instrumentation.py). Task
+threads start from a copy of the flow's context, so instrumented stages
+inside tasks are recorded too; cached tasks do not run and add no stages.
+The report is written as JSON and Prometheus text when the flow finishes.
+"""
+
+import hashlib
+import os
+from datetime import timedelta
+from typing import Dict, List
+
+import geopandas as gpd
+import pandas as pd
+from prefect import flow, task, unmapped
+from prefect.cache_policies import INPUTS, TASK_SOURCE
+from prefect.futures import wait
+from prefect.task_runners import ThreadPoolTaskRunner
+
+from etl.build_aoi_polygons import build_aoi_polygons
+from etl.footprints import build_footprint_stats, replace_footprint_stats
+from etl.ingest import build_raw_chip_records, parse_sn7_filename
+from etl.instrumentation import RunReport
 from etl.load import (
     get_connection,
     create_tables,
@@ -8,24 +57,390 @@ from etl.load import (
     insert_dim_time,
     insert_fact_chip_observation,
 )
+from etl.schema import (
+    build_dim_aoi,
+    build_dim_chip,
+    build_dim_time,
+    build_fact_chip_observation,
+)
+from etl.rollup import CUBE_KEYS, chip_month_counts, read_predictions, run_growth_rollup
+from etl.tracking import build_building_lifecycle, replace_building_lifecycle
+from etl.transform import build_chip_geometries, join_chips_to_aois
+
+CACHE_POLICY = INPUTS + TASK_SOURCE
+CACHE_EXPIRATION = timedelta(days=30)
+
+
+# ---------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------
+
+def file_fingerprint(path: str) -> str:
+    """
+    Cheap identity for large inputs: absolute path, size and mtime.
+    """
+    st = os.stat(path)
+    return f"{os.path.abspath(path)}:{st.st_size}:{st.st_mtime_ns}"
+
+
+def file_digest(path: str) -> str:
+    """
+    Content hash of a partition file (partitions are small enough to hash).
+    """
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _missing_files(result) -> bool:
+    """
+    True if a cached task result points at files that no longer exist.
+    """
+    if isinstance(result, str):
+        paths = [result]
+    else:
+        paths = [v for k, v in result.items() if k not in ("aoi_id", "digest")]
+    return not all(os.path.exists(p) for p in paths)
+
+
+def _recompute_missing(task_fn, inputs: List, results: List) -> List:
+    """
+    Rerun, bypassing the cache, every call whose result lost its files.
+    """
+    refresh = task_fn.with_options(refresh_cache=True)
+    futures = {
+        i: refresh.submit(inputs[i])
+        for i, result in enumerate(results)
+        if _missing_files(result)
+    }
+    return [futures[i].result() if i in futures else r for i, r in enumerate(results)]
+
+
+def _partition_dir(work_dir: str, aoi_id: str) -> str:
+    path = os.path.join(work_dir, "partitions", f"aoi={aoi_id}")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+# ---------------------------------------------------------
+# Extract: split the pixel CSV into per-AOI partitions
+# ---------------------------------------------------------
+
+@task(cache_policy=CACHE_POLICY, cache_expiration=CACHE_EXPIRATION, persist_result=True)
+def partition_pixel_csv(
+    pixel_csv_path: str,
+    input_fingerprint: str,
+    work_dir: str,
+    chunk_size: int = 1_000_000,
+) -> List[Dict]:
+    """
+    Stream the pixel CSV once and write one Parquet file per AOI.
+
+    ``input_fingerprint`` is only used as part of the cache key.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    aoi_for_filename: Dict[str, str] = {}
+    writers = {}
+
+    try:
+        for chunk in pd.read_csv(pixel_csv_path, chunksize=chunk_size):
+            for fn in chunk["filename"].unique():
+                if fn not in aoi_for_filename:
+                    aoi_for_filename[fn] = parse_sn7_filename(fn).aoi_id
+            aoi_ids = chunk["filename"].map(aoi_for_filename)
+
+            for aoi_id, part in chunk.groupby(aoi_ids, sort=False):
+                table = pa.Table.from_pandas(part, preserve_index=False)
+                if aoi_id not in writers:
+                    path = os.path.join(_partition_dir(work_dir, aoi_id), "pixels.parquet")
+                    writers[aoi_id] = (path, pq.ParquetWriter(path, table.schema))
+                writers[aoi_id][1].write_table(table)
+    finally:
+        for _, writer in writers.values():
+            writer.close()
+
+    return [
+        {"aoi_id": aoi_id, "path": path, "digest": file_digest(path)}
+        for aoi_id, (path, _) in sorted(writers.items())
+    ]
+
+
+# ---------------------------------------------------------
+# Transform: per-partition mapped tasks
+# ---------------------------------------------------------
+
+@task(cache_policy=CACHE_POLICY, cache_expiration=CACHE_EXPIRATION, persist_result=True)
+def build_partition(partition: Dict) -> Dict:
+    """
+    Build metadata, the AOI polygon and the dimension slices for one AOI.
+    """
+    out_dir = os.path.dirname(partition["path"])
+
+    df = build_raw_chip_records(pd.read_parquet(partition["path"]))
+    chip_gdf = build_chip_geometries(df)
+    aoi_gdf = build_aoi_polygons(chip_gdf)
+    metadata = join_chips_to_aois(chip_gdf, aoi_gdf)
+
+    outputs = {
+        "metadata": os.path.join(out_dir, "metadata.parquet"),
+        "dim_aoi": os.path.join(out_dir, "dim_aoi.parquet"),
+        "dim_chip": os.path.join(out_dir, "dim_chip.parquet"),
+        "dim_time": os.path.join(out_dir, "dim_time.parquet"),
+    }
+    metadata.to_parquet(outputs["metadata"])
+    build_dim_aoi(aoi_gdf).to_parquet(outputs["dim_aoi"])
+    build_dim_chip(metadata).to_parquet(outputs["dim_chip"])
+    build_dim_time(metadata).to_parquet(outputs["dim_time"])
+
+    return {"aoi_id": partition["aoi_id"], "digest": partition["digest"], **outputs}
+
+
+@task(cache_policy=CACHE_POLICY, cache_expiration=CACHE_EXPIRATION, persist_result=True)
+def build_partition_fact(built: Dict) -> Dict:
+    """
+    Build the fact rows for one AOI partition.
+    """
+    path = os.path.join(os.path.dirname(built["metadata"]), "fact.parquet")
+    fact = build_fact_chip_observation(gpd.read_parquet(built["metadata"]))
+    fact.to_parquet(path)
+    return {"aoi_id": built["aoi_id"], "digest": built["digest"], "fact": path}
+
+
+@task(cache_policy=CACHE_POLICY, cache_expiration=CACHE_EXPIRATION, persist_result=True)
+def combine_dimension(name: str, built: List[Dict], key: str, work_dir: str) -> str:
+    """
+    Union per-partition dimension slices, de-duplicated on the key.
+
+    Takes the build_partition results rather than their paths: slice paths
+    never change, so only the partition digests in them make the cache key
+    follow the content.
+    """
+    frames = [
+        gpd.read_parquet(b[name]) if name != "dim_time" else pd.read_parquet(b[name])
+        for b in built
+    ]
+    combined = pd.concat(frames, ignore_index=True).drop_duplicates(key)
+    path = os.path.join(work_dir, f"{name}.parquet")
+    combined.to_parquet(path)
+    return path
+
+
+# ---------------------------------------------------------
+# Load
+# ---------------------------------------------------------
+
+DIM_KEYS = {"dim_aoi": "aoi_id", "dim_chip": "chip_id", "dim_time": "time_id"}
+
+DIM_LOADERS = {
+    "dim_aoi": (insert_dim_aoi, gpd.read_parquet),
+    "dim_chip": (insert_dim_chip, gpd.read_parquet),
+    "dim_time": (insert_dim_time, pd.read_parquet),
+}
+
+
+@task
+def prepare_database(db: Dict) -> str:
+    """
+    Create the tables and return an identity of the target database.
+
+    The identity (database and fact table OIDs) changes when either is
+    dropped and recreated, and is part of the load tasks' cache keys.
+    """
+    conn = get_connection(**db)
+    try:
+        create_tables(conn)
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT d.oid, 'fact_chip_observation'::regclass::oid "
+                "FROM pg_database d WHERE d.datname = current_database();"
+            )
+            return ":".join(str(oid) for oid in cur.fetchone())
+    finally:
+        conn.close()
+
 
 @task
-def extract_metadata(pixel_csv_path):
-    return build_sn7_metadata(pixel_csv_path=pixel_csv_path, aoi_geojson_path=None)
+def load_dimension(name: str, path: str, db: Dict) -> int:
+    insert, read = DIM_LOADERS[name]
+    table = read(path)
+    conn = get_connection(**db)
+    try:
+        insert(conn, table)
+    finally:
+        conn.close()
+    return len(table)
+
+
+@task(cache_policy=CACHE_POLICY, cache_expiration=CACHE_EXPIRATION, persist_result=True)
+def load_partition_fact(built_fact: Dict, db: Dict, db_identity: str) -> int:
+    """
+    Replace the fact rows of one AOI partition.
+
+    Cached on the partition digest and target database (``db_identity``
+    from prepare_database), so unchanged partitions are not reloaded;
+    delete-then-insert keeps forced reloads idempotent.
+    """
+    fact = gpd.read_parquet(built_fact["fact"])
+    conn = get_connection(**db)
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                "DELETE FROM fact_chip_observation WHERE aoi_id = %s;",
+                (built_fact["aoi_id"],),
+            )
+        insert_fact_chip_observation(conn, fact)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return len(fact)
+
 
 @task
-def load_to_postgres(metadata, dbname, user, password):
-    conn = get_connection(dbname, user, password)
-    create_tables(conn)
+def build_growth_rollup(built_facts: List[Dict], db: Dict, work_dir: str, predictions_path=None) -> str:
+    """
+    Precompute the AOI × month growth cube and summary table after the load.
+    """
+    counts = pd.concat(
+        [chip_month_counts(pd.read_parquet(f["fact"], columns=CUBE_KEYS)) for f in built_facts],
+        ignore_index=True,
+    )
+    path = os.path.join(work_dir, "growth_cube.parquet")
+    conn = get_connection(**db)
+    try:
+        run_growth_rollup(counts, path, read_predictions(predictions_path), conn=conn)
+    finally:
+        conn.close()
+    return path
+
+
+@task(cache_policy=CACHE_POLICY, cache_expiration=CACHE_EXPIRATION, persist_result=True)
+def track_buildings(
+    pixel_csv_path: str, input_fingerprint: str, db: Dict, db_identity: str, work_dir: str
+) -> str:
+    """
+    Track footprints month to month and replace fact_building_lifecycle.
+
+    ``input_fingerprint`` and ``db_identity`` are only used as part of the
+    cache key.
+    """
+    lifecycle = build_building_lifecycle(pixel_csv_path)
+    path = os.path.join(work_dir, "building_lifecycle.parquet")
+    lifecycle.to_parquet(path, index=False)
+
+    conn = get_connection(**db)
+    try:
+        replace_building_lifecycle(conn, lifecycle)
+    finally:
+        conn.close()
+    return path
+
+
+@task(cache_policy=CACHE_POLICY, cache_expiration=CACHE_EXPIRATION, persist_result=True)
+def build_footprints(
+    pixel_csv_path: str, input_fingerprint: str, db: Dict, db_identity: str, work_dir: str
+) -> str:
+    """
+    Chip-month footprint statistics; replaces fact_chip_footprint_stats.
+
+    ``input_fingerprint`` and ``db_identity`` are only used as part of the
+    cache key.
+    """
+    stats = build_footprint_stats(pixel_csv_path)
+    path = os.path.join(work_dir, "footprint_stats.parquet")
+    stats.to_parquet(path, index=False)
+
+    conn = get_connection(**db)
+    try:
+        replace_footprint_stats(conn, stats)
+    finally:
+        conn.close()
+    return path
+
+
+# ---------------------------------------------------------
+# Flow
+# ---------------------------------------------------------
+
+@flow(task_runner=ThreadPoolTaskRunner(max_workers=os.cpu_count()))
+def metadata_etl_flow(
+    pixel_csv_path,
+    dbname,
+    user,
+    password,
+    host="localhost",
+    port=5432,
+    work_dir="data/processed/metadata_flow",
+    force_reload: bool = False,
+    predictions_path=None,
+    report_path=None,
+    prometheus_path=None,
+):
+    db = {"dbname": dbname, "user": user, "password": password, "host": host, "port": port}
+    os.makedirs(work_dir, exist_ok=True)
+    report_path = report_path or os.path.join(work_dir, "run_report.json")
+    prometheus_path = prometheus_path or os.path.join(work_dir, "run_report.prom")
+
+    with RunReport("metadata_etl_flow") as report:
+        fingerprint = file_fingerprint(pixel_csv_path)
+        partitions = partition_pixel_csv(pixel_csv_path, fingerprint, work_dir)
+        if any(_missing_files(p) for p in partitions):
+            partitions = partition_pixel_csv.with_options(refresh_cache=True)(
+                pixel_csv_path, fingerprint, work_dir
+            )
+
+        # Cached results can outlive their files; those partitions are rebuilt
+        built = build_partition.map(partitions).result()
+        built = _recompute_missing(build_partition, partitions, built)
+        facts = build_partition_fact.map(built).result()
+        facts = _recompute_missing(build_partition_fact, built, facts)
+
+        dims = {
+            name: combine_dimension.submit(name, built, key, work_dir)
+            for name, key in DIM_KEYS.items()
+        }
+        for name, key in DIM_KEYS.items():
+            dims[name] = dims[name].result()
+            if _missing_files(dims[name]):
+                dims[name] = combine_dimension.with_options(refresh_cache=True)(
+                    name, built, key, work_dir
+                )
+
+        db_identity = prepare_database(db)
 
-    insert_dim_aoi(conn, metadata["dim_aoi"])
-    insert_dim_chip(conn, metadata["dim_chip"])
-    insert_dim_time(conn, metadata["dim_time"])
-    insert_fact_chip_observation(conn, metadata["fact"])
+        # Independent dimensions load in parallel; all must commit before facts
+        dim_loads = [load_dimension.submit(name, dims[name], db) for name in dims]
+        wait(dim_loads)
+        for future in dim_loads:
+            future.result()
 
-    conn.close()
+        loader = load_partition_fact.with_options(refresh_cache=force_reload)
+        fact_rows = sum(
+            loader.map(facts, db=unmapped(db), db_identity=unmapped(db_identity)).result()
+        )
+        cube_path = build_growth_rollup(facts, db, work_dir, predictions_path)
+        lifecycle_path = track_buildings(pixel_csv_path, fingerprint, db, db_identity, work_dir)
+        if _missing_files(lifecycle_path):
+            lifecycle_path = track_buildings.with_options(refresh_cache=True)(
+                pixel_csv_path, fingerprint, db, db_identity, work_dir
+            )
+        footprints_path = build_footprints(pixel_csv_path, fingerprint, db, db_identity, work_dir)
+        if _missing_files(footprints_path):
+            footprints_path = build_footprints.with_options(refresh_cache=True)(
+                pixel_csv_path, fingerprint, db, db_identity, work_dir
+            )
 
-@flow
-def metadata_etl_flow(pixel_csv_path, dbname, user, password):
-    metadata = extract_metadata(pixel_csv_path)
-    load_to_postgres(metadata, dbname, user, password)
+    print(f"✓ Loaded {fact_rows:,} fact rows across {len(built)} AOI partitions")
+    print(f"✓ Wrote growth cube to {cube_path}")
+    print(f"✓ Wrote building lifecycle to {lifecycle_path}")
+    print(f"✓ Wrote footprint statistics to {footprints_path}")
+    print(report.summary())
+    report.write_json(report_path)
+    report.write_prometheus(prometheus_path)
+    print(f"✓ Run report written to {report_path} and {prometheus_path}")
+    return fact_rows
@@ -0,0 +1,34 @@
+import pandas as pd
+
+
+def test_aoi_growth_etag(api_client, monkeypatch):
+    from ml_end_to_end_pipeline.api import app as app_module
+    from ml_end_to_end_pipeline.api.growth_cube import GrowthCube
+
+    cube = GrowthCube.build(pd.DataFrame({
+        "aoi_id": ["aoi_1"], "time_id": ["2019_01"], "chip_id": ["a"],
+        "building_count": [3], "prev_building_count": [None],
+        "delta_count": [None], "prediction": [1.0],
+    }), version="test")
+    monkeypatch.setattr(app_module.growth_cube, "cube", cube)
+
+    response = api_client.get("/aoi/aoi_1/growth")
+    assert response.status_code == 200
+    assert response.json()["months"][0]["building_count"] == 3
+
+    etag = response.headers["etag"]
+    cached = api_client.get("/aoi/aoi_1/growth", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    listed = api_client.get("/aoi/aoi_1/growth", headers={"If-None-Match": f'"other", W/{etag}'})
+    assert listed.status_code == 304
+    stale = api_client.get("/aoi/aoi_1/growth", headers={"If-None-Match": '"other"'})
+    assert stale.status_code == 200
+
+    assert api_client.get("/aoi/missing/growth").status_code == 404
+
+
+def test_aoi_growth_requires_cube(api_client, monkeypatch):
+    from ml_end_to_end_pipeline.api import app as app_module
+
+    monkeypatch.setattr(app_module.growth_cube, "cube", None)
+    assert api_client.get("/aoi/aoi_1/growth").status_code == 503
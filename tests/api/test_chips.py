@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def small_index(monkeypatch):
+    import shapely
+
+    from ml_end_to_end_pipeline.api import app as app_module
+    from ml_end_to_end_pipeline.api.chip_index import ChipIndex
+
+    boxes = shapely.box([0, 1, 2], [0, 0, 0], [1, 2, 3], [1, 1, 1])
+    index = ChipIndex(
+        chip_ids=np.array(["a", "b", "c"], dtype=object),
+        bounds=shapely.bounds(boxes),
+        tree=shapely.STRtree(boxes),
+        version="test",
+    )
+    monkeypatch.setattr(app_module.chip_index, "index", index)
+    return index
+
+
+def test_chips_requires_index(api_client, monkeypatch):
+    from ml_end_to_end_pipeline.api import app as app_module
+
+    monkeypatch.setattr(app_module.chip_index, "index", None)
+    response = api_client.get("/chips", params={"bbox": "0,0,1,1"})
+    assert response.status_code == 503
+
+
+@pytest.mark.parametrize("bbox", ["0,0,1", "0,0,x,1", "2,0,1,1"])
+def test_chips_rejects_bad_bbox(api_client, small_index, bbox):
+    response = api_client.get("/chips", params={"bbox": bbox})
+    assert response.status_code == 422
+
+
+def test_chips_reports_truncation(api_client, small_index):
+    body = api_client.get("/chips", params={"bbox": "0.5,0.2,2.5,0.8", "limit": 2}).json()
+    assert [c["chip_id"] for c in body["chips"]] == ["a", "b"]
+    assert body["count"] == 2 and body["total"] == 3 and body["truncated"] is True
+
+    body = api_client.get("/chips", params={"bbox": "0.5,0.2,2.5,0.8"}).json()
+    assert body["count"] == body["total"] == 3 and body["truncated"] is False
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+
+def test_drift_report_counts_predictions(api_client, batch_payload, monkeypatch):
+    from ml_end_to_end_pipeline.api import app as app_module
+    from ml_end_to_end_pipeline.api.drift_monitor import DriftMonitor
+    from ml_end_to_end_pipeline.models.drift import build_reference_profile
+
+    reference = pd.DataFrame({
+        "chip_id": ["chip_001"] * 10,
+        "building_count": np.arange(10.0),
+        "prev_building_count": np.arange(10.0),
+    })
+    profile = build_reference_profile(reference, np.zeros(10))
+    monkeypatch.setattr(app_module, "drift_monitor", DriftMonitor(profile=profile, min_rows=1))
+
+    assert api_client.post("/predict/batch", json=batch_payload).status_code == 200
+
+    response = api_client.get("/monitoring/drift", params={"chip_id": "chip_002"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["reference_loaded"] is True
+    assert body["rows"] == 2
+    assert body["chip_id"]["unseen_rows"] == 1
+    assert body["chip_id"]["requested"]["estimated_rows"] >= 1
+    assert body["features"]["building_count"]["psi"] is not None
+
+    assert api_client.post("/monitoring/drift/reset").status_code == 200
+    assert api_client.get("/monitoring/drift").json()["rows"] == 0
+
+
+def test_drift_report_without_profile(api_client, monkeypatch):
+    from ml_end_to_end_pipeline.api import app as app_module
+    from ml_end_to_end_pipeline.api.drift_monitor import DriftMonitor
+
+    monkeypatch.setattr(app_module, "drift_monitor", DriftMonitor(profile=None))
+    body = api_client.get("/monitoring/drift").json()
+    assert body["reference_loaded"] is False
+    assert body["features"]["prediction"]["status"] == "insufficient_data"
@@ -0,0 +1,32 @@
+COLUMNAR = {
+    "chip_id": ["chip_001", "chip_002"],
+    "building_count": [10, 20],
+    "prev_building_count": [8, 18],
+}
+
+
+def test_predict_columnar_by_path(api_client):
+    response = api_client.post("/predict/batch/columnar", json=COLUMNAR)
+    assert response.status_code == 200
+    assert len(response.json()["predictions"]) == 2
+
+
+def test_predict_columnar_by_content_type(api_client, batch_payload):
+    import json
+
+    response = api_client.post(
+        "/predict/batch",
+        content=json.dumps(COLUMNAR),
+        headers={"Content-Type": "application/vnd.sn7.columnar+json"},
+    )
+    assert response.status_code == 200
+    columnar = response.json()["predictions"]
+
+    records = api_client.post("/predict/batch", json=batch_payload).json()["predictions"]
+    assert columnar == [r["prediction"] for r in records]
+
+
+def test_predict_columnar_validation_error(api_client):
+    body = dict(COLUMNAR, building_count=[10])
+    response = api_client.post("/predict/batch/columnar", json=body)
+    assert response.status_code == 422
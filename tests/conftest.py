@@ -1,4 +1,5 @@
 import pytest
+import numpy as np
 import pandas as pd
 from ml_end_to_end_pipeline.models.predict import load_model
 
@@ -23,6 +24,45 @@ def trained_model():
     """Load the trained model once per test session."""
     return load_model()
 
+@pytest.fixture(scope="session")
+def synthetic_feature_table():
+    """Multi-chip, multi-month feature table shaped like load_feature_table()."""
+    rng = np.random.default_rng(7)
+    rows = []
+    for c in range(12):
+        count = int(rng.integers(0, 40))
+        for t in range(1, 13):
+            prev = count
+            count = prev + int(rng.integers(-2, 6))
+            rows.append({
+                "chip_id": f"chip_{c:03d}",
+                "time_id": f"2019_{t:02d}",
+                "building_count": count,
+                "prev_building_count": prev,
+                "delta_count": count - prev,
+            })
+    return pd.DataFrame(rows)
+
+@pytest.fixture(scope="session")
+def fitted_pipeline(synthetic_feature_table):
+    """Small fitted scaler + one-hot + RandomForest pipeline (models.pipeline layout)."""
+    from sklearn.compose import ColumnTransformer
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+    pipeline = Pipeline([
+        ("preprocess", ColumnTransformer([
+            ("num", StandardScaler(), ["building_count", "prev_building_count"]),
+            ("cat", OneHotEncoder(handle_unknown="ignore"), ["chip_id"]),
+        ])),
+        ("model", RandomForestRegressor(n_estimators=20, max_depth=8, random_state=0)),
+    ])
+    df = synthetic_feature_table
+    # Noise keeps trees from collapsing to the trivial count difference
+    target = df["delta_count"] + np.random.default_rng(0).normal(0, 1, len(df))
+    return pipeline.fit(df, target)
+
 
 import pytest
 from fastapi.testclient import TestClient
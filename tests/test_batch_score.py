@@ -0,0 +1,70 @@
+import joblib
+import pandas as pd
+import pytest
+
+from ml_end_to_end_pipeline.models import batch_score
+from ml_end_to_end_pipeline.models.batch_score import checkpoint_path, score_file
+
+
+@pytest.fixture
+def scoring_inputs(tmp_path, fitted_pipeline, synthetic_feature_table):
+    model_path = tmp_path / "model.joblib"
+    joblib.dump(fitted_pipeline, model_path)
+
+    input_path = tmp_path / "input.csv"
+    synthetic_feature_table.to_csv(input_path, index=False)
+    return str(model_path), str(input_path)
+
+
+def test_score_file_preserves_order(tmp_path, scoring_inputs, fitted_pipeline, synthetic_feature_table):
+    model_path, input_path = scoring_inputs
+    output = tmp_path / "preds.csv"
+
+    summary = score_file(input_path, str(output), model_path, chunk_size=25, workers=2)
+
+    out = pd.read_csv(output)
+    assert summary["rows"] == len(synthetic_feature_table)
+    assert out["chip_id"].tolist() == synthetic_feature_table["chip_id"].tolist()
+    pd.testing.assert_series_equal(
+        out["prediction"],
+        pd.Series(fitted_pipeline.predict(synthetic_feature_table), name="prediction"),
+    )
+
+
+def test_score_file_resumes(tmp_path, monkeypatch, scoring_inputs, synthetic_feature_table):
+    """An interrupted run picks up after the last checkpointed chunk."""
+    model_path, input_path = scoring_inputs
+    output = tmp_path / "preds.csv"
+
+    real_write = batch_score._CsvSink.write
+    calls = {"n": 0}
+
+    def flaky_write(self, df):
+        calls["n"] += 1
+        if calls["n"] == 3:
+            raise RuntimeError("simulated crash")
+        real_write(self, df)
+
+    monkeypatch.setattr(batch_score._CsvSink, "write", flaky_write)
+    with pytest.raises(RuntimeError):
+        score_file(input_path, str(output), model_path, chunk_size=25, workers=1)
+    monkeypatch.setattr(batch_score._CsvSink, "write", real_write)
+
+    summary = score_file(input_path, str(output), model_path, chunk_size=25, workers=1)
+
+    assert summary["rows_this_run"] == len(synthetic_feature_table) - 50
+    assert len(pd.read_csv(output)) == len(synthetic_feature_table)
+    assert checkpoint_path(str(output)).endswith(".checkpoint.json")
+
+
+def test_score_file_parquet(tmp_path, scoring_inputs, synthetic_feature_table):
+    pytest.importorskip("pyarrow")
+    model_path, input_path = scoring_inputs
+    parquet_in = tmp_path / "input.parquet"
+    synthetic_feature_table.to_parquet(parquet_in, index=False)
+
+    output = tmp_path / "preds.parquet"
+    score_file(str(parquet_in), str(output), model_path, chunk_size=40, workers=1)
+
+    out = pd.read_parquet(output)
+    assert out["chip_id"].tolist() == synthetic_feature_table["chip_id"].tolist()
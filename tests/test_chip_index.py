@@ -0,0 +1,91 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("shapely")
+pytest.importorskip("pyproj")
+
+from etl.generate_synthetic import SyntheticSN7Config, generate_frame
+from etl.ingest import build_raw_chip_records
+from etl.schema import build_dim_chip
+from etl.transform import build_chip_geometries, tile_to_lonlat_bounds
+from ml_end_to_end_pipeline.api.chip_index import ChipIndex, ChipIndexManager
+
+
+@pytest.fixture(scope="module")
+def dim_chip():
+    config = SyntheticSN7Config(n_aois=4, chips_per_aoi=4, n_months=3, buildings_per_chip=5)
+    records = build_raw_chip_records(generate_frame(config))
+    return build_dim_chip(build_chip_geometries(records)).reset_index(drop=True)
+
+
+@pytest.fixture(scope="module")
+def predictions(dim_chip):
+    rows = [
+        {"chip_id": c, "time_id": t, "prediction": float(i) + m / 10}
+        for i, c in enumerate(dim_chip["chip_id"])
+        for m, t in enumerate(["2018_01", "2018_02"])
+    ]
+    # One chip has no prediction for the latest month
+    return pd.DataFrame(rows[:-1])
+
+
+def _lonlat_bounds(row):
+    return tile_to_lonlat_bounds(row.utm_x, row.utm_y, row.zoom)
+
+
+def test_bbox_query_matches_tile_bounds(dim_chip, predictions):
+    index = ChipIndex.build(dim_chip, predictions)
+    row = dim_chip.iloc[5]
+    minx, miny, maxx, maxy = _lonlat_bounds(row)
+
+    # A viewport strictly inside one tile only hits that tile
+    cx, cy = (minx + maxx) / 2, (miny + maxy) / 2
+    hits = index.query((cx - 1e-4, cy - 1e-4, cx + 1e-4, cy + 1e-4), time_id="2018_01")
+
+    assert [h["chip_id"] for h in hits] == [row.chip_id]
+    assert hits[0]["prediction"] == pytest.approx(5.0)
+    assert np.allclose(hits[0]["bounds"], [minx, miny, maxx, maxy], atol=1e-6)
+
+
+def test_latest_prediction_and_missing_month(dim_chip, predictions):
+    index = ChipIndex.build(dim_chip, predictions)
+    everything = index.query((-180, -85, 180, 85))
+    by_chip = {h["chip_id"]: h for h in everything}
+
+    assert len(everything) == len(dim_chip)
+    first, last = dim_chip["chip_id"].iloc[0], dim_chip["chip_id"].iloc[-1]
+    assert by_chip[first]["time_id"] == "2018_02"
+    assert by_chip[last]["time_id"] == "2018_01"
+
+    unknown = index.query((-180, -85, 180, 85), time_id="1999_01", limit=3)
+    assert len(unknown) == 3 and all(h["prediction"] is None for h in unknown)
+
+    limited, total = index.query_with_total((-180, -85, 180, 85), limit=3)
+    assert len(limited) == 3 and total == len(dim_chip)
+
+
+def test_manager_rebuilds_when_snapshot_changes(tmp_path, dim_chip):
+    path = tmp_path / "dim_chip.parquet"
+    dim_chip.iloc[:4].to_parquet(path)
+
+    manager = ChipIndexManager(snapshot_path=str(path), poll_seconds=0.05)
+    first = manager.rebuild()
+    assert len(first) == 4
+    assert manager.check_for_changes() is False
+
+    manager.start()
+    try:
+        dim_chip.to_parquet(path)
+        os.utime(path, ns=(time.time_ns(), time.time_ns() + 1_000_000_000))
+        deadline = time.time() + 5
+        while manager.index is first and time.time() < deadline:
+            time.sleep(0.05)
+    finally:
+        manager.stop()
+
+    assert len(manager.index) == len(dim_chip)
+    assert manager.index.version != first.version
@@ -0,0 +1,88 @@
+import numpy as np
+import orjson
+import pytest
+
+from ml_end_to_end_pipeline.api.columnar import (
+    COLUMNAR_CONTENT_TYPE,
+    ColumnarRoutingMiddleware,
+    ColumnarValidationError,
+    columnar_response,
+    parse_columnar_batch,
+)
+
+
+def _body(**overrides):
+    payload = {
+        "chip_id": ["chip_001", "chip_002", "chip_003"],
+        "building_count": [10, 20.5, 3],
+        "prev_building_count": [8, 18, 3],
+    }
+    payload.update(overrides)
+    return orjson.dumps(payload)
+
+
+def _error_types(body):
+    with pytest.raises(ColumnarValidationError) as exc:
+        parse_columnar_batch(body)
+    return {(tuple(e["loc"]), e["type"]) for e in exc.value.errors}
+
+
+def test_parse_valid_batch(fitted_pipeline):
+    df = parse_columnar_batch(_body())
+
+    assert list(df.columns) == ["chip_id", "building_count", "prev_building_count"]
+    assert df["building_count"].dtype == np.float64
+    assert df["chip_id"].tolist() == ["chip_001", "chip_002", "chip_003"]
+    assert len(fitted_pipeline.predict(df)) == 3
+
+
+def test_rejects_missing_and_mismatched_columns():
+    assert _error_types(orjson.dumps({"chip_id": ["a"]})) == {
+        (("body", "building_count"), "missing"),
+        (("body", "prev_building_count"), "missing"),
+    }
+    assert _error_types(_body(building_count=[1, 2])) == {(("body",), "length_mismatch")}
+    assert _error_types(_body(chip_id=[], building_count=[], prev_building_count=[])) == {
+        (("body",), "too_short")
+    }
+    assert _error_types(b"{not json") == {(("body",), "json_invalid")}
+
+
+def test_rejects_bad_values_per_column():
+    errors = _error_types(_body(
+        chip_id=["a", 2, "c"],
+        building_count=[1, None, 3],
+        prev_building_count=[1, "x", 3],
+    ))
+    assert errors == {
+        (("body", "chip_id"), "string_type"),
+        (("body", "building_count"), "finite_number"),
+        (("body", "prev_building_count"), "float_type"),
+    }
+
+
+def test_columnar_response_roundtrip():
+    out = orjson.loads(columnar_response(np.array([1.5, -2.0], dtype=np.float32)))
+    assert out == {"predictions": [1.5, -2.0]}
+
+
+def test_routing_middleware_rewrites_only_columnar_batch_posts():
+    from starlette.applications import Starlette
+    from starlette.responses import PlainTextResponse
+    from starlette.routing import Route
+    from starlette.testclient import TestClient
+
+    def handler(name):
+        return lambda request: PlainTextResponse(name)
+
+    app = Starlette(routes=[
+        Route("/predict/batch", handler("records"), methods=["GET", "POST"]),
+        Route("/predict/batch/columnar", handler("columnar"), methods=["GET", "POST"]),
+    ])
+    app.add_middleware(ColumnarRoutingMiddleware)
+    client = TestClient(app)
+    columnar = {"Content-Type": f"{COLUMNAR_CONTENT_TYPE}; charset=utf-8"}
+
+    assert client.post("/predict/batch", content=b"{}", headers=columnar).text == "columnar"
+    assert client.post("/predict/batch", json={}).text == "records"
+    assert client.get("/predict/batch", headers=columnar).text == "records"
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+
+from ml_end_to_end_pipeline.models.compact import (
+    CompactForestModel,
+    export_compact_model,
+    load_compact_model,
+    load_model_artifact,
+)
+
+
+def test_compact_matches_pipeline(fitted_pipeline, synthetic_feature_table):
+    """Flattened forest reproduces the sklearn pipeline predictions."""
+    compact = CompactForestModel.from_estimator(fitted_pipeline)
+
+    expected = fitted_pipeline.predict(synthetic_feature_table)
+    np.testing.assert_allclose(compact.predict(synthetic_feature_table), expected)
+
+
+def test_compact_roundtrip_mmap(tmp_path, fitted_pipeline, synthetic_feature_table):
+    """Saved file loads memory-mapped and predicts identically."""
+    path = export_compact_model(fitted_pipeline, str(tmp_path / "model.forest"))
+
+    loaded = load_compact_model(path)
+    assert isinstance(loaded.threshold, np.memmap) or isinstance(loaded.threshold.base, np.memmap)
+    np.testing.assert_allclose(
+        loaded.predict(synthetic_feature_table),
+        fitted_pipeline.predict(synthetic_feature_table),
+    )
+    assert isinstance(load_model_artifact(path), CompactForestModel)
+
+
+def test_compact_unknown_chip_ignored(fitted_pipeline):
+    """Unseen chip_ids encode to all-zero one-hot rows, like handle_unknown='ignore'."""
+    compact = CompactForestModel.from_estimator(fitted_pipeline)
+    df = pd.DataFrame([{"chip_id": "never_seen", "building_count": 10, "prev_building_count": 8}])
+
+    np.testing.assert_allclose(compact.predict(df), fitted_pipeline.predict(df))
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from ml_end_to_end_pipeline.models.compact import CompactForestModel, load_compact_model
+from ml_end_to_end_pipeline.models.compress import (
+    cap_depth,
+    compress_model,
+    compression_curve,
+    regression_metrics,
+    select_trees,
+    selection_split,
+    to_float32,
+)
+
+
+def test_float32_keeps_routing(fitted_pipeline, synthetic_feature_table):
+    """Rounded-down float32 thresholds send every row down the same path."""
+    base = CompactForestModel.from_estimator(fitted_pipeline)
+    f32 = to_float32(base)
+
+    assert f32.threshold.dtype == np.float32
+    np.testing.assert_allclose(
+        f32.predict(synthetic_feature_table), base.predict(synthetic_feature_table), rtol=1e-6
+    )
+
+
+def test_select_and_cap(fitted_pipeline, synthetic_feature_table):
+    """Pruned / capped forests stay valid and shrink."""
+    base = CompactForestModel.from_estimator(fitted_pipeline)
+
+    pruned = select_trees(base, [0, 3, 5])
+    assert pruned.n_trees == 3
+    expected = base.predict_per_tree(synthetic_feature_table)[:, [0, 3, 5]].mean(axis=1)
+    np.testing.assert_allclose(pruned.predict(synthetic_feature_table), expected)
+
+    capped = cap_depth(base, 3)
+    assert capped.max_depth <= 3
+    assert len(capped.feature) < len(base.feature)
+
+
+def test_compress_model_writes_artifact(tmp_path, fitted_pipeline, synthetic_feature_table):
+    df = synthetic_feature_table
+    out = tmp_path / "compressed.forest"
+
+    curve, chosen = compress_model(
+        fitted_pipeline, df, df["delta_count"], str(out),
+        tree_counts=[5, 20], depth_caps=(None, 4), latency_repeats=5,
+    )
+
+    assert {"mae", "rmse", "p50_ms", "p99_ms"}.issubset(curve.columns)
+    assert curve["chosen"].sum() == 1
+    np.testing.assert_allclose(load_compact_model(str(out)).predict(df), chosen.predict(df))
+
+
+def test_curve_scores_rows_not_used_for_ranking(fitted_pipeline, synthetic_feature_table):
+    df = synthetic_feature_table
+    X_select, y_select, X_eval, y_eval = selection_split(df, df["delta_count"], 0.25)
+    assert len(X_select) == 36 and len(X_eval) == 108
+    assert not set(X_select.index) & set(X_eval.index)
+
+    full = dict(tree_counts=[20], depth_caps=(None,), float32=(False,), latency_repeats=2)
+    expected = regression_metrics(y_eval, fitted_pipeline.predict(X_eval))
+
+    # Default: the selection part is split off the validation rows
+    curve, _ = compression_curve(
+        fitted_pipeline, df, df["delta_count"], selection_fraction=0.25, **full
+    )
+    assert curve.loc[0, "mae"] == pytest.approx(expected["mae"])
+
+    # Explicit selection set: every validation row is scored
+    curve, _ = compression_curve(
+        fitted_pipeline, X_eval, y_eval, X_select=X_select, y_select=y_select, **full
+    )
+    assert curve.loc[0, "mae"] == pytest.approx(expected["mae"])
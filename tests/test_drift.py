@@ -0,0 +1,145 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml_end_to_end_pipeline.api.drift_monitor import DriftMonitor
+from ml_end_to_end_pipeline.models.drift import (
+    CountMinSketch,
+    QuantileSketch,
+    build_reference_profile,
+    load_reference_profile,
+    max_cdf_gap,
+    population_stability_index,
+    profile_path,
+    save_reference_profile,
+    write_model_profile,
+)
+
+
+def test_quantile_sketch_relative_accuracy():
+    rng = np.random.default_rng(0)
+    values = np.concatenate([rng.lognormal(3, 1, 50_000), -rng.lognormal(0, 1, 5_000), np.zeros(100)])
+    sketch = QuantileSketch(relative_accuracy=0.01)
+    sketch.update(values)
+    sketch.update([np.nan])
+
+    qs = [0.01, 0.05, 0.5, 0.9, 0.99]
+    exact = np.quantile(values, qs, method="lower")
+    np.testing.assert_allclose(sketch.quantiles(qs), exact, rtol=0.011)
+    assert sketch.count == len(values)
+    assert sketch.missing == 1
+
+
+def test_quantile_sketch_merge_and_roundtrip():
+    rng = np.random.default_rng(1)
+    a, b, whole = QuantileSketch(), QuantileSketch(), QuantileSketch()
+    x = rng.normal(20, 5, 10_000)
+    a.update(x[:4_000])
+    b.update(x[4_000:])
+    whole.update(x)
+
+    merged = a.merge(b)
+    np.testing.assert_array_equal(merged.counts, whole.counts)
+    np.testing.assert_array_equal(QuantileSketch.from_dict(whole.to_dict()).counts, whole.counts)
+
+    with pytest.raises(ValueError):
+        a.merge(QuantileSketch(relative_accuracy=0.05))
+
+
+def test_drift_scores_separate_shifted_traffic():
+    rng = np.random.default_rng(2)
+    reference, same, shifted = QuantileSketch(), QuantileSketch(), QuantileSketch()
+    reference.update(rng.poisson(30, 20_000))
+    same.update(rng.poisson(30, 5_000))
+    shifted.update(rng.poisson(45, 5_000))
+
+    assert population_stability_index(reference, same) < 0.05
+    assert population_stability_index(reference, shifted) > 0.25
+    assert max_cdf_gap(reference, same) < 0.05
+    assert max_cdf_gap(reference, shifted) > 0.5
+    assert population_stability_index(reference, QuantileSketch()) is None
+
+
+def test_count_min_never_undercounts():
+    rng = np.random.default_rng(3)
+    keys = np.array([f"chip_{i:04d}" for i in rng.zipf(1.3, 20_000) % 3_000], dtype=object)
+    cms = CountMinSketch(width=1024, depth=4)
+    cms.update(keys[:10_000])
+    cms.merge(CountMinSketch(width=1024, depth=4))
+    other = CountMinSketch(width=1024, depth=4)
+    other.update(keys[10_000:])
+    cms.merge(other)
+
+    exact = pd.Series(keys).value_counts()
+    for key in exact.index[:20]:
+        estimate = cms.estimate(key)
+        assert exact[key] <= estimate <= exact[key] + np.e / 1024 * len(keys)
+    assert cms.total == len(keys)
+
+
+def test_profile_roundtrip_and_monitor_report(tmp_path, synthetic_feature_table):
+    df = synthetic_feature_table
+    profile = build_reference_profile(df, df["delta_count"].to_numpy(dtype=float))
+    path = save_reference_profile(profile, str(tmp_path / "model.profile.json"))
+    loaded = load_reference_profile(path)
+    assert loaded.categories["chip_id"] == sorted(df["chip_id"].unique())
+    np.testing.assert_array_equal(
+        loaded.sketches["building_count"].counts, profile.sketches["building_count"].counts
+    )
+
+    monitor = DriftMonitor(profile=loaded, min_rows=50)
+    monitor.start()
+    try:
+        for _, row in df.iterrows():
+            monitor.observe(
+                {c: np.array([row[c]]) for c in ["chip_id", "building_count", "prev_building_count"]},
+                np.array([row["delta_count"]], dtype=float),
+            )
+        monitor.observe(
+            {"chip_id": np.array(["new_chip", "new_chip"], dtype=object),
+             "building_count": np.array([500.0, 600.0]),
+             "prev_building_count": np.array([490.0, 590.0])},
+            np.array([10.0, 10.0]),
+        )
+        monitor.flush()
+    finally:
+        monitor.stop()
+
+    report = monitor.report(chip_id="chip_003")
+    assert report["requests"] == len(df) + 1
+    assert report["rows"] == len(df) + 2
+    assert report["features"]["building_count"]["status"] == "ok"
+    assert report["chip_id"]["unseen_rows"] == 2
+    assert report["chip_id"]["unseen_examples"] == ["new_chip"]
+    assert report["chip_id"]["requested"]["estimated_rows"] >= 12
+
+    monitor.reset()
+    assert monitor.report()["rows"] == 0
+
+
+def test_reset_folds_in_queued_batches_first():
+    monitor = DriftMonitor(min_rows=1, batch_seconds=0.2)
+    monitor.start()
+    try:
+        monitor.observe(
+            {"chip_id": np.array(["chip_000"], dtype=object),
+             "building_count": np.array([10.0]),
+             "prev_building_count": np.array([8.0])},
+            np.array([2.0]),
+        )
+        monitor.reset()
+        monitor.flush()
+    finally:
+        monitor.stop()
+
+    assert monitor.report()["rows"] == 0
+
+
+def test_write_model_profile_uses_onehot_vocabulary(tmp_path, fitted_pipeline, synthetic_feature_table):
+    model_path = str(tmp_path / "best_regression_model.joblib")
+    path = write_model_profile(fitted_pipeline, synthetic_feature_table, model_path)
+
+    assert path == profile_path(model_path) == str(tmp_path / "best_regression_model.profile.json")
+    profile = load_reference_profile(path)
+    assert len(profile.categories["chip_id"]) == 12
+    assert profile.sketches["prediction"].count == len(synthetic_feature_table)
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from ml_end_to_end_pipeline.models.compact import CompactForestModel
+from ml_end_to_end_pipeline.models.explain import ForestExplainer
+
+
+@pytest.fixture(scope="module")
+def explainer(fitted_pipeline):
+    return ForestExplainer.from_model(fitted_pipeline, cache_size=8)
+
+
+def test_contributions_sum_to_prediction(explainer, fitted_pipeline, synthetic_feature_table):
+    df = synthetic_feature_table
+    preds, contrib = explainer.explain_array(df)
+
+    assert contrib.shape == (len(df), 3)
+    assert explainer.input_columns == ["building_count", "prev_building_count", "chip_id"]
+    np.testing.assert_allclose(preds, fitted_pipeline.predict(df), rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(explainer.bias + contrib.sum(axis=1), preds)
+
+
+def test_matches_single_tree_path(fitted_pipeline, synthetic_feature_table):
+    """Brute-force Saabas on the sklearn trees for a handful of rows."""
+    row = synthetic_feature_table.iloc[[5]]
+    forest = fitted_pipeline[-1]
+    Xt = fitted_pipeline[:-1].transform(row).astype(np.float32)
+    Xt = Xt.toarray() if hasattr(Xt, "toarray") else Xt
+
+    expected = np.zeros(Xt.shape[1])
+    for est in forest.estimators_:
+        tree, node = est.tree_, 0
+        while tree.children_left[node] >= 0:
+            f = tree.feature[node]
+            nxt = tree.children_left[node] if Xt[0, f] <= tree.threshold[node] else tree.children_right[node]
+            expected[f] += (tree.value[nxt, 0, 0] - tree.value[node, 0, 0]) / len(forest.estimators_)
+            node = nxt
+
+    _, contrib = ForestExplainer.from_model(fitted_pipeline).explain_array(row)
+    np.testing.assert_allclose(contrib[0, :2], expected[:2])
+    np.testing.assert_allclose(contrib[0, 2], expected[2:].sum())
+
+
+def test_cache_reuses_rows(explainer, synthetic_feature_table):
+    df = synthetic_feature_table.iloc[:4]
+    first_preds, first = explainer.explain(df)
+    assert len(explainer._cache) == 4
+
+    repeated = df.iloc[[3, 3, 0]]
+    preds, contrib = explainer.explain(repeated)
+    np.testing.assert_allclose(contrib, first[[3, 3, 0]])
+    np.testing.assert_allclose(preds, first_preds[[3, 3, 0]])
+
+    explainer.explain(synthetic_feature_table.iloc[10:30])
+    assert len(explainer._cache) == 8
+
+
+def test_compact_model_input(fitted_pipeline, synthetic_feature_table):
+    compact = CompactForestModel.from_estimator(fitted_pipeline)
+    records = ForestExplainer.from_model(compact).explain_records(synthetic_feature_table.iloc[:2])
+    assert set(records[0]["contributions"]) == {"building_count", "prev_building_count", "chip_id"}
+    assert records[0]["prediction"] == pytest.approx(
+        records[0]["bias"] + sum(records[0]["contributions"].values())
+    )
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from etl.footprints import (
+    FOOTPRINT_FEATURES,
+    build_footprint_stats,
+    footprint_measures,
+    join_footprint_stats,
+)
+from etl.generate_synthetic import SyntheticSN7Config, generate_frame
+
+
+@pytest.fixture(scope="module")
+def pixel_df():
+    config = SyntheticSN7Config(n_aois=3, chips_per_aoi=2, n_months=4, buildings_per_chip=30)
+    return generate_frame(config)
+
+
+def test_footprint_measures():
+    wkt = np.array([
+        "POLYGON ((0 0, 4 0, 4 2, 0 2, 0 0))",
+        "POLYGON EMPTY",
+        "not a polygon",
+    ], dtype=object)
+    m = footprint_measures(wkt)
+
+    assert m["valid"].tolist() == [True, False, False]
+    assert m.loc[0, "area"] == 8.0
+    assert m.loc[0, "perimeter"] == 12.0
+    assert m.loc[0, "centroid_x"] == 2.0 and m.loc[0, "centroid_y"] == 1.0
+    assert m.loc[0, "compactness"] == pytest.approx(4 * np.pi * 8 / 144)
+    assert m.loc[1:, "area"].isna().all()
+
+
+def test_stats_match_groupby_reference(pixel_df):
+    # Small chunks split chip-months across chunks and across merges
+    stats = build_footprint_stats(pixel_df, chunk_size=97, workers=1, merge_every=3)
+
+    parsed = pixel_df["filename"].str.extract(r"global_monthly_(\d{4}_\d{2})_mosaic_(.*)")
+    m = footprint_measures(pixel_df["geometry"].to_numpy(dtype=object))
+    ref = (
+        m.assign(time_id=parsed[0], chip_id=parsed[1])
+        .groupby(["chip_id", "time_id"])["area"]
+        .agg(["count", "sum", "mean", "std", "min", "max"])
+        .reset_index()
+        .sort_values(["chip_id", "time_id"], ignore_index=True)
+    )
+
+    assert set(FOOTPRINT_FEATURES) <= set(stats.columns)
+    assert len(stats) == 6 * 4
+    np.testing.assert_array_equal(stats["footprint_count"], ref["count"])
+    np.testing.assert_allclose(stats["footprint_area_total"], ref["sum"])
+    np.testing.assert_allclose(stats["footprint_area_mean"], ref["mean"])
+    np.testing.assert_allclose(stats["footprint_area_min"], ref["min"])
+    np.testing.assert_allclose(stats["footprint_area_max"], ref["max"])
+    # Population std from sums of squares vs pandas' sample std
+    n = ref["count"]
+    np.testing.assert_allclose(
+        stats["footprint_area_std"], (ref["std"] * np.sqrt((n - 1) / n)).fillna(0.0),
+        rtol=1e-6, atol=1e-9,
+    )
+
+
+def test_parallel_csv_matches_serial(tmp_path, pixel_df):
+    path = tmp_path / "pix.csv"
+    pixel_df.to_csv(path, index=False)
+
+    serial = build_footprint_stats(pixel_df, chunk_size=500, workers=1)
+    parallel = build_footprint_stats(str(path), chunk_size=200, workers=2)
+
+    pd.testing.assert_frame_equal(serial, parallel, check_exact=False)
+
+
+def test_join_adds_footprint_columns_to_feature_table(pixel_df):
+    stats = build_footprint_stats(pixel_df, workers=1)
+    first = stats.iloc[0]
+    features = pd.DataFrame({
+        "chip_id": [first["chip_id"], "chip_without_polygons"],
+        "time_id": [first["time_id"], first["time_id"]],
+        "building_count": [int(first["footprint_count"]), 0],
+        "footprint_area_mean": [-1.0, -1.0],  # stale column is replaced
+    }, index=[10, 11])
+
+    out = join_footprint_stats(features, stats)
+    assert out.index.tolist() == [10, 11]
+    assert out.columns.tolist() == ["chip_id", "time_id", "building_count", *FOOTPRINT_FEATURES]
+    assert out.loc[10, "footprint_area_mean"] == first["footprint_area_mean"]
+    assert out.loc[11, "footprint_count"] == 0 and out.loc[11, "footprint_area_total"] == 0
+    assert np.isnan(out.loc[11, "footprint_area_mean"])
@@ -0,0 +1,80 @@
+import orjson
+import pandas as pd
+import pytest
+
+from ml_end_to_end_pipeline.api.growth_cube import GrowthCube, GrowthCubeManager, etag_matches
+
+
+@pytest.fixture
+def cube_frame():
+    return pd.DataFrame({
+        "aoi_id": ["aoi_1"] * 4 + ["aoi_2"],
+        "time_id": ["2019_01", "2019_01", "2019_02", "2019_03", "2019_01"],
+        "chip_id": ["a", "b", "a", "a", "c"],
+        "building_count": [3, 4, 6, 5, 7],
+        "prev_building_count": [None, None, 3, 6, None],
+        "delta_count": [None, None, 3, -1, None],
+        "prediction": [None, None, 2.0, 0.5, None],
+    })
+
+
+def test_months_and_range(cube_frame):
+    cube = GrowthCube.build(cube_frame, version="v1")
+    etag, body = cube.response("aoi_1", start="2019_02")
+    data = orjson.loads(body)
+
+    assert [m["time_id"] for m in data["months"]] == ["2019_02", "2019_03"]
+    assert data["months"][0] == {
+        "time_id": "2019_02", "chips": 1, "building_count": 6,
+        "delta_count": 3.0, "predicted_growth": 2.0,
+    }
+    assert "chips" not in data
+    assert cube.response("aoi_9") is None
+
+    all_months = orjson.loads(cube.response("aoi_1")[1])["months"]
+    assert all_months[0]["chips"] == 2 and all_months[0]["predicted_growth"] is None
+
+
+def test_chip_rows(cube_frame):
+    cube = GrowthCube.build(cube_frame, version="v1")
+    rows = orjson.loads(cube.response("aoi_1", end="2019_01", chips=True)[1])["chips"]
+    assert [(r["chip_id"], r["building_count"]) for r in rows] == [("a", 3.0), ("b", 4.0)]
+    assert rows[0]["delta_count"] is None
+
+
+def test_etag_tracks_version_and_query(cube_frame):
+    v1 = GrowthCube.build(cube_frame, version="v1")
+    v2 = GrowthCube.build(cube_frame, version="v2")
+
+    assert v1.response("aoi_1")[0] == v1.response("aoi_1")[0]
+    assert v1.response("aoi_1")[0] != v1.response("aoi_1", start="2019_02")[0]
+    assert v1.response("aoi_1")[0] != v2.response("aoi_1")[0]
+    # Cached body is returned as-is
+    assert v1.response("aoi_1")[1] is v1.response("aoi_1")[1]
+
+
+def test_manager_reloads_on_change(tmp_path, cube_frame):
+    path = tmp_path / "growth_cube.parquet"
+    cube_frame.to_parquet(path)
+
+    manager = GrowthCubeManager(str(path))
+    first = manager.reload()
+    assert len(first) == 2
+    assert not manager.check_for_changes()
+
+    cube_frame[cube_frame["aoi_id"] == "aoi_1"].to_parquet(path)
+    assert manager.check_for_changes()
+    assert len(manager.cube) == 1 and manager.cube.version != first.version
+
+
+def test_etag_matches_if_none_match_lists():
+    etag = '"abc123"'
+    assert etag_matches('"abc123"', etag)
+    assert etag_matches('"zzz", W/"abc123"', etag)
+    assert etag_matches("*", etag)
+    # Substrings and unquoted tags are different entity tags
+    assert not etag_matches('"xabc123x"', etag)
+    assert not etag_matches('"abc123-old"', etag)
+    assert not etag_matches("abc123", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches("", etag)
@@ -0,0 +1,113 @@
+import json
+
+import joblib
+import numpy as np
+
+from ml_end_to_end_pipeline.models.drift import load_reference_profile
+from ml_end_to_end_pipeline.models.incremental import (
+    incremental_retrain,
+    main,
+    time_windows,
+    unseen_fraction,
+    warm_start_update,
+)
+
+
+def test_time_windows(synthetic_feature_table):
+    history, window, holdout = time_windows(synthetic_feature_table, window_months=3, holdout_months=2)
+
+    assert sorted(holdout["time_id"].unique()) == ["2019_11", "2019_12"]
+    assert sorted(window["time_id"].unique()) == ["2019_08", "2019_09", "2019_10"]
+    assert history["time_id"].max() == "2019_10"
+    assert len(history) + len(holdout) == len(synthetic_feature_table)
+
+
+def test_warm_start_appends_and_slides(fitted_pipeline, synthetic_feature_table):
+    df = synthetic_feature_table
+    recent = df[df["time_id"] >= "2019_10"]
+    old_trees = fitted_pipeline[-1].estimators_
+
+    grown = warm_start_update(fitted_pipeline, recent, recent["delta_count"], n_new_trees=5)
+    assert len(grown[-1].estimators_) == 25
+    assert len(fitted_pipeline[-1].estimators_) == 20  # input untouched
+    np.testing.assert_array_equal(grown[-1].estimators_[0].tree_.threshold, old_trees[0].tree_.threshold)
+
+    slid = warm_start_update(fitted_pipeline, recent, recent["delta_count"], n_new_trees=5, max_trees=20)
+    forest = slid[-1]
+    assert len(forest.estimators_) == forest.n_estimators == 20
+    # The 5 oldest trees are gone; the survivors keep their order
+    np.testing.assert_array_equal(forest.estimators_[0].tree_.threshold, old_trees[5].tree_.threshold)
+    assert not forest.warm_start
+    assert slid.predict(df).shape == (len(df),)
+
+
+def test_new_chip_ids_keep_feature_layout(fitted_pipeline, synthetic_feature_table):
+    recent = synthetic_feature_table[synthetic_feature_table["time_id"] == "2019_12"].copy()
+    recent.loc[recent.index[:3], "chip_id"] = "chip_new"
+
+    assert unseen_fraction(fitted_pipeline, recent) == 3 / len(recent)
+
+    updated = warm_start_update(fitted_pipeline, recent, recent["delta_count"], n_new_trees=3)
+    assert updated[-1].n_features_in_ == fitted_pipeline[-1].n_features_in_
+    assert np.isfinite(updated.predict(recent)).all()
+
+
+def test_incremental_retrain_promotion(fitted_pipeline, synthetic_feature_table):
+    df = synthetic_feature_table
+    report, promoted = incremental_retrain(
+        fitted_pipeline, df, window_months=2, n_new_trees=5, max_trees=20, max_mae_increase=10.0,
+    )
+    assert report["promoted"] == "incremental"
+    assert report["holdout_months"] == ["2019_12"]
+    assert {"mae", "rmse", "r2", "fit_seconds", "n_trees"} <= set(report["full"])
+    assert len(promoted[-1].estimators_) == 20
+
+    # Unseen chip_ids above the threshold force the full retrain
+    shifted = df.assign(chip_id=np.where(df["time_id"] >= "2019_10", "chip_new", df["chip_id"]))
+    report, promoted = incremental_retrain(
+        fitted_pipeline, shifted, window_months=2, n_new_trees=5, max_mae_increase=10.0,
+    )
+    assert report["promoted"] == "full"
+    assert "chip_new" in promoted[-2].named_transformers_["cat"].categories_[0]
+
+
+def test_promoted_model_is_refitted_on_newest_month(fitted_pipeline, synthetic_feature_table):
+    # Targets only the newest month can produce, and a chip only it contains
+    df = synthetic_feature_table.copy()
+    newest = df["time_id"] == "2019_12"
+    df.loc[newest, "delta_count"] = 1000
+    df.loc[newest & (df["chip_id"] == "chip_000"), "chip_id"] = "chip_newest"
+
+    report, promoted = incremental_retrain(
+        fitted_pipeline, df, window_months=2, n_new_trees=5, max_mae_increase=10.0,
+    )
+    assert report["promoted"] == "incremental"
+    assert report["training_months"] == ["2019_10", "2019_11", "2019_12"]
+    assert max(tree.tree_.value.max() for tree in promoted[-1].estimators_[-5:]) == 1000
+
+    report, promoted = incremental_retrain(
+        fitted_pipeline, df, window_months=2, n_new_trees=5, max_mae_increase=-1.0,
+    )
+    assert report["promoted"] == "full"
+    assert report["training_months"][-1] == "2019_12"
+    assert "chip_newest" in promoted[-2].named_transformers_["cat"].categories_[0]
+
+
+def test_cli_writes_model_and_report(tmp_path, fitted_pipeline, synthetic_feature_table):
+    model_path = tmp_path / "model.joblib"
+    features = tmp_path / "features.csv"
+    report = tmp_path / "report.json"
+    joblib.dump(fitted_pipeline, model_path)
+    synthetic_feature_table.to_csv(features, index=False)
+
+    main([
+        "--model", str(model_path), "--features", str(features), "--report", str(report),
+        "--n-new-trees", "4", "--max-trees", "20", "--max-mae-increase", "10",
+    ])
+
+    assert report.exists()
+    assert len(joblib.load(model_path)[-1].estimators_) == 20
+    # The profile describes the rows the promoted model was trained on
+    months = json.loads(report.read_text())["training_months"]
+    profile = load_reference_profile(str(tmp_path / "model.profile.json"))
+    assert profile.n_rows == synthetic_feature_table["time_id"].isin(months).sum()
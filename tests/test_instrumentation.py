@@ -0,0 +1,54 @@
+"""
+test_instrumentation.py
+
+Unit tests for ETL stage instrumentation.
+"""
+
+import json
+
+import pandas as pd
+
+from etl.instrumentation import RunReport, instrument_stage
+
+
+@instrument_stage("test.double_rows")
+def double_rows(df):
+    return pd.concat([df, df], ignore_index=True)
+
+
+@instrument_stage("test.outer")
+def outer(df):
+    return double_rows(df)
+
+
+def test_stage_recorded_with_rows(tmp_path):
+    df = pd.DataFrame({"a": range(10)})
+
+    with RunReport("unit") as report:
+        outer(df)
+
+    stages = {s.stage: s for s in report.stages}
+    assert stages["test.double_rows"].rows_in == 10
+    assert stages["test.double_rows"].rows_out == 20
+    assert stages["test.double_rows"].parent == "test.outer"
+    assert stages["test.outer"].wall_s >= stages["test.double_rows"].wall_s
+
+    path = report.write_json(str(tmp_path / "run.json"))
+    assert len(json.load(open(path))["stages"]) == 2
+
+    prom = report.to_prometheus()
+    assert 'sn7_etl_stage_rows_out{run="unit",stage="test.double_rows"} 20' in prom
+
+
+def test_no_report_is_passthrough():
+    df = pd.DataFrame({"a": [1]})
+    assert len(double_rows(df)) == 2
+
+
+def test_profile_mode_dumps_top_level_only(tmp_path):
+    with RunReport("unit", profile_dir=str(tmp_path)) as report:
+        outer(pd.DataFrame({"a": [1]}))
+
+    profiled = [s for s in report.stages if s.profile_path]
+    assert [s.stage for s in profiled] == ["test.outer"]
+    assert (tmp_path / "test_outer.prof").exists()
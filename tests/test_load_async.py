@@ -0,0 +1,132 @@
+"""
+test_load_async.py
+
+Partitioning and commit/rollback coordination of the asyncpg loader,
+exercised against an in-memory fake pool.
+"""
+
+import asyncio
+
+import pandas as pd
+import pytest
+import shapely
+from shapely.geometry import Point, box
+
+pytest.importorskip("psycopg2")
+
+from etl.load_async import (  # noqa: E402
+    balance_partitions,
+    iter_records,
+    load_fact_parallel,
+    partition_rows,
+    record_columns,
+)
+
+
+class FakeTransaction:
+    def __init__(self, log):
+        self.log = log
+
+    async def start(self):
+        self.log.append("begin")
+
+    async def commit(self):
+        self.log.append("commit")
+
+    async def rollback(self):
+        self.log.append("rollback")
+
+
+class FakeConnection:
+    def __init__(self, log, fail_on):
+        self.log, self.fail_on = log, fail_on
+        self.rows = []
+
+    def transaction(self):
+        return FakeTransaction(self.log)
+
+    async def copy_records_to_table(self, table, records, columns):
+        batch = list(records)
+        if any(r[2] == self.fail_on for r in batch):
+            raise RuntimeError("copy failed")
+        await asyncio.sleep(0)
+        self.rows.extend(batch)
+
+
+class FakePool:
+    def __init__(self, fail_on=None):
+        self.log, self.conns, self.fail_on = [], [], fail_on
+
+    def acquire(self):
+        pool = self
+
+        class _Ctx:
+            async def __aenter__(self):
+                conn = FakeConnection(pool.log, pool.fail_on)
+                pool.conns.append(conn)
+                return conn
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return _Ctx()
+
+
+@pytest.fixture
+def fact():
+    n = 40
+    return pd.DataFrame({
+        "chip_id": [f"c{i % 4}" for i in range(n)],
+        "aoi_id": ["a"] * n,
+        "time_id": [f"2019_{i % 5 + 1:02d}" for i in range(n)],
+        "id": range(n),
+        "geometry": [box(0, 0, 1, 1)] * n,
+        "centroid": [Point(0.5, 0.5)] * n,
+        "aoi_geometry": [None] * n,
+    })
+
+
+def test_records_encode_ewkb(fact):
+    rec = next(iter_records(fact, "fact_chip_observation", batch_rows=7))
+    assert rec[:4] == ("c0", "a", "2019_01", 0)
+    assert shapely.get_srid(shapely.from_wkb(rec[4])) == 32613
+    assert rec[6] is None
+
+
+def test_categorical_columns_encode_like_objects(fact):
+    cat = fact.astype({"chip_id": "category", "aoi_id": "category", "time_id": "category"})
+    cat["chip_id"] = cat["chip_id"].cat.add_categories(["unused"])
+    cat.loc[6, "chip_id"] = None
+    expected = fact.astype({"chip_id": object})
+    expected.loc[6, "chip_id"] = None
+
+    rows = partition_rows(fact)["2019_02"]
+    columns = record_columns(cat, "fact_chip_observation")
+    got = list(iter_records(cat, "fact_chip_observation", rows, batch_rows=3, columns=columns))
+    assert got == list(iter_records(expected, "fact_chip_observation", rows, batch_rows=3))
+    assert got[0][:3] == ("c1", "a", "2019_02")
+    assert got[1][0] is None
+
+
+def test_partitions_balanced(fact):
+    parts = partition_rows(fact)
+    buckets = balance_partitions(parts, 2)
+    assert sorted(k for b in buckets for k in b) == sorted(parts)
+    assert len(buckets) == 2
+
+
+def test_all_partitions_commit(fact):
+    pool = FakePool()
+    stats = asyncio.run(load_fact_parallel(pool, fact, n_connections=3, batch_rows=4))
+
+    assert sum(s.rows for s in stats) == len(fact)
+    assert pool.log.count("commit") == 3 and "rollback" not in pool.log
+
+
+def test_one_failure_rolls_back_everything(fact):
+    pool = FakePool(fail_on="2019_03")
+    with pytest.raises(RuntimeError):
+        asyncio.run(load_fact_parallel(pool, fact, n_connections=3, batch_rows=4))
+
+    assert "commit" not in pool.log
+    assert pool.log.count("rollback") == 3
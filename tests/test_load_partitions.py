@@ -0,0 +1,98 @@
+"""
+test_load_partitions.py
+
+SQL issued by the partition and index management helpers in etl.load,
+captured with a recording connection.
+"""
+
+import pytest
+
+pytest.importorskip("psycopg2")
+
+from etl.load import (  # noqa: E402
+    DDL_FACT_CHIP_OBS_PARTITIONED,
+    attach_fact_partition,
+    build_indexes,
+    create_fact_partition,
+    create_tables,
+    detach_fact_partition,
+    fact_partition_name,
+    load_partitioned_fact,
+)
+
+
+class RecordingCursor:
+    def __init__(self, log):
+        self.log = log
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.log.append(" ".join(sql.split()) if params is None else (" ".join(sql.split()), params))
+
+
+class RecordingConnection:
+    def __init__(self):
+        self.log, self.commits = [], 0
+
+    def cursor(self):
+        return RecordingCursor(self.log)
+
+    def commit(self):
+        self.commits += 1
+
+
+def test_partitioned_tables_and_partitions():
+    conn = RecordingConnection()
+    create_tables(conn, partitioned=True)
+    assert conn.log[-1] == " ".join(DDL_FACT_CHIP_OBS_PARTITIONED.split())
+    assert "PARTITION BY LIST (time_id)" in conn.log[-1]
+
+    assert create_fact_partition(conn, "2018_01") == "fact_chip_observation_2018_01"
+    assert conn.log[-1] == (
+        "CREATE TABLE IF NOT EXISTS fact_chip_observation_2018_01 "
+        "PARTITION OF fact_chip_observation FOR VALUES IN ('2018_01');"
+    )
+    assert fact_partition_name("2018-02") == "fact_chip_observation_2018_02"
+
+
+def test_attach_and_detach():
+    conn = RecordingConnection()
+    create_fact_partition(conn, "2019_03", attach=False)
+    attach_fact_partition(conn, "2019_03")
+    detach_fact_partition(conn, "2019_03", drop=True)
+
+    statements = [s if isinstance(s, str) else s[0] for s in conn.log]
+    assert "LIKE fact_chip_observation" in statements[0]
+    # CHECK constraint added before ATTACH so the validation scan is skipped
+    assert "ADD CONSTRAINT" in statements[1]
+    assert "ATTACH PARTITION fact_chip_observation_2019_03" in statements[2]
+    assert "DROP CONSTRAINT" in statements[3]
+    assert statements[4].endswith("DETACH PARTITION fact_chip_observation_2019_03;")
+    assert statements[5] == "DROP TABLE fact_chip_observation_2019_03;"
+
+
+def test_indexes_built_after_load(monkeypatch):
+    import etl.load as load
+    import pandas as pd
+
+    conn = RecordingConnection()
+    monkeypatch.setattr(load, "insert_fact_chip_observation", lambda c, f: c.log.append("INSERT"))
+
+    fact = pd.DataFrame({"time_id": ["2018_02", "2018_01", "2018_02"]})
+    load_partitioned_fact(conn, fact)
+    build_indexes(conn)
+
+    assert [s for s in conn.log if "PARTITION OF" in s] == [
+        load.fact_partition_ddl("2018_01"),
+        load.fact_partition_ddl("2018_02"),
+    ]
+    insert_at = conn.log.index("INSERT")
+    index_at = [i for i, s in enumerate(conn.log) if s.startswith("CREATE INDEX")]
+    assert index_at and min(index_at) > insert_at
+    assert any("USING GIST (geometry)" in s and "dim_chip" in s for s in conn.log)
+    assert conn.log[-1] == "ANALYZE fact_chip_observation;"
@@ -0,0 +1,110 @@
+import io
+import json
+import logging
+import threading
+
+import pytest
+
+pytest.importorskip("pythonjsonlogger")
+pytest.importorskip("yaml")
+
+from ml_end_to_end_pipeline.logging_config import (  # noqa: E402
+    REQUEST_LOGGER,
+    EndpointSampler,
+    configure_logging,
+    install_queue_logging,
+    parse_sample_rates,
+    stop_queue_logging,
+)
+
+
+@pytest.fixture
+def json_stream(tmp_path, monkeypatch):
+    """Apply logging_config.yaml with the console handler writing to a buffer."""
+    from pathlib import Path
+
+    config = Path(__file__).resolve().parents[1] / "logging_config.yaml"
+    text = config.read_text().replace("ext://sys.stdout", "ext://sys.stderr")
+    path = tmp_path / "logging.yaml"
+    path.write_text(text)
+
+    stream = io.StringIO()
+    monkeypatch.setattr("sys.stderr", stream)
+    monkeypatch.delenv("LOG_SAMPLE_RATES", raising=False)
+    configure_logging(str(path))
+    yield stream
+    stop_queue_logging()
+    logging.config.dictConfig({"version": 1, "disable_existing_loggers": False})
+
+
+def test_parse_sample_rates():
+    assert parse_sample_rates("/predict=0.1, default=1") == {"/predict": 0.1, "default": 1.0}
+    assert parse_sample_rates(None) == {}
+
+
+def test_sampler_keeps_warnings_and_respects_rates():
+    sampler = EndpointSampler({"/predict": 0.0, "/predict/batch": 0.5}, seed=0)
+
+    def record(level, endpoint):
+        r = logging.LogRecord("x", level, __file__, 1, "msg", None, None)
+        r.endpoint = endpoint
+        return r
+
+    assert not sampler.filter(record(logging.INFO, "/predict"))
+    assert sampler.filter(record(logging.WARNING, "/predict"))
+    assert sampler.filter(record(logging.INFO, "/health"))
+    kept = sum(sampler.filter(record(logging.INFO, "/predict/batch")) for _ in range(2000))
+    assert 850 < kept < 1150
+
+
+def test_json_output_formatted_on_listener_thread(json_stream):
+    rendered_on = []
+
+    class Probe:
+        def __str__(self):
+            rendered_on.append(threading.current_thread().name)
+            return "probe"
+
+    logging.getLogger(REQUEST_LOGGER).info(
+        "value=%s", Probe(), extra={"endpoint": "/predict", "latency_ms": 1.5}
+    )
+    stop_queue_logging()   # drains the queue
+
+    line = json.loads(json_stream.getvalue().strip().splitlines()[-1])
+    assert line["message"] == "value=probe"
+    assert line["endpoint"] == "/predict"
+    assert line["latency_ms"] == 1.5
+    assert line["level"] == "INFO"
+    # pytest's own capture handlers also render in the test thread; ours must not
+    assert any(name != threading.current_thread().name for name in rendered_on)
+
+
+def test_queue_handler_does_not_format_in_caller():
+    import queue
+
+    from ml_end_to_end_pipeline.logging_config import LazyQueueHandler
+
+    q = queue.SimpleQueue()
+    record = logging.LogRecord("x", logging.INFO, __file__, 1, "a=%s b=%s", ([1], 2), None)
+    LazyQueueHandler(q).emit(record)
+
+    queued = q.get_nowait()
+    assert queued is record
+    assert queued.args == ([1], 2) and not hasattr(queued, "message")
+
+
+def test_install_queue_logging_moves_handlers():
+    lg = logging.getLogger("test_queue_logging")
+    stream = io.StringIO()
+    lg.addHandler(logging.StreamHandler(stream))
+    lg.propagate = False
+    lg.setLevel(logging.INFO)
+    try:
+        install_queue_logging(["test_queue_logging"], include_root=False)
+        assert [type(h).__name__ for h in lg.handlers] == ["LazyQueueHandler"]
+        lg.info("hello %s", "world")
+        stop_queue_logging()
+        assert stream.getvalue() == "hello world\n"
+    finally:
+        stop_queue_logging()
+        lg.handlers.clear()
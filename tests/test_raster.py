@@ -0,0 +1,84 @@
+import os
+
+import numpy as np
+import pytest
+
+rasterio = pytest.importorskip("rasterio")
+from rasterio.transform import from_origin  # noqa: E402
+
+from etl.raster import (  # noqa: E402
+    build_raster_features,
+    find_mosaics,
+    image_stats,
+    udm_path_for,
+)
+
+CHIP = "L15-0331E-1257N_1327_3160_13"
+
+
+def _write_tif(path, data, block=16):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    count, height, width = data.shape
+    with rasterio.open(
+        path, "w", driver="GTiff", width=width, height=height, count=count,
+        dtype=data.dtype, transform=from_origin(500000, 4400000, 4.77, 4.77),
+        tiled=True, blockxsize=block, blockysize=block,
+    ) as dst:
+        dst.write(data)
+
+
+@pytest.fixture
+def mosaic_root(tmp_path):
+    rng = np.random.default_rng(0)
+    root = tmp_path / "train"
+    arrays = {}
+    for month in (1, 2):
+        name = f"global_monthly_2018_{month:02d}_mosaic_{CHIP}"
+        rgb = rng.integers(1, 255, (3, 48, 64), dtype=np.uint8)
+        alpha = np.full((1, 48, 64), 255, dtype=np.uint8)
+        alpha[0, :8] = 0   # top rows outside the footprint
+        image = str(root / "aoi_a" / "images" / f"{name}.tif")
+        _write_tif(image, np.concatenate([rgb, alpha]))
+
+        udm = np.zeros((1, 48, 64), dtype=np.uint8)
+        udm[0, 40:, :] = 1   # bottom rows clouded
+        _write_tif(udm_path_for(image), udm)
+        arrays[f"2018_{month:02d}"] = (rgb, alpha[0] > 0)
+    return root, arrays
+
+
+def test_windowed_stats_match_numpy(mosaic_root):
+    root, arrays = mosaic_root
+    mosaics = find_mosaics(str(root))
+    rgb, mask = arrays["2018_01"]
+
+    stats = image_stats(mosaics["path"][0], udm_path_for(mosaics["path"][0]))
+
+    red, green = rgb[0][mask].astype(float), rgb[1][mask].astype(float)
+    grvi = (green - red) / (green + red)
+    assert stats["valid_fraction"] == pytest.approx(40 / 48)
+    assert stats["red_mean"] == pytest.approx(red.mean())
+    assert stats["green_std"] == pytest.approx(green.std())
+    assert stats["grvi_mean"] == pytest.approx(grvi.mean())
+    assert stats["cloud_fraction"] == pytest.approx(8 / 40)
+
+
+def test_features_cached_by_mtime(mosaic_root, tmp_path, capsys):
+    root, _ = mosaic_root
+    mosaics = find_mosaics(str(root))
+    cache_dir = str(tmp_path / "cache")
+
+    first = build_raster_features(mosaics, cache_dir=cache_dir, workers=2)
+    assert list(first["time_id"]) == ["2018_01", "2018_02"]
+    assert (first["chip_id"] == CHIP).all()
+
+    second = build_raster_features(mosaics, cache_dir=cache_dir, workers=2)
+    assert "(2 from cache)" in capsys.readouterr().out
+    assert first.equals(second)
+
+    # Touching one mosaic invalidates only its entry
+    path = mosaics["path"][0]
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    build_raster_features(mosaics, cache_dir=cache_dir, workers=2)
+    assert "(1 from cache)" in capsys.readouterr().out
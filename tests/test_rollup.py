@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from etl.rollup import (
+    build_growth_cube,
+    chip_month_counts,
+    summarize_growth_cube,
+    write_growth_cube,
+)
+
+
+@pytest.fixture
+def fact():
+    """Building-level fact rows: chip a skips 2019_02, chip b has no buildings in 2019_01."""
+    rows = (
+        [("aoi_1", "2019_01", "a")] * 3
+        + [("aoi_1", "2019_03", "a")] * 5
+        + [("aoi_1", "2019_02", "b")] * 2
+        + [("aoi_1", "2019_03", "b")] * 4
+        + [("aoi_2", "2019_01", "c")] * 7
+    )
+    df = pd.DataFrame(rows, columns=["aoi_id", "time_id", "chip_id"])
+    return df.astype("category")
+
+
+def test_chip_month_counts(fact):
+    counts = chip_month_counts(fact).set_index(["chip_id", "time_id"])["building_count"]
+    assert counts[("a", "2019_03")] == 5
+    assert counts.sum() == len(fact)
+    assert len(counts) == 5
+
+
+def test_growth_cube_deltas_and_predictions(fact):
+    predictions = pd.DataFrame({
+        "chip_id": ["a", "b", "zzz"],
+        "time_id": ["2019_03", "2019_03", "2019_03"],
+        "prediction": [1.5, 2.5, 9.0],
+    })
+    cube = build_growth_cube(chip_month_counts(fact), predictions)
+
+    assert list(cube.columns) == [
+        "aoi_id", "time_id", "chip_id", "building_count",
+        "prev_building_count", "delta_count", "prediction",
+    ]
+    keys = list(zip(cube["aoi_id"].astype(str), cube["time_id"].astype(str), cube["chip_id"].astype(str)))
+    assert keys == sorted(keys)
+
+    row = cube.set_index(["chip_id", "time_id"])
+    # Previous observed month of the same chip, not the previous row
+    assert row.loc[("a", "2019_03"), "delta_count"] == 2
+    assert row.loc[("b", "2019_03"), "delta_count"] == 2
+    assert np.isnan(row.loc[("c", "2019_01"), "delta_count"])
+    assert row.loc[("b", "2019_03"), "prediction"] == pytest.approx(2.5)
+    assert np.isnan(row.loc[("a", "2019_01"), "prediction"])
+
+
+def test_summary_and_file(tmp_path, fact):
+    cube = build_growth_cube(chip_month_counts(fact))
+    summary = summarize_growth_cube(cube).set_index(["aoi_id", "time_id"])
+
+    assert summary.loc[("aoi_1", "2019_03"), "chips"] == 2
+    assert summary.loc[("aoi_1", "2019_03"), "building_count"] == 9
+    assert np.isnan(summary.loc[("aoi_1", "2019_03"), "predicted_growth"])
+
+    path = tmp_path / "cube" / "growth_cube.parquet"
+    write_growth_cube(cube, str(path))
+    pd.testing.assert_frame_equal(
+        pd.read_parquet(path).astype({"aoi_id": str, "time_id": str, "chip_id": str}),
+        cube.astype({"aoi_id": str, "time_id": str, "chip_id": str}),
+    )
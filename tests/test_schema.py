@@ -0,0 +1,59 @@
+import pandas as pd
+import pytest
+
+from etl.build_aoi_polygons import build_aoi_polygons
+from etl.generate_synthetic import SyntheticSN7Config, generate_frame
+from etl.ingest import build_raw_chip_records
+from etl.schema import (
+    build_dim_aoi,
+    build_dim_chip,
+    build_dim_time,
+    build_fact_chip_observation,
+    time_id_categorical,
+)
+from etl.transform import build_chip_geometries, join_chips_to_aois
+
+
+@pytest.fixture(scope="module")
+def metadata():
+    config = SyntheticSN7Config(n_aois=3, chips_per_aoi=2, n_months=14, buildings_per_chip=4)
+    chips = build_chip_geometries(build_raw_chip_records(generate_frame(config)))
+    return join_chips_to_aois(chips, build_aoi_polygons(chips))
+
+
+def test_time_id_categorical_orders_across_years():
+    times = time_id_categorical([2019, 2018, 2019, 2018], [1, 12, 1, 3])
+    assert list(times.astype(str)) == ["2019_01", "2018_12", "2019_01", "2018_03"]
+    assert list(times.categories) == ["2018_03", "2018_12", "2019_01"]
+    assert times.ordered
+
+
+def test_fact_matches_string_time_ids(metadata):
+    before = metadata.copy()
+    fact = build_fact_chip_observation(metadata)
+
+    expected = metadata["year"].astype(str) + "_" + metadata["month"].astype(str).str.zfill(2)
+    assert list(fact.columns) == ["chip_id", "aoi_id", "time_id", "id", "geometry", "centroid", "aoi_geometry"]
+    assert (fact["time_id"].astype(str) == expected).all()
+    for col in ("chip_id", "aoi_id", "time_id"):
+        assert isinstance(fact[col].dtype, pd.CategoricalDtype)
+
+    # Projected, not copied: the input is untouched and geometries are shared
+    pd.testing.assert_frame_equal(metadata, before)
+    assert fact["geometry"].iloc[0] is metadata["geometry"].iloc[0]
+
+
+def test_dimensions(metadata):
+    dim_chip = build_dim_chip(metadata)
+    assert dim_chip["chip_id"].is_unique
+    assert dim_chip.index.equals(metadata.drop_duplicates("chip_id").index)
+
+    dim_time = build_dim_time(metadata)
+    assert len(dim_time) == 14
+    assert dim_time["time_id"].astype(str).is_monotonic_increasing
+    row = dim_time.iloc[-1]
+    assert row["time_id"] == f"{row['year']}_{row['month']:02d}"
+
+    dim_aoi = build_dim_aoi(build_aoi_polygons(metadata))
+    assert list(dim_aoi.columns) == ["aoi_id", "name", "geometry"]
+    assert (dim_aoi["name"] == dim_aoi["aoi_id"]).all()
@@ -42,3 +42,41 @@ def test_compute_chip_geometry():
 
     geom = compute_chip_geometry(parsed)
     assert isinstance(geom, Polygon)
+
+
+def test_spatial_join_chips_to_aois():
+    import geopandas as gpd
+    import pandas as pd
+    from shapely.geometry import box
+    from etl.ingest import build_raw_chip_records
+    from etl.transform import build_chip_geometries, spatial_join_chips_to_aois
+
+    filenames = [
+        "global_monthly_2018_01_mosaic_L15-0331E-1257N_1327_3160_13",
+        "global_monthly_2018_02_mosaic_L15-0331E-1257N_1327_3160_13",
+        "global_monthly_2018_01_mosaic_L15-1200E-0900N_20000_14000_33",
+    ]
+    df = pd.DataFrame({"filename": filenames, "id": [0, 1, 2]})
+    chips = build_chip_geometries(build_raw_chip_records(df))
+
+    # Chip footprints in lon/lat, reprojected from each chip's own zone
+    lonlat = [
+        gpd.GeoSeries([g], crs=f"EPSG:326{z}").to_crs("EPSG:4326").iloc[0]
+        for g, z in zip(chips.geometry, chips["utm_zone"])
+    ]
+    a, c = lonlat[0], lonlat[2]
+    aois = gpd.GeoDataFrame(
+        {"aoi_id": ["small", "large", "other"]},
+        geometry=[
+            # Both AOIs contain the first chip's centroid; "large" overlaps more
+            box(a.centroid.x - 1e-4, a.centroid.y - 1e-4, a.centroid.x + 1e-4, a.centroid.y + 1e-4),
+            a.buffer(0.01),
+            c.buffer(0.01),
+        ],
+        crs="EPSG:4326",
+    )
+
+    joined = spatial_join_chips_to_aois(chips, aois)
+
+    assert joined["aoi_id"].tolist() == ["large", "large", "other"]
+    assert joined["aoi_geometry"].iloc[2].contains(joined.geometry.iloc[2].centroid)
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml_end_to_end_pipeline.models.temporal_features import (
+    build_temporal_features,
+    features_for_rows,
+    month_index,
+)
+
+
+@pytest.fixture
+def gappy_table():
+    """Two chips, shuffled, with chip_b missing 2019_03."""
+    rows = [
+        ("chip_a", "2019_01", 0), ("chip_a", "2019_02", 0), ("chip_a", "2019_03", 4),
+        ("chip_a", "2019_04", 6), ("chip_a", "2019_05", 9),
+        ("chip_b", "2019_01", 10), ("chip_b", "2019_02", 12),
+        ("chip_b", "2019_04", 15), ("chip_b", "2019_05", 15),
+    ]
+    df = pd.DataFrame(rows, columns=["chip_id", "time_id", "building_count"])
+    return df.sample(frac=1.0, random_state=3)
+
+
+def test_month_index_crosses_year():
+    np.testing.assert_array_equal(np.diff(month_index(["2019_12", "2020_01"])), [1])
+
+
+def test_lags_respect_missing_months(gappy_table):
+    out = build_temporal_features(gappy_table, lags=[1], windows=[])
+    b = out[out["chip_id"] == "chip_b"].set_index("time_id")
+
+    assert out.index.equals(gappy_table.index)
+    assert b.loc["2019_02", "lag_1"] == 10
+    assert np.isnan(b.loc["2019_04", "lag_1"])  # 2019_03 was not observed
+    assert np.isnan(b.loc["2019_01", "lag_1"])  # never borrows from chip_a
+
+    ffill = build_temporal_features(gappy_table, lags=[1], windows=[], missing="ffill")
+    b = ffill[ffill["chip_id"] == "chip_b"].set_index("time_id")
+    assert b.loc["2019_04", "lag_1"] == 12
+    assert b.loc["2019_04", "growth_1"] == pytest.approx(3 / 12)
+
+
+def test_rolling_matches_pandas_on_complete_months(synthetic_feature_table):
+    out = build_temporal_features(synthetic_feature_table, lags=[2], windows=[3])
+    grouped = synthetic_feature_table.groupby("chip_id")["building_count"]
+
+    expected_mean = grouped.transform(lambda s: s.rolling(3, min_periods=1).mean())
+    expected_std = grouped.transform(lambda s: s.rolling(3, min_periods=1).std())
+    expected_lag = grouped.shift(2)
+
+    np.testing.assert_allclose(out["rolling_mean_3"], expected_mean)
+    np.testing.assert_allclose(out["rolling_std_3"], expected_std)
+    np.testing.assert_allclose(out["lag_2"], expected_lag)
+
+
+def test_rolling_std_is_exact_on_constant_windows():
+    rng = np.random.default_rng(0)
+    months = [f"2019_{m:02d}" for m in range(1, 13)]
+    df = pd.DataFrame({
+        "chip_id": np.repeat([f"chip_{i:05d}" for i in range(5_000)], 12),
+        "time_id": np.tile(months, 5_000),
+        "building_count": rng.integers(0, 60, 60_000),
+    }).sample(frac=0.8, random_state=0)
+    out = build_temporal_features(df, lags=[1], windows=[2, 3])
+
+    # Two observed, equal consecutive months: the 2-month window is constant
+    constant = out["lag_1"] == out["building_count"]
+    assert constant.sum() > 100
+    assert (out.loc[constant, "rolling_std_2"] == 0).all()
+    np.testing.assert_array_equal(
+        out.loc[constant, "rolling_mean_2"], out.loc[constant, "building_count"]
+    )
+
+
+def test_months_since_first_building(gappy_table):
+    out = build_temporal_features(gappy_table, lags=[], windows=[])
+    a = out[out["chip_id"] == "chip_a"].set_index("time_id")["months_since_first_building"]
+    assert np.isnan(a["2019_02"])
+    assert a["2019_03"] == 0 and a["2019_05"] == 2
+
+
+def test_online_rows_match_training(gappy_table):
+    training = build_temporal_features(gappy_table)
+    latest = gappy_table[gappy_table["time_id"] == "2019_05"]
+    history = gappy_table[gappy_table["time_id"] < "2019_05"]
+
+    online = features_for_rows(history, latest)
+    pd.testing.assert_frame_equal(online, training.loc[latest.index])
+
+
+def test_duplicate_chip_months_rejected(gappy_table):
+    with pytest.raises(ValueError, match="Duplicate"):
+        build_temporal_features(pd.concat([gappy_table, gappy_table.head(1)]))
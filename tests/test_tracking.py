@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+import shapely
+
+from etl.generate_synthetic import SyntheticSN7Config, generate_frame
+from etl.tracking import LIFECYCLE_COLUMNS, build_building_lifecycle, match_footprints
+
+
+@pytest.fixture(scope="module")
+def pixel_df():
+    config = SyntheticSN7Config(n_aois=3, chips_per_aoi=2, n_months=6, buildings_per_chip=40)
+    return generate_frame(config)
+
+
+def test_match_footprints_is_one_to_one_by_iou():
+    prev = shapely.box([0, 10, 20], [0, 0, 0], [4, 14, 24], [4, 4, 4])
+    nxt = shapely.box(
+        [0.5, 0.2, 10, 40],
+        [0, 0, 3, 0],
+        [4.5, 4.2, 14, 44],
+        [4, 4, 7, 4],
+    )
+    src, dst, iou = match_footprints(prev, nxt, min_iou=0.5)
+
+    # prev 0 overlaps next 0 and 1; the better (shift 0.2) wins
+    # prev 1 overlaps next 2 with IoU 1/7 < 0.5; prev 2 has no partner
+    assert src.tolist() == [0]
+    assert dst.tolist() == [1]
+    assert iou[0] == pytest.approx(3.8 / 4.2)
+
+
+def test_match_footprints_falls_back_to_next_best_partner():
+    prev = shapely.box([0, 3], [0, 0], [10, 13], [10, 10])
+    nxt = shapely.box([1, 6], [0, 0], [11, 16], [10, 10])
+    src, dst, iou = match_footprints(prev, nxt, min_iou=0.5)
+
+    # Both prevs prefer next 0; prev 0 takes it (9/11), so prev 1 must
+    # settle for next 1 (7/13) rather than go unmatched
+    assert src.tolist() == [0, 1]
+    assert dst.tolist() == [0, 1]
+    np.testing.assert_allclose(iou, [9 / 11, 7 / 13])
+
+
+def test_match_footprints_empty_months():
+    prev = shapely.box([0], [0], [1], [1])
+    src, dst, iou = match_footprints(prev, np.array([], dtype=object))
+    assert len(src) == len(dst) == len(iou) == 0
+
+
+def test_lifecycle_recovers_persistent_ids(pixel_df):
+    lifecycle = build_building_lifecycle(pixel_df, workers=1)
+    assert list(lifecycle.columns) == LIFECYCLE_COLUMNS
+
+    # Synthetic buildings keep their id and footprint, so each id is one track
+    chip = pixel_df["filename"].str.split("_mosaic_").str[1]
+    months = pixel_df.groupby([chip, pixel_df["id"]]).size()
+    assert not lifecycle.duplicated(["chip_id", "building_id"]).any()
+    observed = lifecycle.set_index(["chip_id", "building_id"])["months_observed"]
+    assert observed.sort_index().tolist() == months.sort_index().tolist()
+
+    # Buildings only appear (counts grow); nothing is demolished
+    first = lifecycle.groupby("chip_id")["first_time_id"].transform("min")
+    np.testing.assert_array_equal(lifecycle["appeared"], lifecycle["first_time_id"] > first)
+    assert not lifecycle["disappeared"].any()
+    assert (lifecycle["mean_iou"].dropna() >= 0.5).all()
+
+
+def test_lifecycle_flags_disappearing_buildings():
+    fn = "global_monthly_2018_{:02d}_mosaic_L15-0001E-0001N_100_200_13"
+    box = "POLYGON ((0 0, 10 0, 10 10, 0 10, 0 0))"
+    moved = "POLYGON ((50 50, 60 50, 60 60, 50 60, 50 50))"
+    pixels = pd.DataFrame({
+        "filename": [fn.format(1), fn.format(2), fn.format(3), fn.format(3)],
+        "id": [7, 7, 8, 9],
+        "geometry": [box, box, moved, "POLYGON EMPTY"],
+    })
+    lifecycle = build_building_lifecycle(pixels, workers=1)
+
+    assert lifecycle[["track_id", "building_id", "first_time_id", "last_time_id",
+                      "months_observed", "appeared", "disappeared"]].values.tolist() == [
+        [0, 7, "2018_01", "2018_02", 2, False, True],
+        [1, 8, "2018_03", "2018_03", 1, True, False],
+    ]
+
+
+def test_parallel_batches_match_serial(pixel_df):
+    serial = build_building_lifecycle(pixel_df, workers=1)
+    parallel = build_building_lifecycle(pixel_df, workers=2, batch_rows=200)
+    pd.testing.assert_frame_equal(serial, parallel)